@@ -1,316 +1,870 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import json
+import time
+
+# 启动计时从模块导入开始
+_IMPORT_STARTED = time.perf_counter()
+
+import importlib
 import os
-import subprocess
 import sys
-import ctypes
-from ctypes import Structure, c_void_p, POINTER, WINFUNCTYPE
-from ctypes.wintypes import DWORD, LONG, WORD, UINT, HBITMAP, HDC, HGDIOBJ, RECT, INT, LPARAM, LPCSTR, HICON
-import tempfile
-from pathlib import Path
-from io import BytesIO
+import threading
+import queue
+
+# 计时装饰器在定义类时就要用到
+import instrument
+
+
+class _LazyModule:
+    """第一次访问属性时才导入的模块"""
+    
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+# 只在需要时才用到的模块延迟导入，加快启动；命令行模式完全不加载Tk
+tk = _LazyModule("tkinter")
+ttk = _LazyModule("tkinter.ttk")
+messagebox = _LazyModule("tkinter.messagebox")
+filedialog = _LazyModule("tkinter.filedialog")
+
+# 命令行启动和列出应用只用到存储、启动引擎、启动组和启动统计；转发给常驻实例时这些也不加载
+catalog_store = _LazyModule("catalog_store")
+launch_engine = _LazyModule("launch_engine")
+launch_groups = _LazyModule("launch_groups")
+telemetry = _LazyModule("telemetry")
+process_priority = _LazyModule("process_priority")
+
+# 只有界面用到的模块
+app_catalog = _LazyModule("app_catalog")
+icon_cache = _LazyModule("icon_cache")
+icon_pixels = _LazyModule("icon_pixels")
+icon_store = _LazyModule("icon_store")
+list_diff = _LazyModule("list_diff")
+path_health = _LazyModule("path_health")
+pe_icons = _LazyModule("pe_icons")
+prefetch = _LazyModule("prefetch")
+search_index = _LazyModule("search_index")
+supervisor = _LazyModule("supervisor")
+ui_scheduler = _LazyModule("ui_scheduler")
+
+_IMPORT_FINISHED = time.perf_counter()
+
+# 列表中图标在100%缩放（96 DPI）下的尺寸（像素），高DPI时按缩放比例选用更大的图标
+ICON_SIZE = 32
+# 内存中图标缓存的上限（字节），None 为 icon_cache 的默认上限
+ICON_CACHE_BYTES = None
+# 后台图标加载线程数
+ICON_WORKERS = 4
+# 可见区域之外额外预加载的行数
+ICON_OVERSCAN = 10
+# 检查后台图标结果的间隔（毫秒）
+ICON_POLL_MS = 15
+# 搜索输入防抖延迟（毫秒）
+SEARCH_DEBOUNCE_MS = 80
+# 加载后界面空闲时每批建立搜索索引的应用数，以及两批之间的间隔（毫秒）
+INDEX_BUILD_BATCH = 500
+INDEX_BUILD_MS = 10
+# 应用数量达到该值时使用虚拟列表
+VIRTUAL_LIST_THRESHOLD = 2000
+# 应用数量低于该值时换回普通列表（低于启用的数量，避免在阈值附近反复切换）
+VIRTUAL_LIST_EXIT = VIRTUAL_LIST_THRESHOLD // 2
+# 检查后台扫描结果的间隔（毫秒）
+SCAN_POLL_MS = 50
+# 批量导入确认框中最多列出的应用数
+SCAN_PREVIEW_COUNT = 15
+# 路径检查完成后多久取一次结果（毫秒）
+HEALTH_POLL_MS = 50
+# 定期重新检查所有路径的间隔（毫秒），None 为与检查结果的有效期 path_health.HEALTH_TTL 一致
+HEALTH_REFRESH_MS = None
+# 启动前的路径检查超过这段时间还没有结果（例如网络驱动器没有响应）时放弃启动并提示（毫秒）
+HEALTH_LAUNCH_TIMEOUT_MS = 10 * 1000
+# 路径不存在的行的文字颜色
+BROKEN_ROW_COLOR = "#a0a0a0"
+# 正在运行的应用的文字颜色
+RUNNING_ROW_COLOR = "#1a7f37"
+# 有子进程运行时检查退出结果的间隔（毫秒）
+SUPERVISOR_POLL_MS = 250
+# 启动组运行时检查成员就绪的间隔（毫秒）
+GROUP_POLL_MS = 50
+# 选中应用后停顿这么久才开始预读（毫秒），快速滚动列表时不会为每个经过的应用读盘
+PREFETCH_DELAY_MS = 150
+# 设置为 0 时不预读
+PREFETCH_ENABLED = os.environ.get("APPLAUNCHER_PREFETCH", "1") != "0"
+# 启动已在运行的应用时: focus 切换到它的窗口（找不到窗口时不启动），refuse 不启动，allow 再启动一个
+# 条目中的 "duplicate" 字段可以单独设置
+DUPLICATE_LAUNCH = os.environ.get("APPLAUNCHER_DUPLICATE", "focus")
+# 应用数据存储后端: json（apps.json + 日志）或 sqlite
+CATALOG_BACKEND = os.environ.get("APPLAUNCHER_STORE", "json")
+
+# 命令行模式的退出码
+EXIT_OK = 0
+EXIT_NOT_FOUND = 3
+EXIT_AMBIGUOUS = 4
+EXIT_PATH_MISSING = 5
+EXIT_LAUNCH_FAILED = 6
+EXIT_RESIDENT_FAILED = 7
+EXIT_ALREADY_RUNNING = 8
+# 常驻模式下取出转发命令的间隔（毫秒）
+RESIDENT_POLL_MS = 20
+
+def record_launch(store, app_name):
+    """记录启动次数和时间，用于搜索排序"""
+    app_data = store.apps[app_name]
+    app_data["launch_count"] = app_data.get("launch_count", 0) + 1
+    app_data["last_launched"] = time.time()
+    store.put(app_name, app_data)
+
+def resolve_app_name(apps, name, index=None):
+    """按名称查找应用：精确匹配、忽略大小写匹配、唯一的搜索结果，返回匹配到的名称列表
+
+    index 为已建好的搜索索引（常驻实例），没有时临时建立
+    """
+    if name in apps:
+        return [name]
+    
+    lowered = name.lower()
+    matches = [app_name for app_name in apps if app_name.lower() == lowered]
+    if matches:
+        return matches
+    
+    if index is None:
+        index = search_index.SearchIndex()
+        index.add_many((app_name, 0, None) for app_name in apps)
+    return index.search(name, fuzzy=False)
+
+def format_duration(seconds):
+    """运行时间: 45秒、12分3秒、2小时5分"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}秒"
+    if seconds < 3600:
+        return f"{seconds // 60}分{seconds % 60}秒"
+    return f"{seconds // 3600}小时{seconds % 3600 // 60}分"
+
+def command_reply(code, message=""):
+    """常驻模式对转发命令的回复"""
+    return {"ok": code == EXIT_OK, "code": code, "message": message}
+
+def choose_icon_size(tk_scaling):
+    """按Tk缩放比例（每点像素数，96 DPI时为4/3）选择图标尺寸"""
+    desired = ICON_SIZE * tk_scaling / (96 / 72)
+    # 允许少量误差，避免 1.99 倍时选到下一档
+    return icon_pixels.choose_variant(desired * 0.95)
 
 class AppLauncher:
-    def __init__(self, root):
+    def __init__(self, root, data_file="apps.json"):
         self.root = root
         self.root.title("应用启动器")
         self.root.geometry("650x750")
         
-        # 图标缓存字典
-        self.icon_cache = {}
+        # 内存图标缓存：相同图标共享一个图像，超过上限时淘汰最久未用的
+        self.icon_cache = icon_cache.IconCache(ICON_CACHE_BYTES or icon_cache.DEFAULT_MAX_BYTES)
         
         # 默认图标
         self.default_icon = None
         
-        # 存储应用数据
-        self.apps = {}
-        self.data_file = "apps.json"
+        # 按屏幕缩放比例选择图标尺寸
+        self.icon_size = choose_icon_size(float(self.root.tk.call("tk", "scaling")))
+        
+        # 应用数据：界面只是应用目录的视图，修改通过目录写入存储
+        self.data_file = data_file
+        self.store = catalog_store.open_store(self.data_file, CATALOG_BACKEND)
+        self.catalog = app_catalog.AppCatalog(self.store)
+        
+        # 持久化图标图集（与apps.json位于同一目录）
+        self.icon_store = icon_store.IconAtlas(os.path.dirname(os.path.abspath(self.data_file)))
+        
+        # 启动统计（与apps.json位于同一目录）
+        self.telemetry = telemetry.Telemetry(telemetry_file(self.data_file))
+        
+        # 后台图标加载：应用名称 -> Future，结果通过队列交回主线程
+        # 线程池在第一次需要加载图标时才创建
+        self.icon_executor = None
+        self.icon_jobs = {}
+        self.icon_results = queue.Queue()
+        self.icon_poll_id = None
+        
+        # 列表刷新计时：首次显示和图标全部加载完成的耗时（秒）
+        self.list_update_started = None
+        self.icon_timing = {"first_paint": None, "fully_loaded": None}
         
         # 当前选中的应用
         self.selected_app = None
         
+        # 列表当前显示的行（与Treeview保持一致）
+        self.visible_apps = []
+        
+        # 高频界面事件（悬停、搜索输入、滚动、改变大小）合并后每帧最多处理一次
+        self.ui = ui_scheduler.FrameScheduler(self.root)
+        
+        # 批量导入：扫描器在第一次使用时创建，扫描在后台线程进行
+        self.scanner = None
+        self.scan_results = queue.Queue()
+        
+        # 路径健康检查：后台检查应用路径和环境路径是否存在，界面只读取缓存的结果
+        self.health = path_health.PathHealth()
+        self.health_poll_id = None
+        self.health_refresh_id = None
+        # 等待路径检查完成后再启动的 [(应用名称, 应用路径, reply, 请求时间)]，reply 为转发命令的回复函数
+        self.pending_launches = []
+        # 启动引擎：缓存每个应用的启动参数，不经过shell直接创建进程
+        self.launcher = launch_engine.LaunchEngine()
+        # 启动监督：记录启动的子进程，在后台等待退出
+        self.supervisor = supervisor.Supervisor()
+        self.supervisor_poll_id = None
+        # 正在运行的启动组：[(GroupRun, reply)]
+        self.group_runs = []
+        self.group_poll_id = None
+        # 分批建立搜索索引的定时器
+        self.index_build_id = None
+        # 启动前预读：选中应用后在后台把程序和它的DLL读入系统缓存
+        self.prefetcher = prefetch.Prefetcher() if PREFETCH_ENABLED else None
+        
+        # 常驻模式：接收其他实例转发的命令（start_resident 后才创建）
+        self.resident = None
+        
+        # 列表更新统计：累计插入/删除/移动的行数
+        self.list_stats = {"updates": 0, "inserted": 0, "deleted": 0, "moved": 0, "last_touched": 0}
+        
+        # 启动各阶段耗时（秒）
+        self.startup_timings = {}
+        
         # 加载保存的应用数据
+        started = time.perf_counter()
         self.load_apps()
+        self.startup_timings["load_apps"] = time.perf_counter() - started
+        
+        # 清理已不在列表中的应用图标
+        self.icon_store.retain(self.catalog.app_paths())
         
         # 创建UI
+        started = time.perf_counter()
         self.create_widgets()
+        self.startup_timings["create_widgets"] = time.perf_counter() - started
+        
+        # 后台检查所有路径，F5 强制重新检查
+        self.check_paths()
+        self.root.bind("<F5>", lambda event: self.check_paths(force=True))
+        
+        self.root.protocol("WM_DELETE_WINDOW", self.on_window_close)
     
     def create_default_icon(self):
         """创建默认图标"""
-        # 创建一个简单的默认图标 (32x32)
-        width = height = 32
-        rgb_data = bytearray(width * height * 3)
-        
-        # 创建一个简单的蓝色应用图标
-        for y in range(height):
-            for x in range(width):
-                idx = (y * width + x) * 3
-                # 创建一个简单的"应用"图标
-                if 6 <= x <= 25 and 6 <= y <= 25:
-                    # 蓝色方块
-                    rgb_data[idx] = 0      # R
-                    rgb_data[idx+1] = 0    # G
-                    rgb_data[idx+2] = 200  # B
-                else:
-                    # 浅灰色背景
-                    rgb_data[idx] = 240    # R
-                    rgb_data[idx+1] = 240  # G
-                    rgb_data[idx+2] = 240  # B
+        # 创建一个与列表图标同样大小的默认图标
+        width = height = self.icon_size
+        rgb_data = icon_pixels.default_icon_rgb(width)
         
         # 转换为PhotoImage
-        ppm_data = f"P6\n{width} {height}\n255\n".encode() + rgb_data
+        ppm_data = icon_pixels.rgb_to_ppm(rgb_data, width, height)
         self.default_icon = tk.PhotoImage(data=ppm_data, width=width, height=height)
     
+    @instrument.timed("extract_icon_with_ctypes")
     def extract_icon_with_ctypes(self, app_path, size=32):
-        """使用ctypes提取exe文件图标 - 改进版本"""
+        """使用ctypes提取exe文件图标（PE资源解析失败时的备用方法），返回 (bgra_data, width, height)"""
+        if sys.platform != "win32":
+            return None
+        
         try:
-            # 定义必要的结构
-            class BITMAPINFOHEADER(Structure):
-                _fields_ = [
-                    ("biSize", DWORD),
-                    ("biWidth", LONG),
-                    ("biHeight", LONG),
-                    ("biPlanes", WORD),
-                    ("biBitCount", WORD),
-                    ("biCompression", DWORD),
-                    ("biSizeImage", DWORD),
-                    ("biXPelsPerMeter", LONG),
-                    ("biYPelsPerMeter", LONG),
-                    ("biClrUsed", DWORD),
-                    ("biClrImportant", DWORD),
-                ]
-            
-            class BITMAPINFO(Structure):
-                _fields_ = [("bmiHeader", BITMAPINFOHEADER), ("bmiColors", DWORD * 3)]
+            import ctypes
+            import win32_api
             
             # 获取Windows API函数
-            shell32 = ctypes.windll.shell32
-            user32 = ctypes.windll.user32
-            gdi32 = ctypes.windll.gdi32
-            
-            # 首先，尝试提取大图标（通常是32x32或更大）
-            large_icons = ctypes.c_void_p()
-            small_icons = ctypes.c_void_p()
-            
-            # 提取图标
-            icon_count = shell32.ExtractIconExW(app_path, 0, ctypes.byref(large_icons), ctypes.byref(small_icons), 1)
+            api = win32_api.get_api()
             
-            if icon_count == 0:
+            # 一次调用同时取大图标和小图标，小图标不用，立即释放
+            large_icon = ctypes.c_void_p()
+            small_icon = ctypes.c_void_p()
+            icon_count = api.ExtractIconExW(app_path, 0, ctypes.byref(large_icon), ctypes.byref(small_icon), 1)
+            if small_icon:
+                api.DestroyIcon(small_icon)
+            if icon_count == 0 or not large_icon:
                 return None
             
-            # 使用大图标
-            hIcon = large_icons
-            
-            # 获取图标尺寸
-            icon_size = 32  # 默认32x32
-            
-            # 尝试获取更大的图标
-            for test_size in [256, 128, 64, 48]:
-                # 尝试提取指定大小的图标
-                test_icon = shell32.ExtractIconExW(app_path, 0, None, None, 1)
-                if test_icon > 0:
-                    # 有图标，尝试加载
-                    hTestIcon = ctypes.c_void_p()
-                    shell32.ExtractIconExW(app_path, 0, ctypes.byref(hTestIcon), None, 1)
-                    if hTestIcon:
-                        # 检查图标尺寸
-                        icon_info = ctypes.create_string_buffer(ctypes.sizeof(ctypes.c_void_p) * 5)
-                        if user32.GetIconInfo(hTestIcon, ctypes.byref(icon_info)):
-                            # 获取尺寸
-                            icon_size = test_size
-                            hIcon = hTestIcon
-                            # 清理之前的图标
-                            if hIcon != large_icons:
-                                user32.DestroyIcon(large_icons)
-            
-            # 准备绘制图标
-            hdc = user32.GetDC(0)
-            memdc = gdi32.CreateCompatibleDC(hdc)
-            
-            # 使用提取到的图标尺寸
-            width = height = min(icon_size, 32)  # 限制最大为32x32，避免太大
-            
-            # 创建位图
-            hbitmap = gdi32.CreateCompatibleBitmap(hdc, width, height)
-            old_bitmap = gdi32.SelectObject(memdc, hbitmap)
-            
-            # 清空背景为白色
-            gdi32.PatBlt(memdc, 0, 0, width, height, 0x00F00021)  # PATCOPY | WHITENESS
-            
-            # 绘制图标
-            user32.DrawIconEx(memdc, 0, 0, hIcon, width, height, 0, 0, 3)
-            
-            # 获取位图数据
-            bmi = BITMAPINFO()
-            bmi.bmiHeader.biSize = ctypes.sizeof(BITMAPINFOHEADER)
-            bmi.bmiHeader.biPlanes = 1
-            bmi.bmiHeader.biBitCount = 32
-            bmi.bmiHeader.biCompression = 0
-            bmi.bmiHeader.biClrUsed = 0
-            bmi.bmiHeader.biClrImportant = 0
-            bmi.bmiHeader.biWidth = width
-            bmi.bmiHeader.biHeight = -height  # 负值表示从上到下的位图
-            
-            data_size = width * height * 4
-            data = ctypes.create_string_buffer(data_size)
-            
-            result = gdi32.GetDIBits(memdc, hbitmap, 0, height, data, ctypes.byref(bmi), 0)
-            
-            # 清理资源
-            gdi32.SelectObject(memdc, old_bitmap)
-            gdi32.DeleteObject(hbitmap)
-            gdi32.DeleteDC(memdc)
-            user32.ReleaseDC(0, hdc)
-            user32.DestroyIcon(hIcon)
+            # 直接读取图标的颜色和掩码位图，保留alpha通道
+            try:
+                ico_data = self.icon_to_ico(large_icon)
+            finally:
+                api.DestroyIcon(large_icon)
             
-            if result != height:
+            if not ico_data:
                 return None
-            
-            # 转换BGRA到RGB
-            raw_data = bytearray(data)
-            rgb_data = bytearray(width * height * 3)
-            
-            for i in range(height * width):
-                src_offset = i * 4
-                dst_offset = i * 3
-                
-                # 获取alpha值
-                alpha = raw_data[src_offset + 3] / 255.0
-                
-                # BGRA -> RGB，考虑alpha通道
-                b = raw_data[src_offset]
-                g = raw_data[src_offset + 1]
-                r = raw_data[src_offset + 2]
-                
-                # 简单的alpha混合到白色背景
-                rgb_data[dst_offset] = int(r * alpha + 255 * (1 - alpha))     # R
-                rgb_data[dst_offset + 1] = int(g * alpha + 255 * (1 - alpha)) # G
-                rgb_data[dst_offset + 2] = int(b * alpha + 255 * (1 - alpha)) # B
-            
-            return rgb_data
+            return pe_icons.ico_bgra(ico_data, size)
             
         except Exception as e:
+            instrument.count("icon.errors")
             print(f"使用ctypes提取图标失败: {e}")
             return None
     
-    def get_app_icon_simple(self, app_path):
-        """简单的图标获取方法，尝试获取最高质量的图标"""
+    @instrument.timed("extract_icon_with_shell")
+    def extract_icon_with_shell(self, app_path, size=32):
+        """通过SHGetFileInfo获取系统显示的图标（快捷方式等没有图标资源的文件），返回 (bgra_data, width, height)"""
+        if sys.platform != "win32":
+            return None
+        
         try:
-            # 使用SHGetFileInfo获取图标
-            from ctypes import wintypes
-            import struct
+            import ctypes
+            import win32_api
             
-            # 定义结构体和常量
-            SHGFI_ICON = 0x000000100
-            SHGFI_LARGEICON = 0x000000000
-            SHGFI_SMALLICON = 0x000000001
+            api = win32_api.get_api()
+            # 在图标线程中调用，Shell函数要求当前线程已初始化COM
+            win32_api.init_com()
             
-            class SHFILEINFO(ctypes.Structure):
-                _fields_ = [
-                    ("hIcon", ctypes.c_void_p),
-                    ("iIcon", ctypes.c_int),
-                    ("dwAttributes", ctypes.c_uint),
-                    ("szDisplayName", ctypes.c_wchar * 260),
-                    ("szTypeName", ctypes.c_wchar * 80)
-                ]
-            
-            shell32 = ctypes.windll.shell32
-            
-            # 获取文件信息
-            sfi = SHFILEINFO()
-            result = shell32.SHGetFileInfoW(
+            sfi = win32_api.SHFILEINFO()
+            result = api.SHGetFileInfoW(
                 app_path, 0, ctypes.byref(sfi), ctypes.sizeof(sfi), 
-                SHGFI_ICON | SHGFI_LARGEICON
+                win32_api.SHGFI_ICON | win32_api.SHGFI_LARGEICON
             )
+            if not result or not sfi.hIcon:
+                return None
             
-            if result and sfi.hIcon:
-                # 创建临时ICO文件
-                temp_dir = tempfile.gettempdir()
-                temp_ico = os.path.join(temp_dir, f"temp_icon_{os.getpid()}.ico")
-                
-                # 保存图标到文件
+            try:
                 ico_data = self.icon_to_ico(sfi.hIcon)
-                if ico_data:
-                    with open(temp_ico, "wb") as f:
-                        f.write(ico_data)
-                    
-                    # 加载为PhotoImage
-                    icon = tk.PhotoImage(file=temp_ico)
-                    
-                    # 清理
-                    os.remove(temp_ico)
-                    ctypes.windll.user32.DestroyIcon(sfi.hIcon)
-                    
-                    return icon
-                
-                ctypes.windll.user32.DestroyIcon(sfi.hIcon)
+            finally:
+                api.DestroyIcon(sfi.hIcon)
+            if not ico_data:
+                return None
+            return pe_icons.ico_bgra(ico_data, size)
         
         except Exception as e:
+            instrument.count("icon.errors")
             print(f"使用SHGetFileInfo获取图标失败: {e}")
-        
-        return None
+            return None
     
     def icon_to_ico(self, hIcon):
-        """将图标句柄转换为ICO文件数据"""
+        """将图标句柄转换为ICO文件数据（32位颜色 + AND掩码）"""
         try:
-            # 获取图标信息
-            from ctypes import wintypes
-            
-            class ICONINFO(ctypes.Structure):
-                _fields_ = [
-                    ("fIcon", wintypes.BOOL),
-                    ("xHotspot", wintypes.DWORD),
-                    ("yHotspot", wintypes.DWORD),
-                    ("hbmMask", wintypes.HBITMAP),
-                    ("hbmColor", wintypes.HBITMAP)
-                ]
+            import ctypes
+            import struct
+            import win32_api
             
-            icon_info = ICONINFO()
-            if not ctypes.windll.user32.GetIconInfo(hIcon, ctypes.byref(icon_info)):
+            api = win32_api.get_api()
+            icon_info = win32_api.ICONINFO()
+            if not api.GetIconInfo(hIcon, ctypes.byref(icon_info)):
                 return None
             
-            # 这里简化处理，实际需要将位图数据转换为ICO格式
-            # 由于比较复杂，这里返回None，使用备用方法
-            return None
+            hdc = api.GetDC(None)
+            try:
+                # 黑白图标没有颜色位图，交给默认图标处理
+                if not icon_info.hbmColor:
+                    return None
+                
+                # 先查询位图尺寸
+                bmi = win32_api.BITMAPINFO()
+                bmi.bmiHeader.biSize = ctypes.sizeof(win32_api.BITMAPINFOHEADER)
+                if not api.GetDIBits(hdc, icon_info.hbmColor, 0, 0, None, ctypes.byref(bmi), win32_api.DIB_RGB_COLORS):
+                    return None
+                width = bmi.bmiHeader.biWidth
+                height = abs(bmi.bmiHeader.biHeight)
+                
+                # 颜色数据：32位，从下到上（ICO中的位图方向）
+                bmi = win32_api.BITMAPINFO()
+                bmi.bmiHeader.biSize = ctypes.sizeof(win32_api.BITMAPINFOHEADER)
+                bmi.bmiHeader.biWidth = width
+                bmi.bmiHeader.biHeight = height
+                bmi.bmiHeader.biPlanes = 1
+                bmi.bmiHeader.biBitCount = 32
+                color = ctypes.create_string_buffer(width * height * 4)
+                if api.GetDIBits(hdc, icon_info.hbmColor, 0, height, color, ctypes.byref(bmi), win32_api.DIB_RGB_COLORS) != height:
+                    return None
+                
+                # AND掩码：1位，每行按4字节对齐
+                mask_stride = (width + 31) // 32 * 4
+                bmi.bmiHeader.biBitCount = 1
+                mask = ctypes.create_string_buffer(mask_stride * height)
+                if icon_info.hbmMask:
+                    api.GetDIBits(hdc, icon_info.hbmMask, 0, height, mask, ctypes.byref(bmi), win32_api.DIB_RGB_COLORS)
+                
+                image = (struct.pack("<IiiHHIIiiII", 40, width, height * 2, 1, 32, 0,
+                                     len(color) + len(mask), 0, 0, 0, 0)
+                         + color.raw + mask.raw)
+                return (struct.pack("<HHH", 0, 1, 1)
+                        + struct.pack("<BBBBHHII", width % 256, height % 256, 0, 0, 1, 32, len(image), 22)
+                        + image)
+            finally:
+                api.ReleaseDC(None, hdc)
+                # GetIconInfo 创建的位图由调用者释放
+                if icon_info.hbmColor:
+                    api.DeleteObject(icon_info.hbmColor)
+                if icon_info.hbmMask:
+                    api.DeleteObject(icon_info.hbmMask)
             
         except Exception as e:
+            instrument.count("icon.errors")
             print(f"转换图标失败: {e}")
             return None
     
-    def get_app_icon(self, app_path):
-        """获取应用程序图标 - 主方法"""
-        if not app_path or not os.path.exists(app_path):
-            if self.default_icon is None:
-                self.create_default_icon()
-            return self.default_icon
-        
-        # 检查缓存
-        if app_path in self.icon_cache:
-            return self.icon_cache[app_path]
+    def get_default_icon(self):
+        """获取默认图标"""
+        if self.default_icon is None:
+            self.create_default_icon()
+        return self.default_icon
+    
+    @instrument.timed("load_icon_data")
+    def load_icon_data(self, app_path, size=None):
+        """读取 size x size 的应用图标PNG数据，返回 (png_data, size, size)，可在后台线程调用"""
+        size = size or self.icon_size
+        try:
+            st = os.stat(app_path)
+        except OSError:
+            return None
         
-        # 首先尝试简单方法
-        icon = self.get_app_icon_simple(app_path)
-        if icon:
-            self.icon_cache[app_path] = icon
-            return icon
+        # 检查磁盘图集（每种尺寸分别缓存）
+        cached = self.icon_store.get(app_path, st, size)
+        if cached:
+            return cached
         
-        # 如果简单方法失败，使用ctypes方法
+        # 直接解析exe中的图标资源，不是PE文件或没有图标时再用ctypes提取，最后取系统显示的图标
+        icon = None
         try:
-            rgb_data = self.extract_icon_with_ctypes(app_path, 32)
-            if rgb_data:
-                # 创建PPM格式数据
-                ppm_data = f"P6\n32 32\n255\n".encode() + rgb_data
-                icon = tk.PhotoImage(data=ppm_data, width=32, height=32)
-                self.icon_cache[app_path] = icon
+            icon = pe_icons.extract_icon_bgra(app_path, size)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, pe_icons.PEFormatError):
+                instrument.count("icon.errors")
+                print(f"解析图标资源失败 {app_path}: {e}")
+        
+        if icon is None:
+            icon = self.extract_icon_with_ctypes(app_path, size)
+        if icon is None:
+            icon = self.extract_icon_with_shell(app_path, size)
+        if icon is None:
+            return None
+        
+        # 缩放到目标尺寸，保留alpha通道
+        bgra, width, height = icon
+        icon_data = icon_pixels.icon_png(bgra, width, height, size), size, size
+        self.icon_store.put(app_path, st, *icon_data)
+        return icon_data
+    
+    @instrument.timed("create_icon_image")
+    def create_icon_image(self, app_path, icon_data):
+        """在主线程中将图标数据转换为PhotoImage并缓存"""
+        if icon_data:
+            image_data, width, height = icon_data
+            
+            # 内容相同的图标（如多个条目指向同一程序）直接共享已有图像
+            digest = icon_cache.content_digest(image_data)
+            icon = self.icon_cache.share(app_path, digest)
+            if icon is not None:
                 return icon
+            
+            try:
+                icon = tk.PhotoImage(data=image_data)
+                # Tk按每像素4字节保存图像
+                return self.icon_cache.put(app_path, icon, digest, width * height * 4)
+            except tk.TclError as e:
+                instrument.count("icon.errors")
+                print(f"加载图标失败 {app_path}: {e}")
+                self.icon_store.discard(app_path)
+        return None
+    
+    def request_icon(self, app_name):
+        """在后台加载应用图标，加载完成后替换列表中的占位图标"""
+        if app_name in self.icon_jobs or app_name not in self.catalog:
+            return
+        
+        app_path = self.catalog[app_name].app_path
+        # 已缓存时顺便标记为最近使用，可见行的图标不会被淘汰
+        if not app_path or self.icon_cache.get(app_path) is not None:
+            return
+        
+        # 已知不存在的路径直接使用默认图标
+        if self.health.known(app_path) is False:
+            self.set_row_icon(app_name, self.get_default_icon())
+            return
+        
+        self.icon_jobs[app_name] = self.get_icon_executor().submit(self._load_icon_job, app_name, app_path)
+        if self.icon_poll_id is None:
+            self.icon_poll_id = self.root.after(ICON_POLL_MS, self.poll_icon_results)
+    
+    def get_icon_executor(self):
+        """图标线程池，第一次使用时创建"""
+        if self.icon_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.icon_executor = ThreadPoolExecutor(max_workers=ICON_WORKERS, thread_name_prefix="icon")
+        return self.icon_executor
+    
+    def save_icons(self):
+        """在图标线程中保存图集（压缩和fsync可能较慢，不在界面线程中进行）"""
+        if self.icon_store.dirty:
+            self.get_icon_executor().submit(self.icon_store.flush)
+    
+    def cancel_icon(self, app_name):
+        """取消尚未开始的图标加载"""
+        future = self.icon_jobs.pop(app_name, None)
+        if future is not None:
+            future.cancel()
+    
+    def _load_icon_job(self, app_name, app_path):
+        """后台线程：读取图标数据并交给主线程"""
+        try:
+            icon_data = self.load_icon_data(app_path)
         except Exception as e:
+            instrument.count("icon.errors")
             print(f"获取图标失败 {app_path}: {e}")
+            icon_data = None
+        self.icon_results.put((app_name, app_path, icon_data))
+    
+    def poll_icon_results(self):
+        """主线程：把后台加载完成的图标替换到列表中"""
+        self.icon_poll_id = None
         
-        # 返回默认图标
-        if self.default_icon is None:
-            self.create_default_icon()
-        return self.default_icon
+        while True:
+            try:
+                app_name, app_path, icon_data = self.icon_results.get_nowait()
+            except queue.Empty:
+                break
+            
+            future = self.icon_jobs.get(app_name)
+            if future is not None and future.done():
+                del self.icon_jobs[app_name]
+            
+            icon = self.create_icon_image(app_path, icon_data)
+            if icon is None:
+                # 提取失败的路径使用默认图标，避免重复提取
+                icon = self.icon_cache.put(app_path, self.get_default_icon(), "default", 0)
+            
+            record = self.catalog.get(app_name)
+            if record is not None and record.app_path == app_path:
+                self.set_row_icon(app_name, icon)
+        
+        if self.icon_jobs:
+            self.icon_poll_id = self.root.after(ICON_POLL_MS, self.poll_icon_results)
+        else:
+            if self.list_update_started is not None and self.icon_timing["fully_loaded"] is None:
+                self.icon_timing["fully_loaded"] = time.perf_counter() - self.list_update_started
+            
+            # 保存新提取的图标
+            self.save_icons()
+    
+    def visible_app_names(self):
+        """返回当前可见（含预加载范围）的列表行"""
+        if self.virtual_list is not None:
+            return self.virtual_list.visible_keys(ICON_OVERSCAN)
+        
+        items = self.visible_apps
+        if not items:
+            return []
+        
+        if self.app_tree.winfo_ismapped():
+            first, last = self.app_tree.yview()
+            start = int(first * len(items))
+            end = int(last * len(items) + 0.999)
+        else:
+            # 窗口尚未显示时按默认高度估算
+            start = 0
+            end = int(self.app_tree.cget("height"))
+        
+        start = max(0, start - ICON_OVERSCAN)
+        end = min(len(items), end + ICON_OVERSCAN)
+        return items[start:end]
+    
+    def pin_row_icons(self):
+        """列表行正在显示的图标不被缓存淘汰（普通列表是全部行，虚拟列表只有可见的行）"""
+        names = self.visible_apps if self.virtual_list is None else list(self.virtual_list.key_slots)
+        records = self.catalog.get_many(names)
+        self.icon_cache.pin(record.app_path for record in records if record is not None)
+    
+    def request_visible_icons(self):
+        """加载可见行的图标，取消已不可见行的加载"""
+        if self.virtual_list is not None:
+            # 滚动后虚拟列表的行显示了其他应用
+            self.pin_row_icons()
+        visible = set(self.visible_app_names())
+        
+        for app_name in [name for name in self.icon_jobs if name not in visible]:
+            self.cancel_icon(app_name)
+        
+        for app_name in visible:
+            self.request_icon(app_name)
+    
+    def row_data(self, app_name):
+        """列表行显示的文字、图标和标签"""
+        icon = self.icon_cache.peek(self.catalog[app_name].app_path) or self.get_default_icon()
+        return self.row_text(app_name), icon, self.row_tags(app_name)
+    
+    def row_text(self, app_name):
+        """列表行显示的文字，正在运行的应用加上说明"""
+        if app_name in self.supervisor.running:
+            return f"  {app_name}  (运行中)"
+        return "  "+app_name
+    
+    def is_broken(self, app_name):
+        """最近一次检查发现应用路径或环境路径不存在"""
+        record = self.catalog[app_name]
+        if self.health.known(record.app_path) is False:
+            return True
+        return bool(record.env_path) and self.health.known(record.env_path, "dir") is False
+    
+    def row_tags(self, app_name):
+        tags = ("broken",) if self.is_broken(app_name) else ()
+        if app_name in self.supervisor.running:
+            tags += ("running",)
+        return tags
+    
+    def refresh_rows(self, names):
+        """按当前状态重绘这些应用的行（文字和标签），详情区域正显示其中的应用时一并更新"""
+        # 悬停显示的应用不一定是选中的应用，鼠标停在同一行时悬停事件会被去重跳过，这里直接重新显示
+        shown = self.ui.last.get("details")
+        if shown in names and shown in self.catalog:
+            self.show_details(shown)
+        if self.virtual_list is not None:
+            self.virtual_list.render()
+            return
+        for app_name in names:
+            if self.app_tree.exists(app_name):
+                self.app_tree.item(app_name, text=self.row_text(app_name), tags=self.row_tags(app_name))
+    
+    def set_row_icon(self, app_name, icon):
+        """更新列表中某个应用的图标"""
+        if self.virtual_list is not None:
+            self.virtual_list.set_image(app_name, icon)
+        elif self.app_tree.exists(app_name):
+            self.app_tree.item(app_name, image=icon)
+    
+    def app_name_for_row(self, iid):
+        """Treeview行对应的应用名称"""
+        if self.virtual_list is not None:
+            return self.virtual_list.key_for_row(iid)
+        return iid
+    
+    def on_tree_scroll(self, first, last):
+        """列表滚动时更新滚动条并加载新出现行的图标"""
+        self.scrollbar.set(first, last)
+        self.schedule_visible_icons()
+    
+    def schedule_visible_icons(self):
+        """连续滚动时每帧只更新一次需要加载的图标"""
+        self.ui.post("visible_icons", self.request_visible_icons)
+    
+    def wait_icons_loaded(self, timeout=None):
+        """处理事件直到当前请求的图标全部加载完成，超时返回False"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self.icon_jobs or not self.icon_results.empty():
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            self.root.update()
+            time.sleep(0.001)
+        return True
+    
+    def health_keys(self, records=None):
+        """需要检查的 (路径, 类型)：应用路径是文件，环境路径是目录"""
+        for record in (self.catalog.records.values() if records is None else records):
+            yield record.app_path, "file"
+            if record.env_path:
+                yield record.env_path, "dir"
+    
+    def check_paths(self, records=None, force=False):
+        """在后台检查路径（默认为全部应用），结果由 poll_health 取回"""
+        self.health.refresh(self.health_keys(records), force)
+        self.schedule_health_poll()
+        
+        # 检查全部路径时顺便安排下一次定期检查
+        if records is None:
+            if self.health_refresh_id is not None:
+                self.root.after_cancel(self.health_refresh_id)
+            interval = HEALTH_REFRESH_MS or path_health.HEALTH_TTL * 1000
+            self.health_refresh_id = self.root.after(interval, self.check_paths)
+    
+    def schedule_health_poll(self):
+        if self.health_poll_id is None and (self.health.busy() or self.pending_launches):
+            self.health_poll_id = self.root.after(HEALTH_POLL_MS, self.poll_health)
+    
+    def poll_health(self):
+        """主线程：取回检查结果，更新状态有变化的行，处理等待中的启动"""
+        self.health_poll_id = None
+        changed = self.health.drain()
+        if changed:
+            self.apply_health_changes({path for path, kind, ok in changed})
+        
+        if self.pending_launches:
+            ready = [item for item in self.pending_launches if self.health.status(item[1]) is not None]
+            # 检查一直没有完成时不能让启动请求无限等待（此时直接启动多半也会卡在同一个路径上）
+            deadline = time.perf_counter() - HEALTH_LAUNCH_TIMEOUT_MS / 1000
+            expired = [item for item in self.pending_launches if item not in ready and item[3] < deadline]
+            self.pending_launches = [item for item in self.pending_launches if item not in ready and item not in expired]
+            for app_name, app_path, reply, requested in ready:
+                self.start_app(app_name, app_path, reply, requested)
+            for app_name, app_path, reply, requested in expired:
+                self.launch_failed(reply, EXIT_LAUNCH_FAILED,
+                                   f"检查应用路径超时（{HEALTH_LAUNCH_TIMEOUT_MS / 1000:g}秒），请稍后再试: {app_path}")
+        
+        self.schedule_health_poll()
+    
+    def apply_health_changes(self, paths):
+        """重绘使用了这些路径的行"""
+        names = self.catalog.users(paths)
+        self.refresh_rows(names)
+        
+        # 不存在的路径改用默认图标，恢复的路径重新加载图标
+        for app_name in names:
+            app_path = self.catalog[app_name].app_path
+            if self.health.known(app_path) is False:
+                self.cancel_icon(app_name)
+            elif self.icon_cache.peek(app_path) is self.get_default_icon():
+                self.icon_cache.discard(app_path)
+        self.request_visible_icons()
+        
+        if self.selected_app in names:
+            self.select_app(self.selected_app)
+    
+    def schedule_supervisor_poll(self):
+        if self.supervisor_poll_id is None and self.supervisor.busy():
+            self.supervisor_poll_id = self.root.after(SUPERVISOR_POLL_MS, self.poll_supervisor)
+    
+    def poll_supervisor(self):
+        """主线程：记录就绪和退出的子进程，更新列表和详情；启动后很快出错退出时提示"""
+        self.supervisor_poll_id = None
+        finished = []
+        for event, child in self.supervisor.drain():
+            if event == supervisor.EVENT_READY:
+                self.record_ready(child)
+            else:
+                self.telemetry.record_exit(child.tag["seq"], child.name, child.runtime(), child.returncode)
+                finished.append(child)
+        names = {child.name for child in finished}
+        if names:
+            self.refresh_rows(names)
+        
+        # 选中的应用刚退出或正在运行时更新详情中的状态和运行时间
+        if self.selected_app in names or (self.selected_app is not None and self.supervisor.is_running(self.selected_app)):
+            self.detail_state.config(text=self.state_detail(self.selected_app))
+        
+        for child in finished:
+            if not child.crashed:
+                continue
+            instrument.count("launch.crashed")
+            message = f"{child.name} 启动后很快退出 (退出码 {child.returncode})"
+            if self.root.state() == "withdrawn":
+                print(message, file=sys.stderr)
+            else:
+                messagebox.showwarning("提示", message)
+        
+        self.schedule_supervisor_poll()
+    
+    def record_ready(self, child):
+        """子进程就绪（或等待超时）：写入启动统计"""
+        tag = child.tag
+        ready_ms = (child.ready - tag["requested"]) * 1000 if child.ready is not None else telemetry.NAN
+        tag["seq"] = self.telemetry.record_launch(child.name, tag["resolve_ms"], tag["spawn_ms"], ready_ms)
+    
+    def start_resident(self):
+        """开始接收其他实例转发的命令，已有常驻实例时返回False"""
+        import resident
+        server = resident.ResidentServer(self.data_file)
+        if not server.start():
+            return False
+        self.resident = server
+        self.root.after(RESIDENT_POLL_MS, self.poll_resident)
+        return True
+    
+    def poll_resident(self):
+        """主线程：执行转发来的命令"""
+        for request, reply in self.resident.pending():
+            try:
+                self.handle_command(request, reply)
+            except Exception as e:
+                reply(command_reply(EXIT_RESIDENT_FAILED, f"处理命令时出错: {e}"))
+        if self.resident is not None:
+            self.root.after(RESIDENT_POLL_MS, self.poll_resident)
+    
+    def handle_command(self, request, reply):
+        """执行一条转发来的命令，结果通过 reply 返回（启动应用时可能在路径检查完成后才返回）"""
+        cmd = request.get("cmd")
+        if cmd == "ping":
+            reply(command_reply(EXIT_OK))
+        elif cmd == "show":
+            self.show_window()
+            reply(command_reply(EXIT_OK))
+        elif cmd == "launch":
+            name = str(request.get("name", ""))
+            matches = resolve_app_name(self.catalog.records, name, self.catalog.index)
+            if not matches:
+                reply(command_reply(EXIT_NOT_FOUND, f"找不到应用: {name}"))
+            elif len(matches) > 1:
+                names = "\n".join(f"  {app_name}" for app_name in matches)
+                reply(command_reply(EXIT_AMBIGUOUS, f"应用名称不唯一: {name}\n{names}"))
+            else:
+                self.request_launch(matches[0], reply)
+        elif cmd == "status":
+            message = command_reply(EXIT_OK)
+            message.update(self.supervisor.snapshot())
+            for child in message["running"]:
+                # 读回实际的CPU亲和性和优先级，确认条目中的调度设置已生效
+                try:
+                    child["scheduling"] = process_priority.query(child["pid"])
+                except OSError:
+                    child["scheduling"] = None
+            reply(message)
+        elif cmd == "reload":
+            self.reload_catalog()
+            reply(command_reply(EXIT_OK, f"已重新加载 {len(self.catalog)} 个应用"))
+        elif cmd == "quit":
+            reply(command_reply(EXIT_OK))
+            self.root.after_idle(self.on_close)
+        else:
+            reply(command_reply(EXIT_RESIDENT_FAILED, f"未知命令: {cmd}"))
+    
+    def show_window(self):
+        """显示并激活窗口"""
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+    
+    def reload_catalog(self):
+        """应用数据被其他进程修改后重新加载"""
+        self.save_apps()
+        self.load_apps()
+        self.launcher.forget()
+        if self.selected_app not in self.catalog:
+            self.clear_selection()
+        self.check_paths()
+        self.filter_apps()
+    
+    def on_window_close(self):
+        """常驻模式下关闭窗口只隐藏，保持数据和图标缓存"""
+        if self.resident is None:
+            self.on_close()
+            return
+        self.save_apps()
+        self.save_icons()
+        self.root.withdraw()
+    
+    def on_close(self):
+        """关闭窗口时停止后台加载并保存数据"""
+        if self.resident is not None:
+            self.resident.close()
+            self.resident = None
+        if self.supervisor_poll_id is not None:
+            self.root.after_cancel(self.supervisor_poll_id)
+            self.supervisor_poll_id = None
+        if self.group_poll_id is not None:
+            self.root.after_cancel(self.group_poll_id)
+            self.group_poll_id = None
+        if self.index_build_id is not None:
+            self.root.after_cancel(self.index_build_id)
+            self.index_build_id = None
+        for run in self.group_runs:
+            run.cancel()
+        self.telemetry.close()
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+        self.ui.shutdown()
+        self.health.shutdown()
+        if self.icon_executor is not None:
+            self.icon_executor.shutdown(wait=True, cancel_futures=True)
+        self.icon_store.flush()
+        self.icon_store.close()
+        
+        try:
+            self.store.close()
+        except Exception as e:
+            messagebox.showerror("错误", f"保存应用数据时出错: {str(e)}")
+        self.root.destroy()
 
     def create_widgets(self):
         # 设置样式
@@ -320,7 +874,7 @@ class AppLauncher:
         # 配置Treeview样式
         style.configure("Treeview", 
                       font=("Arial", 12),  # 增大字体
-                      rowheight=40,  # 增加行高
+                      rowheight=max(40, self.icon_size + 8),  # 增加行高，高DPI时容纳更大的图标
                       background="#ffffff",
                       fieldbackground="#ffffff")
         
@@ -381,7 +935,7 @@ class AppLauncher:
         # 搜索框
         ttk.Label(main_frame, text="搜索应用:").grid(row=5, column=0, sticky=tk.W, pady=5)
         self.search_var = tk.StringVar()
-        self.search_var.trace("w", self.filter_apps)  # 绑定搜索事件
+        self.search_var.trace("w", self.schedule_search)  # 绑定搜索事件
         self.search_entry = ttk.Entry(main_frame, textvariable=self.search_var, width=40, font=("Arial", 10))
         self.search_entry.grid(row=5, column=1, sticky=(tk.W, tk.E), padx=(5, 0), pady=5)
         
@@ -398,10 +952,18 @@ class AppLauncher:
         # 配置列宽
         self.app_tree.column("#0", width=400, stretch=True, anchor="w")
         
+        # 路径不存在的应用显示为灰色
+        self.app_tree.tag_configure("broken", foreground=BROKEN_ROW_COLOR)
+        # 正在运行的应用显示为绿色
+        self.app_tree.tag_configure("running", foreground=RUNNING_ROW_COLOR)
+        
         # 滚动条
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.app_tree.yview)
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
-        self.app_tree.configure(yscrollcommand=scrollbar.set)
+        self.scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.app_tree.yview)
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.app_tree.configure(yscrollcommand=self.on_tree_scroll)
+        
+        # 应用很多时只为可见行创建Treeview项目（每次更新列表时按应用数量选择）
+        self.virtual_list = None
         
         # 绑定选择事件
         self.app_tree.bind('<<TreeviewSelect>>', self.on_app_select)
@@ -419,6 +981,9 @@ class AppLauncher:
         self.delete_btn = ttk.Button(button_frame, text="删除应用", command=self.delete_app, state=tk.DISABLED)
         self.delete_btn.pack(side=tk.LEFT, padx=5)
         
+        self.import_btn = ttk.Button(button_frame, text="批量导入...", command=self.import_library)
+        self.import_btn.pack(side=tk.LEFT, padx=5)
+        
         # 应用详情显示区域
         detail_frame = ttk.LabelFrame(main_frame, text="应用详情", padding="10")
         detail_frame.grid(row=8, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
@@ -436,6 +1001,10 @@ class AppLauncher:
         self.detail_path = ttk.Label(detail_frame, text="", font=("Arial", 9))
         self.detail_path.grid(row=2, column=1, sticky=tk.W, pady=3)
         
+        ttk.Label(detail_frame, text="运行状态:").grid(row=3, column=0, sticky=tk.W, pady=3)
+        self.detail_state = ttk.Label(detail_frame, text="", font=("Arial", 9))
+        self.detail_state.grid(row=3, column=1, sticky=tk.W, pady=3)
+        
         # 初始化应用列表
         self.update_app_list()
     
@@ -466,21 +1035,19 @@ class AppLauncher:
             return
         
         # 检查应用是否已存在
-        if app_name in self.apps:
+        if app_name in self.catalog:
             messagebox.showerror("错误", f"应用 '{app_name}' 已存在!")
             return
         
-        # 添加到应用字典
-        self.apps[app_name] = {
+        # 添加到应用目录并保存（修改会合并后批量写入）
+        record = self.catalog.add(app_name, {
             "env_path": env_path,
             "app_path": app_path
-        }
-        
-        # 保存到文件
-        self.save_apps()
+        })
         
         # 更新列表
-        self.update_app_list()
+        self.filter_apps()
+        self.check_paths([record])
         
         # 清空输入框
         self.app_name_var.set("")
@@ -489,100 +1056,427 @@ class AppLauncher:
         
         messagebox.showinfo("成功", f"应用 '{app_name}' 已添加!")
     
+    def add_apps(self, items):
+        """批量添加应用：一次提交、一次更新索引和列表"""
+        records = self.catalog.add_many(items)
+        if not records:
+            return
+        self.schedule_index_build()
+        self.filter_apps()
+        self.check_paths(records)
+    
+    def get_scanner(self):
+        """批量导入扫描器（缓存文件与apps.json位于同一目录）"""
+        if self.scanner is None:
+            import app_scanner
+            self.scanner = app_scanner.LibraryScanner(scan_cache_file(self.data_file))
+        return self.scanner
+    
+    def import_library(self):
+        """选择游戏库文件夹，在后台扫描所有库文件夹并导入新发现的应用"""
+        scanner = self.get_scanner()
+        folder = filedialog.askdirectory(title="选择游戏库文件夹（取消则重新扫描已添加的文件夹）")
+        if folder:
+            scanner.add_root(folder)
+        if not scanner.roots:
+            return
+        
+        self.import_btn.config(state=tk.DISABLED)
+        threading.Thread(target=self._scan_job, args=(scanner,), daemon=True).start()
+        self.root.after(SCAN_POLL_MS, self.poll_scan_results)
+    
+    def _scan_job(self, scanner):
+        """后台线程：扫描并保存目录缓存"""
+        try:
+            candidates = scanner.scan()
+            scanner.save()
+            self.scan_results.put((candidates, None))
+        except Exception as e:
+            self.scan_results.put((None, e))
+    
+    def poll_scan_results(self):
+        """主线程：扫描完成后确认并导入"""
+        try:
+            candidates, error = self.scan_results.get_nowait()
+        except queue.Empty:
+            self.root.after(SCAN_POLL_MS, self.poll_scan_results)
+            return
+        
+        self.import_btn.config(state=tk.NORMAL)
+        if error is not None:
+            messagebox.showerror("错误", f"扫描文件夹时出错: {str(error)}")
+            return
+        
+        import app_scanner
+        items = app_scanner.propose_apps(candidates, self.catalog.records)
+        if not items:
+            messagebox.showinfo("批量导入", "没有发现新的应用。")
+            return
+        
+        preview = "\n".join(app_name for app_name, _ in items[:SCAN_PREVIEW_COUNT])
+        if len(items) > SCAN_PREVIEW_COUNT:
+            preview += f"\n... 等 {len(items)} 个"
+        if messagebox.askyesno("批量导入", f"发现 {len(items)} 个新应用:\n\n{preview}\n\n是否全部添加?"):
+            self.add_apps(items)
+    
+    def schedule_search(self, *args):
+        """输入停顿后再执行搜索，连续输入时只执行最后一次"""
+        self.ui.post("search", self.run_search, delay=SEARCH_DEBOUNCE_MS)
+    
+    def cancel_search(self):
+        """取消等待执行的搜索"""
+        self.ui.cancel("search")
+    
+    def run_search(self):
+        """执行等待的搜索，搜索内容与列表当前显示的相同时（如输入后又删除）跳过"""
+        search_text = self.search_var.get().lower()
+        if self.ui.changed("search", search_text):
+            self.update_app_list(search_text)
+    
     def filter_apps(self, *args):
         """根据搜索框内容过滤应用列表"""
+        self.cancel_search()
         search_text = self.search_var.get().lower()
+        self.ui.remember("search", search_text)
         self.update_app_list(search_text)
     
+    @instrument.timed("update_app_list")
     def update_app_list(self, filter_text=""):
         """更新应用列表"""
-        # 清空Treeview
-        for item in self.app_tree.get_children():
-            self.app_tree.delete(item)
+        self.list_update_started = time.perf_counter()
+        self.icon_timing = {"first_paint": None, "fully_loaded": None}
         
-        # 获取排序后的应用名称
-        app_names = sorted(self.apps.keys())
+        # 根据筛选条件计算新的列表内容
+        app_names = self.catalog.search(filter_text)
         
-        # 根据筛选条件添加应用
-        for app_name in app_names:
-            if filter_text in app_name.lower():
-                app_data = self.apps[app_name]
-                
-                # 获取应用图标
-                icon = self.get_app_icon(app_data["app_path"])
-                
-                # 添加到Treeview
-                self.app_tree.insert("", "end", 
-                                   iid=app_name,
-                                   text="  "+app_name,  # 显示应用名称
-                                   image=icon)     # 显示图标
+        # 行可能已经移动或换成了其他应用：下次悬停一定重新显示详情
+        self.ui.forget("details")
+        
+        self.update_list_mode()
+        if self.virtual_list is not None:
+            self.update_virtual_list(app_names)
+            return
+        
+        # 只更新有变化的行
+        diff = list_diff.diff_rows(self.visible_apps, app_names)
+        
+        for app_name in diff.deletes:
+            self.app_tree.delete(app_name)
+        for app_name, index in diff.moves:
+            self.app_tree.detach(app_name)
+        
+        for app_name, index, is_move in diff.placements():
+            if is_move:
+                self.app_tree.move(app_name, "", index)
+                continue
+            
+            # 已缓存的图标直接显示，其余先用默认图标占位
+            icon = self.icon_cache.peek(self.catalog[app_name].app_path) or self.get_default_icon()
+            
+            # 添加到Treeview
+            self.app_tree.insert("", index, 
+                               iid=app_name,
+                               text=self.row_text(app_name),  # 显示应用名称
+                               image=icon,     # 显示图标
+                               tags=self.row_tags(app_name))
+        
+        self.visible_apps = app_names
+        self.pin_row_icons()
+        
+        stats = self.list_stats
+        stats["updates"] += 1
+        stats["inserted"] += len(diff.inserts)
+        stats["deleted"] += len(diff.deletes)
+        stats["moved"] += len(diff.moves)
+        stats["last_touched"] = diff.touched
+        
+        self.icon_timing["first_paint"] = time.perf_counter() - self.list_update_started
+        
+        # 后台加载可见行的图标，被过滤掉的行取消加载
+        self.request_visible_icons()
+        if not self.icon_jobs:
+            self.icon_timing["fully_loaded"] = self.icon_timing["first_paint"]
+    
+    def update_list_mode(self):
+        """按应用数量切换虚拟列表和普通列表（批量导入、删除或重新加载后应用数量可能变化很大）"""
+        count = len(self.catalog)
+        if self.virtual_list is None and count >= VIRTUAL_LIST_THRESHOLD:
+            import virtual_list
+            # 普通列表的行全部删除，之后只复用可见数量的行
+            if self.visible_apps:
+                self.app_tree.delete(*self.visible_apps)
+            self.visible_apps = []
+            self.virtual_list = virtual_list.VirtualTreeview(
+                self.app_tree, self.scrollbar, self.row_data,
+                on_select=self.select_app, on_scroll=self.schedule_visible_icons, scheduler=self.ui)
+            self.virtual_list.selected = self.selected_app
+        elif self.virtual_list is not None and count < VIRTUAL_LIST_EXIT:
+            self.virtual_list.destroy()
+            self.virtual_list = None
+            self.visible_apps = []
+            self.app_tree.configure(yscrollcommand=self.on_tree_scroll)
+            self.scrollbar.configure(command=self.app_tree.yview)
+    
+    def update_virtual_list(self, app_names):
+        """更新虚拟列表，只重绘可见行"""
+        self.visible_apps = app_names
+        self.virtual_list.set_keys(app_names)
+        
+        stats = self.list_stats
+        stats["updates"] += 1
+        stats["last_touched"] = len(self.virtual_list.slots)
+        
+        self.icon_timing["first_paint"] = time.perf_counter() - self.list_update_started
+        if not self.icon_jobs:
+            self.icon_timing["fully_loaded"] = self.icon_timing["first_paint"]
     
     def on_app_select(self, event):
         """当从列表中选择应用时触发"""
         selection = self.app_tree.selection()
         if selection:
-            app_name = selection[0]
-            self.select_app(app_name)
+            app_name = self.app_name_for_row(selection[0])
+            if app_name:
+                self.select_app(app_name)
     
     def on_app_hover(self, event):
-        """鼠标悬停在应用列表上时显示应用详情"""
+        """鼠标悬停在应用列表上时显示应用详情（每帧最多处理一次）"""
+        self.ui.post("hover", self.show_hover, event.y)
+    
+    def show_hover(self, y):
+        """显示鼠标所在行的应用详情，仍是同一个应用时跳过"""
         # 获取鼠标位置对应的项目
-        item = self.app_tree.identify_row(event.y)
+        item = self.app_tree.identify_row(y)
         if item:
-            app_name = item
-            if app_name in self.apps:
-                app_data = self.apps[app_name]
-                self.detail_name.config(text=app_name)
-                self.detail_env.config(text=app_data["env_path"] or "未设置")
-                self.detail_path.config(text=app_data["app_path"])
+            app_name = self.app_name_for_row(item)
+            if app_name in self.catalog and self.ui.changed("details", app_name):
+                self.show_details(app_name)
+    
+    def path_detail(self, path, kind="file"):
+        """详情中显示的路径，已知不存在时加上说明"""
+        if self.health.known(path, kind) is False:
+            return f"{path}  (不存在)"
+        return path
+    
+    def show_details(self, app_name):
+        """在详情区域显示应用信息"""
+        record = self.catalog[app_name]
+        self.ui.remember("details", app_name)
+        self.detail_name.config(text=app_name)
+        group = record.get("group")
+        if group:
+            # 启动组没有路径，显示成员
+            self.detail_env.config(text="启动组")
+            self.detail_path.config(text=", ".join(str(member.get("app") if isinstance(member, dict) else member)
+                                                   for member in group))
+        else:
+            self.detail_env.config(text=self.path_detail(record.env_path, "dir") if record.env_path else "未设置")
+            self.detail_path.config(text=self.path_detail(record.app_path))
+        self.detail_state.config(text=self.state_detail(app_name))
+    
+    def state_detail(self, app_name):
+        """详情中显示的运行状态：运行中的进程或最近一次的退出码和运行时间"""
+        children = self.supervisor.children(app_name)
+        if children:
+            pids = ", ".join(str(child.pid) for child in children)
+            return f"运行中 (PID {pids}，已运行 {format_duration(children[0].runtime())})"
+        child = self.supervisor.last_exit(app_name)
+        if child is not None:
+            return f"已退出 (退出码 {child.returncode}，运行了 {format_duration(child.runtime())})"
+        return "未运行"
     
     def select_app(self, app_name):
         """选择特定应用"""
-        if app_name in self.apps:
+        if app_name in self.catalog:
             self.selected_app = app_name
-            app_data = self.apps[app_name]
+            
+            if self.virtual_list is not None and self.virtual_list.selected != app_name:
+                self.virtual_list.select(app_name)
             
             # 更新详情显示
-            self.detail_name.config(text=app_name)
-            self.detail_env.config(text=app_data["env_path"] or "未设置")
-            self.detail_path.config(text=app_data["app_path"])
+            self.show_details(app_name)
             
             # 启用按钮
             self.launch_btn.config(state=tk.NORMAL)
             self.delete_btn.config(state=tk.NORMAL)
+            
+            if self.prefetcher is not None:
+                self.ui.post("prefetch", self.prefetch_app, app_name, delay=PREFETCH_DELAY_MS)
+    
+    def prefetch_app(self, app_name):
+        """在后台预读选中的应用（启动组预读所有成员），已在运行或路径已知不存在的应用跳过"""
+        if app_name not in self.catalog or app_name != self.selected_app:
+            return
+        group = self.catalog[app_name].get("group")
+        if group:
+            names = [member.get("app") if isinstance(member, dict) else member for member in group]
+        else:
+            names = [app_name]
+        
+        targets = []
+        for name in names:
+            if name not in self.catalog or self.supervisor.is_running(name):
+                continue
+            record = self.catalog[name]
+            if record.get("group") or self.health.known(record.app_path) is False:
+                continue
+            targets.append((record.app_path, record.env_path))
+        if targets:
+            self.prefetcher.request_many(targets)
     
     def launch_app(self):
         """启动选中的应用"""
-        if not self.selected_app or self.selected_app not in self.apps:
+        if not self.selected_app or self.selected_app not in self.catalog:
             messagebox.showerror("错误", "没有选择应用!")
             return
         
-        app_data = self.apps[self.selected_app]
-        app_path = app_data["app_path"]
-        env_path = app_data["env_path"]
+        self.request_launch(self.selected_app)
+    
+    def request_launch(self, app_name, reply=None):
+        """启动应用；没有有效的检查结果时先在后台检查，完成后由 poll_health 启动，界面不会因慢速磁盘卡住"""
+        requested = time.perf_counter()
+        if self.catalog[app_name].get("group"):
+            self.launch_group(app_name, reply)
+            return
+        if self.supervisor.is_running(app_name) and self.handle_duplicate(app_name, reply):
+            return
+        
+        app_path = self.catalog[app_name].app_path
+        if self.health.status(app_path) is None:
+            self.pending_launches.append((app_name, app_path, reply, requested))
+            self.health.refresh([(app_path, "file")], force=True)
+            self.schedule_health_poll()
+            return
+        
+        self.start_app(app_name, app_path, reply, requested)
+    
+    def handle_duplicate(self, app_name, reply):
+        """应用已在运行：按设置切换到它的窗口或不启动，返回True；允许重复启动时返回False"""
+        policy = self.catalog[app_name].get("duplicate", DUPLICATE_LAUNCH)
+        if policy == "allow":
+            return False
+        
+        pids = [child.pid for child in self.supervisor.children(app_name)]
+        if policy == "focus" and sys.platform == "win32":
+            import win32_api
+            if win32_api.focus_process_window(pids):
+                if reply is not None:
+                    reply(command_reply(EXIT_OK, f"{app_name} 已在运行，已切换到它的窗口"))
+                return True
+        
+        message = f"{app_name} 已在运行 (PID {', '.join(map(str, pids))})"
+        if reply is not None:
+            reply(command_reply(EXIT_ALREADY_RUNNING, message))
+        else:
+            messagebox.showinfo("提示", message)
+        return True
+    
+    def launch_failed(self, reply, code, message):
+        """报告启动失败：转发的命令回复给对方，否则弹出提示"""
+        if reply is not None:
+            reply(command_reply(code, message))
+        else:
+            messagebox.showerror("错误", message)
+    
+    def start_app(self, app_name, app_path, reply=None, requested=None):
+        """按检查结果启动应用；requested 为请求启动的时间，用于启动统计"""
+        if requested is None:
+            requested = time.perf_counter()
+        record = self.catalog.get(app_name)
+        if record is None or record.app_path != app_path:
+            # 等待检查期间应用被删除或修改
+            if reply is not None:
+                reply(command_reply(EXIT_NOT_FOUND, f"找不到应用: {app_name}"))
+            return
         
-        if not os.path.exists(app_path):
-            messagebox.showerror("错误", f"应用路径不存在: {app_path}")
+        if not self.health.status(app_path):
+            self.launch_failed(reply, EXIT_PATH_MISSING, f"应用路径不存在: {app_path}")
             return
         
         try:
-            # 根据操作系统选择启动方式
-            if sys.platform == "win32":
-                # Windows系统
-                if env_path:
-                    # 如果有环境路径，设置工作目录
-                    subprocess.Popen([app_path], cwd=env_path, shell=True)
-                else:
-                    subprocess.Popen([app_path], shell=True)
-            else:
-                # macOS 或 Linux
-                if env_path:
-                    subprocess.Popen([app_path], cwd=env_path)
-                else:
-                    subprocess.Popen([app_path])
-            
+            process, elapsed = self.spawn_tracked(app_name, requested)
+        except Exception as e:
+            self.launch_failed(reply, EXIT_LAUNCH_FAILED, f"启动应用时出错: {str(e)}")
+            return
+        
+        if reply is not None:
+            reply(command_reply(EXIT_OK, f"已启动 {app_name}（创建进程 {elapsed * 1000:.1f} ms）"))
+    
+    @instrument.timed("spawn_tracked")
+    def spawn_tracked(self, app_name, requested=None):
+        """创建进程并登记到启动监督、启动统计和启动次数，返回 (Popen对象或None, 耗时秒数)，失败时抛出异常"""
+        if requested is None:
+            requested = time.perf_counter()
+        record = self.catalog[app_name]
+        resolve_ms = (time.perf_counter() - requested) * 1000
+        try:
+            process, elapsed = self.launcher.launch(app_name, record)
         except Exception as e:
-            messagebox.showerror("错误", f"启动应用时出错: {str(e)}")
+            instrument.count("launch.errors")
+            if isinstance(e, FileNotFoundError):
+                self.health.mark(record.app_path, False)
+                self.apply_health_changes({record.app_path})
+            raise
+        
+        # 登记子进程，就绪后写入启动统计（交给系统打开的快捷方式没有进程对象，无法跟踪，直接写入）
+        if process is not None:
+            tag = {"requested": requested, "resolve_ms": resolve_ms, "spawn_ms": elapsed * 1000, "seq": None}
+            self.supervisor.register(app_name, process, tag)
+            self.refresh_rows([app_name])
+            self.schedule_supervisor_poll()
+        else:
+            self.telemetry.record_launch(app_name, resolve_ms, elapsed * 1000)
+        
+        # 记录启动次数，用于搜索排序
+        self.catalog.record_launch(app_name)
+        if self.selected_app == app_name:
+            self.show_details(app_name)
+        return process, elapsed
+    
+    def launch_group(self, group_name, reply=None):
+        """启动一个启动组：没有依赖关系的成员同时启动，就绪条件在后台检查，由 poll_groups 启动下一批"""
+        try:
+            members = launch_groups.parse_group(group_name, self.catalog[group_name].get("group"), self.catalog)
+        except launch_groups.GroupError as e:
+            self.launch_failed(reply, EXIT_LAUNCH_FAILED, str(e))
+            return
+        
+        def running(app_name):
+            children = self.supervisor.children(app_name)
+            return children[0].process if children else None
+        
+        run = launch_groups.GroupRun(group_name, members, lambda app_name: self.spawn_tracked(app_name)[0], running)
+        run.start()
+        self.catalog.record_launch(group_name)
+        if run.done:
+            self.group_finished(run, reply)
+            return
+        
+        # 等待就绪条件可能超过转发命令的回复时限，先回复已开始，结果在界面中提示
+        if reply is not None:
+            reply(command_reply(EXIT_OK, f"已开始启动组 {group_name}（{len(members)} 个成员）"))
+        self.group_runs.append(run)
+        if self.group_poll_id is None:
+            self.group_poll_id = self.root.after(GROUP_POLL_MS, self.poll_groups)
+    
+    def poll_groups(self):
+        """主线程：推进正在运行的启动组，报告完成的组"""
+        self.group_poll_id = None
+        for run in list(self.group_runs):
+            run.poll()
+            if run.done:
+                self.group_runs.remove(run)
+                self.group_finished(run)
+        
+        if self.group_runs:
+            self.group_poll_id = self.root.after(GROUP_POLL_MS, self.poll_groups)
+    
+    def group_finished(self, run, reply=None):
+        """报告启动组的结果：全部就绪时只回复转发的命令，有成员失败时提示"""
+        message = f"启动组 {run.name}:\n{run.summary()}"
+        if not run.ok:
+            self.launch_failed(reply, EXIT_LAUNCH_FAILED, message)
+        elif reply is not None:
+            reply(command_reply(EXIT_OK, message))
     
     def delete_app(self):
         """删除选中的应用"""
@@ -592,52 +1486,345 @@ class AppLauncher:
         
         # 确认删除
         if messagebox.askyesno("确认", f"确定要删除应用 '{self.selected_app}' 吗?"):
-            # 从字典中删除
-            del self.apps[self.selected_app]
-            
-            # 从Treeview中删除
-            self.app_tree.delete(self.selected_app)
+            # 从应用目录中删除并保存
+            app_path = self.catalog.remove(self.selected_app).app_path
             
-            # 保存到文件
-            self.save_apps()
+            self.cancel_icon(self.selected_app)
+            self.launcher.forget(self.selected_app)
+            self.supervisor.forget(self.selected_app)
             
-            # 清空详情显示
-            self.detail_name.config(text="")
-            self.detail_env.config(text="")
-            self.detail_path.config(text="")
+            # 没有其他应用使用同一路径时，移除缓存的图标
+            if not self.catalog.users([app_path]):
+                self.icon_cache.discard(app_path)
+                self.icon_store.discard(app_path)
+                self.save_icons()
             
-            # 禁用启动和删除按钮
-            self.launch_btn.config(state=tk.DISABLED)
-            self.delete_btn.config(state=tk.DISABLED)
+            # 从Treeview中删除
+            if self.virtual_list is not None:
+                self.virtual_list.selected = None
+                self.filter_apps()
+            else:
+                self.app_tree.delete(self.selected_app)
+                self.visible_apps.remove(self.selected_app)
             
-            # 清除选择
-            self.selected_app = None
+            self.clear_selection()
             
             messagebox.showinfo("成功", "应用已删除!")
     
+    def clear_selection(self):
+        """清除选择和详情显示"""
+        # 清空详情显示
+        self.ui.forget("details")
+        self.detail_name.config(text="")
+        self.detail_env.config(text="")
+        self.detail_path.config(text="")
+        self.detail_state.config(text="")
+        
+        # 禁用启动和删除按钮
+        self.launch_btn.config(state=tk.DISABLED)
+        self.delete_btn.config(state=tk.DISABLED)
+        
+        # 清除选择
+        self.selected_app = None
+        if self.virtual_list is not None:
+            self.virtual_list.selected = None
+    
+    @instrument.timed("save_apps")
     def save_apps(self):
-        """保存应用到JSON文件"""
+        """立即写入尚未保存的应用数据"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.apps, f, ensure_ascii=False, indent=2)
+            self.store.flush()
         except Exception as e:
             messagebox.showerror("错误", f"保存应用数据时出错: {str(e)}")
     
+    @instrument.timed("load_apps")
     def load_apps(self):
-        """从JSON文件加载应用"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.apps = json.load(f)
-            except Exception as e:
-                messagebox.showerror("错误", f"加载应用数据时出错: {str(e)}")
-                self.apps = {}
-        else:
-            self.apps = {}
-            self.save_apps()
+        """从存储加载应用（兼容旧版apps.json）"""
+        try:
+            self.catalog.load(self.store.load())
+        except Exception as e:
+            messagebox.showerror("错误", f"加载应用数据时出错: {str(e)}")
+            self.catalog.load({})
+        self.schedule_index_build()
+    
+    def schedule_index_build(self):
+        """大批加载的应用在界面空闲时分批建立搜索索引，不阻塞加载（此前输入搜索会一次建立剩余部分）"""
+        if self.index_build_id is None and self.catalog.index.unindexed:
+            self.index_build_id = self.root.after(INDEX_BUILD_MS, self.build_index_step)
+    
+    def build_index_step(self):
+        self.index_build_id = None
+        with instrument.timer("search.index_build"):
+            self.catalog.index.index_pending(INDEX_BUILD_BATCH)
+        self.schedule_index_build()
 
-def main():
+def scan_cache_file(data_file):
+    """批量导入的库文件夹列表和目录缓存文件"""
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), "library_scan.json")
+
+def telemetry_file(data_file):
+    """启动统计文件"""
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), "launch_stats.bin")
+
+def report_startup_profile(timings):
+    """输出启动各阶段耗时"""
+    print("启动耗时:")
+    for name, seconds in timings.items():
+        print(f"  {name:<16} {seconds * 1000:8.1f} ms")
+
+def report_icon_cache(stats):
+    """输出内存图标缓存统计"""
+    print(f"图标缓存: {stats['paths']} 个路径, {stats['images']} 个图像, "
+          f"{stats['bytes'] / 1024:.1f} / {stats['max_bytes'] / 1024:.0f} KB, "
+          f"命中 {stats['hits']}, 未命中 {stats['misses']}, 淘汰 {stats['evictions']}")
+
+def report_ui_events(stats):
+    """输出界面事件合并统计"""
+    print(f"界面事件: 提交 {stats['posted']}, 执行 {stats['dispatched']}, "
+          f"丢弃 {stats['dropped']} (合并 {stats['coalesced']}, 结果未变 {stats['unchanged']})")
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="应用启动器")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="显示窗口后输出启动各阶段耗时并退出")
+    parser.add_argument("--launch", metavar="NAME",
+                        help="不显示窗口，直接启动指定名称的应用")
+    parser.add_argument("--list", action="store_true",
+                        help="不显示窗口，列出所有应用名称")
+    parser.add_argument("--scan", nargs="*", metavar="DIR",
+                        help="不显示窗口，扫描游戏库文件夹（同时记住新给出的文件夹）并导入新发现的应用")
+    parser.add_argument("--resident", action="store_true",
+                        help="常驻模式：关闭窗口时只隐藏，之后的 --launch 和启动窗口都转发给本实例")
+    parser.add_argument("--hidden", action="store_true",
+                        help="与 --resident 一起使用，启动时不显示窗口")
+    parser.add_argument("--quit-resident", action="store_true",
+                        help="退出正在运行的常驻实例")
+    parser.add_argument("--launch-stats", action="store_true",
+                        help="不显示窗口，列出各应用的启动耗时（p50/p95）、运行时间和频率分数")
+    parser.add_argument("--status", action="store_true",
+                        help="列出常驻实例启动的、正在运行的应用和最近的退出记录")
+    parser.add_argument("--data-file", default="apps.json",
+                        help="应用数据文件（默认 apps.json）")
+    parser.add_argument("--perf-stats", nargs="?", const=instrument.DEFAULT_STATS_FILE, metavar="FILE",
+                        help=f"记录热点函数耗时，退出时写入JSON文件（也可用环境变量 {instrument.PERF_ENV}）")
+    parser.add_argument("--cpu-profile", action="store_true",
+                        help=f"同时用cProfile记录主线程，结果写入同名 .prof 文件（也可用环境变量 {instrument.CPROFILE_ENV}）")
+    return parser.parse_args(argv)
+
+def run_cli(args):
+    """命令行模式：不创建任何Tk对象，返回退出码"""
+    store = catalog_store.open_store(args.data_file, CATALOG_BACKEND)
+    try:
+        apps = store.load()
+    except Exception as e:
+        print(f"加载应用数据时出错: {e}", file=sys.stderr)
+        return EXIT_NOT_FOUND
+    
+    if args.list:
+        for app_name in sorted(apps):
+            print(app_name)
+        return EXIT_OK
+    
+    if args.scan is not None:
+        return run_scan(store, apps, args)
+    
+    if args.launch_stats:
+        print_launch_stats(apps, telemetry.Telemetry(telemetry_file(args.data_file)))
+        return EXIT_OK
+    
+    requested = time.perf_counter()
+    matches = resolve_app_name(apps, args.launch)
+    if not matches:
+        print(f"找不到应用: {args.launch}", file=sys.stderr)
+        return EXIT_NOT_FOUND
+    if len(matches) > 1:
+        print(f"应用名称不唯一: {args.launch}", file=sys.stderr)
+        for app_name in matches:
+            print(f"  {app_name}", file=sys.stderr)
+        return EXIT_AMBIGUOUS
+    
+    app_name = matches[0]
+    app_data = apps[app_name]
+    if app_data.get("group"):
+        return run_group_cli(store, apps, app_name)
+    if not os.path.exists(app_data["app_path"]):
+        print(f"应用路径不存在: {app_data['app_path']}", file=sys.stderr)
+        return EXIT_PATH_MISSING
+    
+    resolve_ms = (time.perf_counter() - requested) * 1000
+    try:
+        process, elapsed = launch_engine.LaunchEngine().launch(app_name, app_data)
+    except Exception as e:
+        print(f"启动应用时出错: {e}", file=sys.stderr)
+        return EXIT_LAUNCH_FAILED
+    print(f"已启动 {app_name}（创建进程 {elapsed * 1000:.1f} ms）")
+    
+    # 命令行模式不等待进程就绪和退出；exec 成功后 Popen 才返回，Windows以外即为就绪
+    ready_ms = (time.perf_counter() - requested) * 1000 if sys.platform != "win32" else telemetry.NAN
+    stats = telemetry.Telemetry(telemetry_file(args.data_file))
+    stats.record_launch(app_name, resolve_ms, elapsed * 1000, ready_ms)
+    stats.close()
+    
+    record_launch(store, app_name)
+    try:
+        store.flush()
+    except Exception as e:
+        print(f"保存应用数据时出错: {e}", file=sys.stderr)
+    return EXIT_OK
+
+def run_group_cli(store, apps, group_name):
+    """命令行模式启动启动组：等待所有成员就绪（或失败）后返回"""
+    try:
+        members = launch_groups.parse_group(group_name, apps[group_name]["group"], apps)
+    except launch_groups.GroupError as e:
+        print(e, file=sys.stderr)
+        return EXIT_LAUNCH_FAILED
+    
+    engine = launch_engine.LaunchEngine()
+    
+    def spawn(app_name):
+        if not os.path.exists(apps[app_name]["app_path"]):
+            raise FileNotFoundError(f"应用路径不存在: {apps[app_name]['app_path']}")
+        process = engine.launch(app_name, apps[app_name])[0]
+        record_launch(store, app_name)
+        return process
+    
+    run = launch_groups.GroupRun(group_name, members, spawn)
+    run.start()
+    run.wait()
+    print(f"启动组 {group_name}:\n{run.summary()}", file=sys.stdout if run.ok else sys.stderr)
+    
+    record_launch(store, group_name)
+    try:
+        store.flush()
+    except Exception as e:
+        print(f"保存应用数据时出错: {e}", file=sys.stderr)
+    return EXIT_OK if run.ok else EXIT_LAUNCH_FAILED
+
+def print_launch_stats(apps, stats):
+    """输出各应用的启动统计，按频率分数排序"""
+    def ms(value):
+        return "-" if value is None else f"{value:.1f}"
+    
+    rows = []
+    for app_name in apps:
+        result = stats.stats(app_name)
+        if result is not None:
+            rows.append((result["frecency"], app_name, result))
+    rows.sort(key=lambda row: (-row[0], row[1]))
+    
+    print("应用\t启动次数\t频率分数\t查找路径ms(p50/p95)\t创建进程ms\t就绪ms\t运行时间(p50)")
+    for score, app_name, result in rows:
+        session = result["session"]["p50"]
+        print(f"{app_name}\t{result['launches']}\t{score:.2f}\t"
+              + "\t".join(f"{ms(result[field]['p50'])}/{ms(result[field]['p95'])}"
+                          for field in ("resolve_ms", "spawn_ms", "ready_ms"))
+              + f"\t{'-' if session is None else format_duration(session)}")
+
+def run_scan(store, apps, args):
+    """命令行批量导入"""
+    import app_scanner
+    
+    scanner = app_scanner.LibraryScanner(scan_cache_file(args.data_file))
+    for folder in args.scan:
+        scanner.add_root(folder)
+    if not scanner.roots:
+        print("没有要扫描的文件夹", file=sys.stderr)
+        return EXIT_NOT_FOUND
+    
+    candidates = scanner.scan()
+    items = app_scanner.propose_apps(candidates, apps)
+    try:
+        scanner.save()
+        store.put_many(items)
+        store.flush()
+    except Exception as e:
+        print(f"保存应用数据时出错: {e}", file=sys.stderr)
+        return EXIT_LAUNCH_FAILED
+    
+    # 通知常驻实例重新加载
+    if items:
+        import resident
+        resident.send(args.data_file, {"cmd": "reload"})
+    
+    for app_name, app_data in items:
+        print(f"{app_name}\t{app_data['app_path']}")
+    stats = scanner.stats
+    print(f"新增 {len(items)} 个应用（读取 {stats['dirs_read']} 个目录，"
+          f"未修改 {stats['dirs_reused']} 个，用时 {stats['elapsed'] * 1000:.0f} ms）", file=sys.stderr)
+    return EXIT_OK
+
+def print_status(reply):
+    """输出常驻实例回复的运行状态"""
+    for child in reply.get("running", []):
+        line = f"运行中\t{child['name']}\tPID {child['pid']}\t{format_duration(child['runtime'])}"
+        scheduling = child.get("scheduling")
+        if scheduling:
+            if scheduling.get("affinity") is not None:
+                line += f"\tCPU {process_priority.format_cpus(scheduling['affinity'])}"
+            priority = scheduling.get("priority") or scheduling.get("nice")
+            if priority is not None:
+                line += f"\t优先级 {priority}"
+            if scheduling.get("io_priority") is not None:
+                line += f"\tI/O {scheduling['io_priority']}"
+        print(line)
+    for child in reply.get("exited", []):
+        print(f"已退出\t{child['name']}\t退出码 {child['returncode']}\t{format_duration(child['runtime'])}")
+
+def forward_to_resident(args):
+    """有常驻实例时把命令转发给它并返回退出码，没有常驻实例时返回None"""
+    if args.list or args.scan is not None or args.launch_stats or args.startup_profile:
+        return None
+    if args.launch is not None:
+        request = {"cmd": "launch", "name": args.launch}
+    elif args.quit_resident:
+        request = {"cmd": "quit"}
+    elif args.status:
+        request = {"cmd": "status"}
+    else:
+        request = {"cmd": "show"}
+    
+    import resident
+    reply = resident.send(args.data_file, request)
+    if reply is None:
+        if args.quit_resident or args.status:
+            print("没有运行中的常驻实例", file=sys.stderr)
+            return EXIT_NOT_FOUND
+        return None
+    
+    if args.status:
+        print_status(reply)
+    if reply.get("message"):
+        print(reply["message"], file=sys.stdout if reply.get("ok") else sys.stderr)
+    code = reply.get("code")
+    return code if isinstance(code, int) else EXIT_RESIDENT_FAILED
+
+def main(argv=None):
+    args = parse_args(argv)
+    
+    # 性能统计：命令行参数优先，其次环境变量
+    instrument.configure(args.perf_stats, args.cpu_profile)
+    instrument.configure_from_env()
+    
+    # 已有常驻实例时由它启动应用或显示窗口
+    code = forward_to_resident(args)
+    if code is not None:
+        return code
+    
+    if args.launch is not None or args.list or args.scan is not None or args.launch_stats:
+        return run_cli(args)
+    
+    # Windows下声明支持高DPI，否则系统会把整个窗口按位图放大导致模糊
+    if sys.platform == "win32":
+        import win32_api
+        win32_api.enable_dpi_awareness()
+    
+    started = time.perf_counter()
     root = tk.Tk()
+    tk_ready = time.perf_counter()
     
     # 设置窗口图标
     try:
@@ -645,8 +1832,32 @@ def main():
     except:
         pass
     
-    app = AppLauncher(root)
+    # 常驻模式可以在后台启动，等待转发的命令
+    if args.resident and args.hidden:
+        root.withdraw()
+    
+    app = AppLauncher(root, args.data_file)
+    
+    if args.resident and not args.startup_profile and not app.start_resident():
+        print("无法启动常驻模式，按普通模式运行", file=sys.stderr)
+    
+    if args.startup_profile:
+        # 处理完所有待绘制事件即为首次显示完成
+        root.update()
+        painted = time.perf_counter()
+        
+        timings = {"import": _IMPORT_FINISHED - _IMPORT_STARTED, "tk_init": tk_ready - started}
+        timings.update(app.startup_timings)
+        timings["first_paint"] = painted - started
+        timings["total"] = painted - _IMPORT_STARTED
+        report_startup_profile(timings)
+        report_icon_cache(app.icon_cache.stats())
+        report_ui_events(app.ui.stats())
+        app.on_close()
+        return EXIT_OK
+    
     root.mainloop()
+    return EXIT_OK
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""应用目录：与界面无关的应用数据模型
+
+紧凑的 AppRecord 记录（__slots__，环境路径字符串驻留）+ 随增删增量维护的有序名称索引和搜索索引，
+支持批量添加、删除和查询。可以不依赖Tk单独使用和测试。
+"""
+import sys
+import time
+
+import search_index
+
+# 保存为记录属性的字段，其余字段原样保存在 extra 中
+FIELDS = ("app_path", "env_path", "launch_count", "last_launched")
+
+
+def _intern(path):
+    """驻留经常重复的路径（同一文件夹下的多个程序共用环境路径）
+
+    各不相同的应用路径不驻留：驻留表本身每项约占75字节，比重复字符串节省的更多
+    """
+    return sys.intern(path) if path else ""
+
+
+class AppRecord:
+    """一个应用条目；相同的环境路径只保存一份"""
+
+    __slots__ = ("name", "app_path", "env_path", "launch_count", "last_launched", "extra")
+
+    def __init__(self, name, app_path, env_path="", launch_count=0, last_launched=None, extra=None):
+        self.name = name
+        self.app_path = app_path or ""
+        self.env_path = _intern(env_path)
+        self.launch_count = launch_count or 0
+        self.last_launched = last_launched
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, name, data):
+        """由apps.json中的字典创建记录"""
+        extra = {key: value for key, value in data.items() if key not in FIELDS}
+        return cls(name, data.get("app_path", ""), data.get("env_path", ""),
+                   data.get("launch_count", 0), data.get("last_launched"), extra)
+
+    def to_dict(self):
+        """转换为apps.json中的字典（未启动过的应用不写启动统计）"""
+        data = {"env_path": self.env_path, "app_path": self.app_path}
+        if self.launch_count:
+            data["launch_count"] = self.launch_count
+        if self.last_launched is not None:
+            data["last_launched"] = self.last_launched
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key):
+        """兼容 app_data["app_path"] 形式的读取"""
+        if key in FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"AppRecord({self.name!r}, {self.app_path!r})"
+
+
+class AppCatalog:
+    """名称 -> AppRecord
+
+    有存储后端时，修改通过后端进行（后端与目录共用同一个记录字典），由后端合并后批量写入。
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.records = {}
+        # 有序名称索引和搜索索引
+        self.index = search_index.SearchIndex()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, name):
+        return name in self.records
+
+    def __getitem__(self, name):
+        return self.records[name]
+
+    def __iter__(self):
+        """按名称顺序遍历"""
+        return iter(self.index.sorted_names)
+
+    def get(self, name):
+        return self.records.get(name)
+
+    def get_many(self, names):
+        """批量查询，不存在的名称对应None"""
+        records = self.records
+        return [records.get(name) for name in names]
+
+    def names(self):
+        """按名称排序的列表（不要修改）"""
+        return self.index.sorted_names
+
+    def app_paths(self):
+        """所有应用路径"""
+        return (record.app_path for record in self.records.values())
+
+    def users(self, paths):
+        """使用了 paths 中任一路径（应用路径或环境路径）的应用名称，按名称排序
+
+        逐条比较而不维护路径索引：只在路径状态变化时使用，10万条约20毫秒，省下索引的内存
+        """
+        paths = set(paths)
+        return sorted(record.name for record in self.records.values()
+                      if record.app_path in paths or record.env_path in paths)
+
+    def search(self, query, limit=None, fuzzy=True):
+        """按匹配程度、使用频率和名称排序的名称列表"""
+        return self.index.search(query, limit, fuzzy)
+
+    def load(self, apps):
+        """用 {名称: 字典} 替换全部内容"""
+        self.records = {name: AppRecord.from_dict(name, data) for name, data in apps.items()}
+        self.index = search_index.SearchIndex()
+        self.index.add_many((record.name, record.launch_count, record.last_launched)
+                            for record in self.records.values())
+        if self.store is not None:
+            self.store.apps = self.records
+
+    def add(self, name, data):
+        """添加或替换一个应用，返回新记录"""
+        return self.add_many([(name, data)])[0]
+
+    def add_many(self, items):
+        """批量添加或替换 [(名称, 字典或AppRecord)]：一次更新索引、一次提交，返回新记录"""
+        records = []
+        for name, data in items:
+            if isinstance(data, AppRecord):
+                record = data
+                record.name = name
+            else:
+                record = AppRecord.from_dict(name, data)
+            records.append(record)
+
+        if self.store is not None:
+            self.store.put_many([(record.name, record) for record in records])
+        else:
+            for record in records:
+                self.records[record.name] = record
+        self.index.add_many((record.name, record.launch_count, record.last_launched) for record in records)
+        return records
+
+    def remove(self, name):
+        """删除应用，返回被删除的记录（不存在时返回None）"""
+        removed = self.remove_many([name])
+        return removed[0] if removed else None
+
+    def remove_many(self, names):
+        """批量删除，返回被删除的记录"""
+        removed = []
+        for name in names:
+            record = self.records.get(name)
+            if record is None:
+                continue
+            self.index.remove(name)
+            removed.append(record)
+
+        if self.store is not None:
+            self.store.delete_many([record.name for record in removed])
+        else:
+            for record in removed:
+                del self.records[record.name]
+        return removed
+
+    def record_launch(self, name, when=None):
+        """记录一次启动（次数和时间用于搜索排序），返回记录"""
+        record = self.records[name]
+        record.launch_count += 1
+        record.last_launched = time.time() if when is None else when
+        self.index.record_use(name, record.launch_count, record.last_launched)
+        if self.store is not None:
+            self.store.put(name, record)
+        return record
@@ -0,0 +1,230 @@
+"""批量导入：并行扫描游戏库文件夹，找出可执行文件并生成应用条目"""
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCAN_CACHE_VERSION = 1
+
+# 扫描线程数
+SCAN_WORKERS = 8
+
+# 游戏文件夹内最多向下扫描的层数
+MAX_DEPTH = 6
+
+# 作为应用的文件扩展名
+EXECUTABLE_EXTENSIONS = (".exe",)
+
+# 不扫描的目录（小写）
+SKIP_DIRS = {
+    "_commonredist", "commonredist", "redist", "redistributables", "__installer", "installer",
+    "directx", "dotnet", "vcredist", "support", "shadercache", "downloading", "temp",
+    "$recycle.bin", "crashreports", "logs",
+}
+
+# 不作为应用的可执行文件：卸载程序、运行库安装包、崩溃报告等
+SKIP_FILES = re.compile(
+    r"^(unins\d*|uninstall.*|setup.*|.*redist.*|dxsetup|dotnet.*|.*crash.*|.*prereq.*"
+    r"|easyanticheat.*|.*updater.*|.*helper.*|.*install.*|cefsharp.*|.*report.*)\.[a-z]+$")
+
+
+def _normalize(text):
+    return re.sub(r"[^0-9a-z]", "", text.lower())
+
+
+def path_key(path):
+    """用于判断是否为同一文件的路径形式"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class LibraryScanner:
+    """扫描配置的库文件夹，目录内容按修改时间缓存，重新扫描时只读取有变化的目录"""
+
+    def __init__(self, cache_file, workers=SCAN_WORKERS, extensions=EXECUTABLE_EXTENSIONS):
+        self.cache_file = cache_file
+        self.workers = workers
+        self.extensions = tuple(ext.lower() for ext in extensions)
+
+        self.roots = []
+        # 目录 -> [st_mtime_ns, [子目录名], [[文件名, 大小], ...]]
+        self.dirs = {}
+
+        # 上次扫描的统计
+        self.stats = {"dirs_read": 0, "dirs_reused": 0, "found": 0, "elapsed": 0.0}
+        self.load()
+
+    def load(self):
+        """读取库文件夹列表和目录缓存"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.roots = cache.get("roots", [])
+        if cache.get("version") == SCAN_CACHE_VERSION:
+            self.dirs = cache.get("dirs", {})
+
+    def save(self):
+        """原子写入缓存文件"""
+        cache = {"version": SCAN_CACHE_VERSION, "roots": self.roots, "dirs": self.dirs}
+        temp_path = self.cache_file + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.cache_file)
+
+    def add_root(self, root):
+        """添加库文件夹，返回是否为新文件夹"""
+        root = os.path.abspath(root)
+        if any(path_key(root) == path_key(r) for r in self.roots):
+            return False
+        self.roots.append(root)
+        return True
+
+    def remove_root(self, root):
+        """移除库文件夹"""
+        self.roots = [r for r in self.roots if path_key(r) != path_key(root)]
+
+    def _read_dir(self, path, old_dirs, new_dirs, counts):
+        """读取一个目录（未修改时直接使用缓存），返回缓存项，无法访问时返回None"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        cached = old_dirs.get(path)
+        if cached is not None and cached[0] == mtime:
+            new_dirs[path] = cached
+            counts["dirs_reused"] += 1
+            return cached
+
+        subdirs = []
+        files = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name.lower() not in SKIP_DIRS:
+                                subdirs.append(entry.name)
+                        elif entry.name.lower().endswith(self.extensions):
+                            files.append([entry.name, entry.stat().st_size])
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+
+        item = [mtime, subdirs, files]
+        new_dirs[path] = item
+        counts["dirs_read"] += 1
+        return item
+
+    def _scan_tree(self, top, old_dirs):
+        """工作线程：深度优先扫描一个游戏文件夹，返回 (新缓存项, [(文件路径, 大小, 深度)], 计数)"""
+        new_dirs = {}
+        found = []
+        counts = {"dirs_read": 0, "dirs_reused": 0}
+        stack = [(top, 0)]
+        while stack:
+            path, depth = stack.pop()
+            item = self._read_dir(path, old_dirs, new_dirs, counts)
+            if item is None:
+                continue
+            for name, size in item[2]:
+                if not SKIP_FILES.match(name.lower()):
+                    found.append((os.path.join(path, name), size, depth))
+            if depth < MAX_DEPTH:
+                stack.extend((os.path.join(path, name), depth + 1) for name in item[1])
+        return new_dirs, found, counts
+
+    @staticmethod
+    def library_base(root):
+        """Steam库中的游戏位于 steamapps/common 下，其他库直接位于根目录下"""
+        common = os.path.join(root, "steamapps", "common")
+        return common if os.path.isdir(common) else root
+
+    def scan(self, roots=None):
+        """扫描库文件夹，返回候选应用 [(名称, 应用路径, 环境路径)]"""
+        started = time.perf_counter()
+        self.stats = {"dirs_read": 0, "dirs_reused": 0, "found": 0, "elapsed": 0.0}
+        old_dirs = self.dirs
+        new_dirs = {}
+        candidates = []
+
+        # 每个游戏文件夹作为一个任务交给线程池
+        tasks = []
+        for root in roots if roots is not None else self.roots:
+            base = self.library_base(os.path.abspath(root))
+            item = self._read_dir(base, old_dirs, new_dirs, self.stats)
+            if item is None:
+                continue
+            for name, size in item[2]:
+                if not SKIP_FILES.match(name.lower()):
+                    path = os.path.join(base, name)
+                    candidates.append((os.path.splitext(name)[0], path, base))
+            tasks.extend((name, os.path.join(base, name)) for name in item[1])
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scan") as executor:
+            futures = [(name, executor.submit(self._scan_tree, top, old_dirs)) for name, top in tasks]
+            for name, future in futures:
+                tree_dirs, found, counts = future.result()
+                new_dirs.update(tree_dirs)
+                for key, count in counts.items():
+                    self.stats[key] += count
+                best = self.pick_executable(name, found)
+                if best is not None:
+                    candidates.append((name, best, os.path.dirname(best)))
+
+        candidates.sort()
+
+        # 不再存在的目录随之从缓存中移除
+        if roots is None:
+            self.dirs = new_dirs
+        else:
+            self.dirs.update(new_dirs)
+        self.stats["found"] = len(candidates)
+        self.stats["elapsed"] = time.perf_counter() - started
+        return candidates
+
+    @staticmethod
+    def pick_executable(folder_name, found):
+        """从游戏文件夹的可执行文件中选出主程序：名称与文件夹相近、层级浅、文件大的优先"""
+        if not found:
+            return None
+        folder = _normalize(folder_name)
+
+        def score(item):
+            path, size, depth = item
+            stem = _normalize(os.path.splitext(os.path.basename(path))[0])
+            if stem and stem == folder:
+                similar = 2
+            elif stem and folder and (stem in folder or folder in stem):
+                similar = 1
+            else:
+                similar = 0
+            return similar, -depth, size
+
+        return max(found, key=score)[0]
+
+
+def propose_apps(candidates, apps):
+    """去掉已存在的应用路径，名称重复时加序号，返回 [(名称, 应用数据)]"""
+    existing = {path_key(app["app_path"]) for app in apps.values() if app.get("app_path")}
+    names = set(apps)
+    result = []
+    for name, app_path, env_path in candidates:
+        key = path_key(app_path)
+        if key in existing:
+            continue
+        existing.add(key)
+
+        unique = name
+        number = 2
+        while unique in names:
+            unique = f"{name} ({number})"
+            number += 1
+        names.add(unique)
+        result.append((unique, {"env_path": env_path, "app_path": app_path}))
+    return result
@@ -0,0 +1,416 @@
+"""AppLauncher 性能基准测试
+
+用法: python benchmark.py [--repeat N] [--sizes 10,1000,10000,100000] [--only icons,search,catalog,spawn]
+                          [--tk auto|real|stub] [--baseline FILE] [--save-baseline]
+
+没有显示器时（如Linux服务器）界面部分使用内置的无界面Tk替身，只测Python一侧的开销；
+需要包含Tk绘制的结果时可用虚拟显示: xvfb-run python benchmark.py --tk real
+给出 --baseline 文件时与保存的结果对比，变慢超过 --tolerance 的项目会列出并以返回码1退出。
+默认的基准文件 benchmark_baseline.json 由 --save-baseline 在本机生成（结果与机器有关，不提交到仓库）。
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import struct
+import sys
+import tempfile
+import time
+
+import icon_pixels
+import launch_engine
+import pe_icons
+import search_index
+import tk_stub
+
+# 默认的基准结果文件
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# 合成应用目录的条目数
+CATALOG_SIZES = (10, 1000, 10000, 100000)
+
+# 逐字输入的搜索内容
+TYPED_QUERIES = ["steam launcher", "原神", "yxlm", "cyber punk 2077"]
+
+# 本次运行的结果: 名称 -> 秒
+RESULTS = {}
+
+# 生成应用名称用的词表
+CJK_WORDS = ["英雄", "联盟", "原神", "明日", "方舟", "赛博", "朋克", "王者", "荣耀", "模拟",
+             "飞行", "三国", "无双", "仙剑", "奇侠", "传说", "星露", "谷物", "语", "战地",
+             "文明", "帝国", "时代", "绝地", "求生", "永劫", "无间", "黑神话", "悟空", "江湖"]
+LATIN_WORDS = ["Steam", "Epic", "Launcher", "Counter", "Strike", "Dota", "Valley", "Stardew",
+               "Cyber", "Punk", "Elden", "Ring", "Civilization", "Total", "War", "Portal",
+               "Half", "Life", "Minecraft", "Terraria", "Factorio", "Hades", "Celeste", "Tools"]
+
+
+def legacy_bgra_to_rgb(data, width, height):
+    """原逐像素转换实现（用于对比）"""
+    raw_data = bytearray(data)
+    rgb_data = bytearray(width * height * 3)
+
+    for i in range(height * width):
+        src_offset = i * 4
+        dst_offset = i * 3
+
+        alpha = raw_data[src_offset + 3] / 255.0
+
+        b = raw_data[src_offset]
+        g = raw_data[src_offset + 1]
+        r = raw_data[src_offset + 2]
+
+        rgb_data[dst_offset] = int(r * alpha + 255 * (1 - alpha))
+        rgb_data[dst_offset + 1] = int(g * alpha + 255 * (1 - alpha))
+        rgb_data[dst_offset + 2] = int(b * alpha + 255 * (1 - alpha))
+
+    return rgb_data
+
+
+def legacy_default_icon_rgb(width=32, height=32):
+    """原逐像素默认图标实现（用于对比）"""
+    rgb_data = bytearray(width * height * 3)
+    for y in range(height):
+        for x in range(width):
+            idx = (y * width + x) * 3
+            if 6 <= x <= 25 and 6 <= y <= 25:
+                rgb_data[idx:idx + 3] = b"\x00\x00\xc8"
+            else:
+                rgb_data[idx:idx + 3] = b"\xf0\xf0\xf0"
+    return rgb_data
+
+
+def make_icon_bgra(size, seed=0):
+    """生成带透明边缘的模拟图标像素"""
+    rnd = random.Random(seed)
+    data = bytearray(rnd.getrandbits(8) for _ in range(size * size * 4))
+    # 大部分像素为全透明或不透明，边缘为半透明，接近真实图标分布
+    for i in range(3, len(data), 4):
+        roll = data[i]
+        data[i] = 0 if roll < 80 else (255 if roll > 200 else roll)
+    return bytes(data)
+
+
+def make_app_names(count, seed=0):
+    """生成不重复的中英文混合应用名称"""
+    rnd = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        words = rnd.choice((CJK_WORDS, LATIN_WORDS))
+        name = "".join(rnd.choice(words) for _ in range(rnd.randint(2, 3)))
+        if words is LATIN_WORDS:
+            name = " ".join(rnd.choice(words) for _ in range(rnd.randint(2, 3)))
+        if rnd.random() < 0.3:
+            name += f" {rnd.randint(2, 2077)}"
+        names.add(name)
+    return sorted(names)
+
+
+def timeit(func, repeat):
+    """返回多次执行的最佳耗时（秒）"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def report(name, seconds, baseline=None):
+    RESULTS[name] = seconds
+    line = f"{name:<40} {seconds * 1000:10.3f} ms"
+    if baseline:
+        line += f"   x{baseline / seconds:6.1f}"
+    print(line)
+
+
+def make_ico(sizes, seed=0):
+    """生成包含多个32位DIB图像的ICO数据"""
+    images = []
+    for size in sizes:
+        pixels = make_icon_bgra(size, seed=seed + size)
+        # DIB按从下到上的行顺序保存，高度为颜色和AND掩码之和
+        rows = [pixels[y * size * 4:(y + 1) * size * 4] for y in range(size)]
+        mask_row = b"\x00" * (((size + 31) // 32) * 4)
+        header = struct.pack("<IiiHHIIiiII", 40, size, size * 2, 1, 32, 0, 0, 0, 0, 0, 0)
+        images.append(header + b"".join(reversed(rows)) + mask_row * size)
+
+    data = struct.pack("<HHH", 0, 1, len(images))
+    offset = 6 + 16 * len(images)
+    for size, image in zip(sizes, images):
+        data += struct.pack("<BBBBHHII", size % 256, size % 256, 0, 0, 1, 32, len(image), offset)
+        offset += len(image)
+    return data + b"".join(images)
+
+
+def bench_icon_decode(repeat):
+    print("== 图标像素转换 (BGRA -> RGB) ==")
+    for size in (32, 64, 128, 256):
+        data = make_icon_bgra(size, seed=size)
+        expected = legacy_bgra_to_rgb(data, size, size)
+        assert icon_pixels.bgra_to_rgb(data, size, size, use_numpy=False) == expected
+
+        legacy = timeit(lambda: legacy_bgra_to_rgb(data, size, size), repeat)
+        report(f"{size}px 逐像素循环", legacy)
+        pure = timeit(lambda: icon_pixels.bgra_to_rgb(data, size, size, use_numpy=False), repeat)
+        report(f"{size}px 切片+查找表", pure, legacy)
+        if icon_pixels.numpy_available():
+            assert icon_pixels.bgra_to_rgb(data, size, size, use_numpy=True) == expected
+            fast = timeit(lambda: icon_pixels.bgra_to_rgb(data, size, size, use_numpy=True), repeat)
+            report(f"{size}px NumPy", fast, legacy)
+
+    print("== 默认图标生成 ==")
+    assert icon_pixels.default_icon_rgb(32) == legacy_default_icon_rgb()
+    legacy = timeit(legacy_default_icon_rgb, repeat)
+    report("32px 逐像素循环", legacy)
+    report("32px 切片", timeit(lambda: icon_pixels.default_icon_rgb(32), repeat), legacy)
+    report("32px PPM", timeit(lambda: icon_pixels.bgra_to_ppm(make_icon_bgra(32), 32, 32), repeat))
+
+    print("== 图标解码和缩放 ==")
+    ico = make_ico((16, 32, 48, 256))
+    for size in (32, 48):
+        report(f"ICO -> {size}px BGRA", timeit(lambda: pe_icons.ico_bgra(ico, size), repeat))
+    large = make_icon_bgra(256, seed=256)
+    for size in (32, 48, 64):
+        report(f"256px -> {size}px 缩放+PNG", timeit(lambda: icon_pixels.icon_png(large, 256, 256, size), repeat))
+    small = make_icon_bgra(32, seed=32)
+    png = icon_pixels.bgra_to_png(small, 32, 32)
+    report("32px BGRA -> PNG", timeit(lambda: icon_pixels.bgra_to_png(small, 32, 32), repeat))
+    report("32px PNG -> BGRA", timeit(lambda: icon_pixels.png_to_bgra(png), repeat))
+
+
+def bench_search(repeat, count=50000):
+    print(f"== 搜索 ({count} 个应用) ==")
+    names = make_app_names(count)
+
+    start = time.perf_counter()
+    index = search_index.SearchIndex()
+    index.add_many((name, 0, None) for name in names)
+    report("加载名称 (add_many)", time.perf_counter() - start)
+    start = time.perf_counter()
+    index.index_pending()
+    report("建立 n-gram 索引（界面空闲时分批进行）", time.perf_counter() - start)
+
+    queries = ["s", "st", "ste", "steam", "steam launcher", "yxlm", "原神", "赛博朋克", "stmlnch", "xyzq"]
+    for query in queries:
+        expected = [name for name in names if query in name.lower()]
+        legacy = timeit(lambda: [name for name in names if query in name.lower()], repeat)
+        fast = timeit(lambda: index.search(query), repeat)
+        matched = len(index.search(query))
+        report(f"'{query}' 线性扫描 ({len(expected)})", legacy)
+        report(f"'{query}' 索引 ({matched})", fast, legacy)
+        top = timeit(lambda: index.search(query, limit=50), repeat)
+        report(f"'{query}' 索引 前50", top, legacy)
+
+
+def choose_tk(mode):
+    """返回实际使用的Tk：real 或 stub"""
+    if mode == "auto":
+        if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+            mode = "stub"
+        else:
+            try:
+                import tkinter
+                tkinter.Tk().destroy()
+                mode = "real"
+            except Exception:
+                mode = "stub"
+    if mode == "stub":
+        tk_stub.install()
+    return mode
+
+
+def format_count(count):
+    return f"{count // 1000}k" if count >= 1000 else str(count)
+
+
+def make_catalog(count, root, seed=0):
+    """生成应用字典，路径位于 root 下（不实际创建文件）"""
+    apps = {}
+    for i, name in enumerate(make_app_names(count, seed)):
+        folder = os.path.join(root, "Games", f"game{i:06d}")
+        apps[name] = {"env_path": folder, "app_path": os.path.join(folder, f"game{i:06d}.exe")}
+    return apps
+
+
+def bench_catalog(repeat, sizes):
+    """在合成目录上测试加载、保存和逐字搜索时的列表更新"""
+    import AppLauncher
+    import catalog_store
+
+    for count in sizes:
+        label = format_count(count)
+        print(f"== 应用目录 ({label} 个应用, Tk: {TK_MODE}) ==")
+        directory = tempfile.mkdtemp(prefix="applauncher-bench-")
+        try:
+            data_file = os.path.join(directory, "apps.json")
+            apps = make_catalog(count, directory)
+            with open(data_file, 'w', encoding='utf-8') as f:
+                json.dump(apps, f, ensure_ascii=False, indent=2)
+
+            report(f"{label} 加载 apps.json", timeit(lambda: catalog_store.open_store(data_file).load(), repeat))
+
+            store = catalog_store.open_store(data_file)
+            store.load()
+            name = next(iter(apps))
+
+            def save_one():
+                store.put(name, apps[name])
+                store.flush()
+
+            def save_snapshot():
+                # 日志为空时压缩直接返回：先追加一条修改，由压缩合并进快照
+                store.put(name, apps[name])
+                store.compact()
+
+            report(f"{label} 保存一条修改", timeit(save_one, repeat))
+            report(f"{label} 保存完整快照", timeit(save_snapshot, repeat))
+            store.close()
+
+            root = AppLauncher.tk.Tk()
+            app = AppLauncher.AppLauncher(root, data_file)
+            report(f"{label} 启动 load_apps", app.startup_timings["load_apps"])
+            report(f"{label} 启动 create_widgets", app.startup_timings["create_widgets"])
+
+            # 真实界面在空闲时分批建立搜索索引（替身不运行定时器），这里按相同的批量一次做完
+            started = time.perf_counter()
+            batches = 1
+            while app.catalog.index.index_pending(AppLauncher.INDEX_BUILD_BATCH):
+                batches += 1
+            report(f"{label} 空闲时建立搜索索引 ({batches} 批)", time.perf_counter() - started)
+
+            # 逐字输入再逐字删除，每次按键都同步执行一次列表更新
+            keystrokes = []
+            for query in TYPED_QUERIES:
+                typed = [query[:i] for i in range(1, len(query) + 1)]
+                for text in typed + typed[-2::-1] + [""]:
+                    app.search_var.set(text)
+                    started = time.perf_counter()
+                    app.filter_apps()
+                    keystrokes.append(time.perf_counter() - started)
+                    root.update()
+            report(f"{label} 每次按键 中位数", statistics.median(keystrokes))
+            report(f"{label} 每次按键 最慢", max(keystrokes))
+
+            app.on_close()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def legacy_spawn(app_data):
+    """原启动方式（用于对比）：Windows上经过 cmd.exe；参数和环境变量每次启动时重新拼接"""
+    import subprocess
+    argv = [app_data["app_path"]] + list(app_data.get("args", ()))
+    cwd = app_data["env_path"] or None
+    env = None
+    if app_data.get("env"):
+        env = dict(os.environ)
+        env.update(app_data["env"])
+    if sys.platform == "win32":
+        return subprocess.Popen(argv, cwd=cwd, env=env, shell=True)
+    return subprocess.Popen(argv, cwd=cwd, env=env)
+
+
+def bench_spawn(repeat):
+    """测试从调用到进程创建完成的耗时（不等待进程退出），对比原启动方式和启动引擎"""
+    print("== 启动进程 ==")
+    program = shutil.which("true") or sys.executable
+    cases = [
+        ("无工作目录", {"app_path": program, "env_path": ""}),
+        ("设置工作目录", {"app_path": program, "env_path": os.path.dirname(program)}),
+        ("参数和环境变量", {"app_path": program, "env_path": "", "args": ["--version", "{app_dir}"],
+                     "env": {"APPLAUNCHER_BENCH": "{name}"}}),
+    ]
+    for label, app_data in cases:
+        engine = launch_engine.LaunchEngine()
+        spawners = [
+            ("原方式", legacy_spawn),
+            ("启动引擎", lambda data: engine.launch("bench", data)[0]),
+        ]
+        for name, spawn in spawners:
+            latencies = []
+            for _ in range(max(repeat, 5)):
+                started = time.perf_counter()
+                process = spawn(app_data)
+                latencies.append(time.perf_counter() - started)
+                process.kill()
+                process.wait()
+            report(f"{label} {name} 中位数", statistics.median(latencies))
+            report(f"{label} {name} 最快", min(latencies))
+        print(f"  启动引擎构建启动参数 {engine.builds} 次，启动 {engine.launches} 次")
+
+
+def compare_baseline(path, tolerance):
+    """与基准结果对比，返回变慢的项目数"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"无法读取基准结果 {path}: {e}")
+        return 0
+
+    print(f"== 与基准对比 ({path}) ==")
+    slower = 0
+    for name, seconds in RESULTS.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = seconds / base
+        if ratio > 1 + tolerance:
+            slower += 1
+            print(f"{name:<40} {base * 1000:10.3f} -> {seconds * 1000:10.3f} ms  慢 {ratio:5.2f}x")
+    print(f"{len(RESULTS)} 项中 {slower} 项变慢超过 {tolerance:.0%}")
+    return slower
+
+
+def save_baseline(path):
+    data = {"python": sys.version.split()[0], "platform": sys.platform, "tk": TK_MODE,
+            "created": time.time(), "results": RESULTS}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"基准结果已保存到 {path}")
+
+
+TK_MODE = None
+
+
+def main(argv=None):
+    global TK_MODE
+
+    parser = argparse.ArgumentParser(description="AppLauncher 性能基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数，取最佳值")
+    parser.add_argument("--sizes", default=",".join(map(str, CATALOG_SIZES)),
+                        help="合成应用目录的条目数，逗号分隔")
+    parser.add_argument("--only", default="icons,search,catalog,spawn",
+                        help="要运行的测试，逗号分隔: icons, search, catalog, spawn")
+    parser.add_argument("--tk", choices=("auto", "real", "stub"), default="auto",
+                        help="界面测试使用真实Tk还是无界面替身（默认有显示器时用真实Tk）")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="基准结果文件")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基准")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的变慢比例（默认 0.25）")
+    args = parser.parse_args(argv)
+
+    only = set(args.only.split(","))
+    if "icons" in only:
+        bench_icon_decode(args.repeat)
+    if "search" in only:
+        bench_search(args.repeat)
+    if "catalog" in only:
+        TK_MODE = choose_tk(args.tk)
+        bench_catalog(args.repeat, [int(size) for size in args.sizes.split(",") if size])
+    if "spawn" in only:
+        bench_spawn(args.repeat)
+
+    if args.save_baseline:
+        save_baseline(args.baseline)
+        return 0
+    if os.path.exists(args.baseline):
+        return 1 if compare_baseline(args.baseline, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
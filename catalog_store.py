@@ -0,0 +1,318 @@
+"""应用数据存储：追加写日志 + 定时批量提交 + 原子替换快照"""
+import json
+import os
+import threading
+
+import file_lock
+import instrument
+
+# 批量提交延迟（秒），期间的修改合并为一次写入
+COMMIT_DELAY = 0.05
+
+# 日志超过该大小后压缩为新的快照
+COMPACT_BYTES = 256 * 1024
+
+
+def fsync_dir(path):
+    """把文件所在文件夹的目录项（新建、改名）写入磁盘；Windows不能打开文件夹，由文件系统日志保证"""
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def plain(data):
+    """写入存储的字典：应用目录的记录对象提供 to_dict()，普通字典复制一份"""
+    to_dict = getattr(data, "to_dict", None)
+    return to_dict() if to_dict is not None else dict(data)
+
+
+class CatalogStore:
+    """存储后端的公共部分：维护内存中的应用字典，修改延迟批量提交
+
+    apps 的值可以是普通字典或提供 to_dict() 的记录对象（应用目录与存储共用同一个字典）
+    """
+
+    def __init__(self, path, commit_delay=COMMIT_DELAY):
+        self.path = path
+        self.commit_delay = commit_delay
+        self.apps = {}
+
+        # 等待提交的修改: [(op, name, data)]
+        self.pending = []
+        self.lock = threading.Lock()
+        self.timer = None
+        self.compact_needed = False
+
+        # 统计：提交次数和fsync次数
+        self.commits = 0
+        self.fsyncs = 0
+        self.last_error = None
+
+    def load(self):
+        """加载并返回应用字典"""
+        raise NotImplementedError
+
+    def put(self, name, data):
+        """添加或更新应用"""
+        self.apps[name] = data
+        self._queue([("put", name, plain(data))])
+
+    def put_many(self, items):
+        """批量添加应用，只产生一次提交"""
+        records = []
+        for name, data in items:
+            self.apps[name] = data
+            records.append(("put", name, plain(data)))
+        self._queue(records)
+
+    def delete(self, name):
+        """删除应用"""
+        self.delete_many([name])
+
+    def delete_many(self, names):
+        """批量删除应用，只产生一次提交"""
+        records = [("del", name, None) for name in names if self.apps.pop(name, None) is not None]
+        if records:
+            self._queue(records)
+
+    def _queue(self, records):
+        with self.lock:
+            self.pending.extend(records)
+            if self.timer is None:
+                self.timer = threading.Timer(self.commit_delay, self._commit_from_timer)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def _commit_from_timer(self):
+        try:
+            self.flush()
+            # 压缩在计时器线程中进行，不阻塞界面
+            if self.compact_needed:
+                self.compact()
+        except Exception as e:
+            print(f"保存应用数据失败: {e}")
+
+    @instrument.timed("catalog.flush")
+    def flush(self):
+        """立即提交所有等待的修改，失败时保留修改并抛出异常"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.pending:
+                return
+            records = self.pending
+            self.pending = []
+            try:
+                self._write(records)
+            except Exception as e:
+                self.pending = records + self.pending
+                self.last_error = e
+                raise
+            self.commits += 1
+            self.last_error = None
+
+    def _write(self, records):
+        raise NotImplementedError
+
+    def compact(self):
+        """整理存储（由子类实现）"""
+        self.compact_needed = False
+
+    def close(self):
+        """提交并整理存储"""
+        self.flush()
+        self.compact()
+
+
+class JsonJournalStore(CatalogStore):
+    """apps.json 快照 + apps.json.journal 追加日志
+
+    压缩时先写好新快照的临时文件，再把日志改名为 .journal.old，然后才替换快照：
+    如果中途崩溃，加载时根据临时文件是否还在判断快照是否已经替换，
+    避免把旧日志重放到已经包含（或已经删除）这些修改的新快照上。
+
+    界面运行时命令行进程（没有常驻实例时）也会向同一个日志追加记录：
+    追加、压缩和加载都持有锁文件 apps.json.lock，压缩时从磁盘上的快照和完整日志生成新快照，
+    不会丢掉其他进程追加的记录。
+    """
+
+    def __init__(self, path, commit_delay=COMMIT_DELAY, compact_bytes=COMPACT_BYTES):
+        super().__init__(path, commit_delay)
+        self.journal_path = path + ".journal"
+        self.old_journal_path = self.journal_path + ".old"
+        self.temp_path = path + ".tmp"
+        self.lock_path = path + ".lock"
+        self.compact_bytes = compact_bytes
+        # 日志文件大小（包括其他进程追加的记录）
+        self.journal_size = 0
+
+    def _recover(self):
+        """处理中途崩溃的压缩留下的旧日志"""
+        if not os.path.exists(self.old_journal_path):
+            return
+        if os.path.exists(self.temp_path):
+            # 快照还没有替换：旧快照 + 旧日志仍然有效，恢复旧日志（改名期间不会写入新日志）
+            os.replace(self.old_journal_path, self.journal_path)
+            fsync_dir(self.journal_path)
+            os.remove(self.temp_path)
+        else:
+            # 快照已经替换，旧日志中的修改都已包含在快照中
+            os.remove(self.old_journal_path)
+
+    def _read(self):
+        """读取快照并重放日志，返回 (应用字典, 日志中完整记录的字节数)；调用者持有锁文件"""
+        self._recover()
+        apps = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                apps = json.load(f)
+
+        # 重放快照之后的修改，忽略崩溃时写了一半的最后一条记录
+        good_size = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        op, name, data = json.loads(line)
+                    except ValueError:
+                        break
+                    if op == "put":
+                        apps[name] = data
+                    elif op == "del":
+                        apps.pop(name, None)
+                    good_size += len(line)
+
+            if good_size != os.path.getsize(self.journal_path):
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(good_size)
+        return apps, good_size
+
+    def load(self):
+        with file_lock.locked(self.lock_path):
+            apps, good_size = self._read()
+        self.apps = apps
+        self.journal_size = good_size
+        self.compact_needed = good_size > self.compact_bytes
+        return apps
+
+    def _write(self, records):
+        with file_lock.locked(self.lock_path):
+            self._append(records)
+
+    def _append(self, records):
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode('utf-8')
+        with open(self.journal_path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            self.journal_size = f.tell()
+        self.fsyncs += 1
+        if self.journal_size == len(data):
+            # 日志文件是刚创建的
+            fsync_dir(self.journal_path)
+        if self.journal_size > self.compact_bytes:
+            self.compact_needed = True
+
+    def compact(self):
+        """把快照和日志合并成新快照并清空日志"""
+        with self.lock, file_lock.locked(self.lock_path):
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            # 等待中的修改先追加到日志，新快照只从磁盘上的数据生成
+            if self.pending:
+                self._append(self.pending)
+                self.pending = []
+
+            has_journal = os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0
+            if not has_journal and os.path.exists(self.path):
+                self.journal_size = 0
+                self.compact_needed = False
+                return
+
+            # 内存中的应用字典可能不包含其他进程追加的记录，不能直接写成快照
+            apps, _ = self._read()
+            data = json.dumps(apps, ensure_ascii=False, indent=2).encode('utf-8')
+            with open(self.temp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            # 快照已经包含日志中的所有修改：先移走日志再替换快照
+            rotated = os.path.exists(self.journal_path)
+            if rotated:
+                os.replace(self.journal_path, self.old_journal_path)
+                fsync_dir(self.path)
+            os.replace(self.temp_path, self.path)
+            fsync_dir(self.path)
+            if rotated:
+                os.remove(self.old_journal_path)
+            self.fsyncs += 1
+            self.journal_size = 0
+            self.compact_needed = False
+
+
+class SqliteStore(CatalogStore):
+    """SQLite 存储，首次使用时从 apps.json 导入"""
+
+    def __init__(self, path, json_path=None, commit_delay=COMMIT_DELAY):
+        super().__init__(path, commit_delay)
+        self.json_path = json_path
+        self.conn = None
+
+    def _connect(self):
+        import sqlite3
+
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS apps (name TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        return self.conn
+
+    def load(self):
+        conn = self._connect()
+        with self.lock:
+            rows = conn.execute("SELECT name, data FROM apps").fetchall()
+        apps = {name: json.loads(data) for name, data in rows}
+
+        if not apps and self.json_path and os.path.exists(self.json_path):
+            migrated = JsonJournalStore(self.json_path).load()
+            if migrated:
+                self.apps = apps
+                self.put_many(migrated.items())
+                self.flush()
+                return self.apps
+
+        self.apps = apps
+        return apps
+
+    def _write(self, records):
+        conn = self._connect()
+        with conn:
+            for op, name, data in records:
+                if op == "put":
+                    conn.execute("INSERT OR REPLACE INTO apps (name, data) VALUES (?, ?)",
+                                 (name, json.dumps(data, ensure_ascii=False)))
+                else:
+                    conn.execute("DELETE FROM apps WHERE name = ?", (name,))
+        self.fsyncs += 1
+
+    def close(self):
+        super().close()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def open_store(data_file, backend="json"):
+    """按后端名称创建存储"""
+    if backend == "sqlite":
+        return SqliteStore(os.path.splitext(data_file)[0] + ".db", json_path=data_file)
+    return JsonJournalStore(data_file)
@@ -0,0 +1,32 @@
+"""跨进程的独占文件锁：界面、常驻实例和命令行可能同时修改同一个数据文件
+
+锁加在单独的锁文件上（数据文件会被改名替换，不能锁数据文件本身）。
+同一进程的不同线程也不能重复加锁，线程之间仍需要各自的 threading.Lock。
+"""
+import contextlib
+import os
+
+
+@contextlib.contextmanager
+def locked(lock_path):
+    """持有 lock_path 的独占锁，其他进程加锁时等待"""
+    f = open(lock_path, 'a+b')
+    try:
+        if os.name == "posix":
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            import msvcrt
+            # 锁住第一个字节；LK_LOCK 等不到锁时每秒重试一次，10次后抛出 OSError
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if os.name == "posix":
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        f.close()
@@ -0,0 +1,139 @@
+"""内存中的图标缓存：相同像素的图标只保留一份，按总字节数限制大小并淘汰最久未使用的图像"""
+import hashlib
+from collections import OrderedDict
+
+# 默认的缓存上限（字节），约为2000个32x32图标
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+def content_digest(data):
+    """图标数据的内容哈希，用于合并相同的图标"""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class IconCache:
+    """路径 -> 图像 的缓存，多个路径可以共享同一个图像"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+
+        # 路径 -> 内容哈希
+        self.paths = {}
+        # 内容哈希 -> [图像, 字节数, 使用该图像的路径集合]，按最近使用排序
+        self.images = OrderedDict()
+        self.total_bytes = 0
+        # 正在显示的路径：它们的图像计入大小但不会被淘汰
+        self.pinned = set()
+
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, path):
+        return path in self.paths
+
+    def get(self, path):
+        """返回路径对应的图像并标记为最近使用，不存在时返回None"""
+        digest = self.paths.get(path)
+        if digest is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.images.move_to_end(digest)
+        return self.images[digest][0]
+
+    def peek(self, path):
+        """返回路径对应的图像，不影响淘汰顺序和统计"""
+        digest = self.paths.get(path)
+        return None if digest is None else self.images[digest][0]
+
+    def share(self, path, digest):
+        """已有相同内容的图像时直接共享给 path 并返回该图像，否则返回None"""
+        entry = self.images.get(digest)
+        if entry is None:
+            return None
+        self._link(path, digest, entry)
+        return entry[0]
+
+    def put(self, path, image, digest, nbytes):
+        """缓存图像并返回实际使用的图像（内容相同时返回已有的图像）
+
+        nbytes 为0的图像（如共享的默认图标）不计入大小，也不会被淘汰
+        """
+        shared = self.share(path, digest)
+        if shared is not None:
+            return shared
+
+        entry = [image, nbytes, set()]
+        self.images[digest] = entry
+        self.total_bytes += nbytes
+        self._link(path, digest, entry)
+        self._evict(keep=digest)
+        return image
+
+    def _link(self, path, digest, entry):
+        old = self.paths.get(path)
+        if old == digest:
+            self.images.move_to_end(digest)
+            return
+        if old is not None:
+            self.discard(path)
+        self.paths[path] = digest
+        entry[2].add(path)
+        self.images.move_to_end(digest)
+
+    def discard(self, path):
+        """移除路径，没有其他路径使用的图像随之释放"""
+        digest = self.paths.pop(path, None)
+        if digest is None:
+            return
+        entry = self.images[digest]
+        entry[2].discard(path)
+        if not entry[2]:
+            del self.images[digest]
+            self.total_bytes -= entry[1]
+
+    def pin(self, paths):
+        """设置正在显示的路径（取代之前的设置），不再显示的图像可以再被淘汰"""
+        self.pinned = set(paths)
+        self._evict()
+
+    def _evict(self, keep=None):
+        """淘汰最久未使用的图像直到不超过上限（跳过正在显示的图像）"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        for digest in list(self.images):
+            if self.total_bytes <= self.max_bytes:
+                break
+            entry = self.images[digest]
+            if not entry[1] or digest == keep or not self.pinned.isdisjoint(entry[2]):
+                continue
+            del self.images[digest]
+            self.total_bytes -= entry[1]
+            for path in entry[2]:
+                del self.paths[path]
+            self.evictions += 1
+
+    def clear(self):
+        """清空缓存（统计保留）"""
+        self.paths.clear()
+        self.images.clear()
+        self.total_bytes = 0
+
+    def stats(self):
+        """缓存统计"""
+        lookups = self.hits + self.misses
+        return {
+            "paths": len(self.paths),
+            "images": len(self.images),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
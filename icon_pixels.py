@@ -0,0 +1,369 @@
+"""图标像素批量转换 (BGRA -> RGB / PPM / PNG) 和缩放"""
+import struct
+from itertools import chain
+from operator import getitem
+
+# NumPy 和混合查找表都在第一次使用时才加载，避免拖慢启动
+np = None
+_numpy_checked = False
+_BLEND_ROWS = None
+
+# 可选的图标尺寸（像素）
+ICON_VARIANTS = (16, 32, 48, 64, 128)
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def numpy_available():
+    """NumPy 是否可用"""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np is not None
+
+
+def _blend_rows():
+    """按alpha值预先计算混合到白色背景的查找表，结果与逐像素公式完全一致"""
+    global _BLEND_ROWS
+    if _BLEND_ROWS is None:
+        rows = []
+        for a in range(256):
+            alpha = a / 255.0
+            rows.append(bytes(int(c * alpha + 255 * (1 - alpha)) for c in range(256)))
+        _BLEND_ROWS = rows
+    return _BLEND_ROWS
+
+
+def _blend_channel(channel, rows):
+    """用查找表混合单个颜色通道"""
+    return bytes(map(getitem, rows, channel))
+
+
+def _bgra_to_rgb_pure(view, pixel_count):
+    """纯Python实现：切片拆分通道 + 查找表混合"""
+    b = view[0::4]
+    g = view[1::4]
+    r = view[2::4]
+    a = view[3::4]
+
+    # 完全不透明时无需混合
+    if a.count(255) != pixel_count:
+        rows = list(map(_blend_rows().__getitem__, a))
+        r = _blend_channel(r, rows)
+        g = _blend_channel(g, rows)
+        b = _blend_channel(b, rows)
+
+    rgb_data = bytearray(pixel_count * 3)
+    rgb_data[0::3] = r
+    rgb_data[1::3] = g
+    rgb_data[2::3] = b
+    return rgb_data
+
+
+def _bgra_to_rgb_numpy(view, pixel_count):
+    """NumPy实现"""
+    pixels = np.frombuffer(view, dtype=np.uint8, count=pixel_count * 4).reshape(-1, 4)
+    alpha = pixels[:, 3:4] / 255.0
+    rgb = pixels[:, 2::-1] * alpha + 255 * (1 - alpha)
+    return bytearray(rgb.astype(np.uint8).tobytes())
+
+
+def bgra_to_rgb(data, width, height, use_numpy=None):
+    """将BGRA原始数据alpha混合到白色背景并转换为RGB字节"""
+    pixel_count = width * height
+    view = bytes(memoryview(data)[:pixel_count * 4])
+    if len(view) != pixel_count * 4:
+        raise ValueError(f"像素数据长度不足: 需要 {pixel_count * 4}, 实际 {len(view)}")
+
+    if use_numpy is None:
+        use_numpy = numpy_available()
+    if use_numpy and numpy_available():
+        return _bgra_to_rgb_numpy(view, pixel_count)
+    return _bgra_to_rgb_pure(view, pixel_count)
+
+
+def ppm_header(width, height):
+    """PPM (P6) 文件头"""
+    return f"P6\n{width} {height}\n255\n".encode()
+
+
+def rgb_to_ppm(rgb_data, width, height):
+    """RGB数据转换为PPM字节"""
+    return ppm_header(width, height) + bytes(rgb_data)
+
+
+def bgra_to_ppm(data, width, height, use_numpy=None):
+    """BGRA原始数据直接转换为PPM字节"""
+    return rgb_to_ppm(bgra_to_rgb(data, width, height, use_numpy), width, height)
+
+
+def default_icon_rgb(size=32):
+    """生成默认图标的RGB数据：浅灰色背景上的蓝色方块"""
+    background = b"\xf0\xf0\xf0"
+    block = b"\x00\x00\xc8"
+
+    # 方块范围与原32x32图标的 6..25 保持比例
+    start = size * 6 // 32
+    end = size * 26 // 32
+    plain_row = background * size
+    block_row = background * start + block * (end - start) + background * (size - end)
+
+    return bytearray(plain_row * start + block_row * (end - start) + plain_row * (size - end))
+
+
+def _png_chunk(kind, data):
+    import zlib
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def bgra_to_png(data, width, height):
+    """BGRA原始数据转换为带alpha通道的PNG字节（Tk 8.6可直接加载）"""
+    import zlib
+
+    pixels = bytes(memoryview(data)[:width * height * 4])
+    if len(pixels) != width * height * 4:
+        raise ValueError(f"像素数据长度不足: 需要 {width * height * 4}, 实际 {len(pixels)}")
+    rgba = bytearray(len(pixels))
+    rgba[0::4] = pixels[2::4]
+    rgba[1::4] = pixels[1::4]
+    rgba[2::4] = pixels[0::4]
+    rgba[3::4] = pixels[3::4]
+
+    # 每行前加过滤类型0
+    stride = width * 4
+    raw = b"".join(b"\0" + rgba[y * stride:(y + 1) * stride] for y in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (_PNG_SIGNATURE + _png_chunk(b"IHDR", header)
+            + _png_chunk(b"IDAT", zlib.compress(raw)) + _png_chunk(b"IEND", b""))
+
+
+def _unfilter(raw, width, height, bpp):
+    """还原PNG逐行过滤"""
+    stride = width * bpp
+    out = bytearray(height * stride)
+    prev = bytearray(stride)
+    pos = 0
+    for y in range(height):
+        kind = raw[pos]
+        line = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += stride + 1
+        if kind == 1:
+            for i in range(bpp, stride):
+                line[i] = (line[i] + line[i - bpp]) & 255
+        elif kind == 2:
+            line = bytearray(map(lambda a, b: (a + b) & 255, line, prev))
+        elif kind == 3:
+            for i in range(stride):
+                left = line[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + ((left + prev[i]) >> 1)) & 255
+        elif kind == 4:
+            for i in range(stride):
+                if i >= bpp:
+                    a = line[i - bpp]
+                    c = prev[i - bpp]
+                else:
+                    a = c = 0
+                b = prev[i]
+                p = a + b - c
+                pa = abs(p - a)
+                pb = abs(p - b)
+                pc = abs(p - c)
+                if pa <= pb and pa <= pc:
+                    line[i] = (line[i] + a) & 255
+                elif pb <= pc:
+                    line[i] = (line[i] + b) & 255
+                else:
+                    line[i] = (line[i] + c) & 255
+        elif kind != 0:
+            raise ValueError(f"未知的PNG过滤类型: {kind}")
+        out[y * stride:(y + 1) * stride] = line
+        prev = line
+    return out
+
+
+def png_to_bgra(data):
+    """解码8位RGB/RGBA、非隔行的PNG，返回 (bgra_data, width, height)"""
+    import zlib
+
+    data = bytes(data)
+    if data[:8] != _PNG_SIGNATURE:
+        raise ValueError("不是PNG数据")
+
+    pos = 8
+    header = None
+    idat = []
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack_from(">I4s", data, pos)
+        chunk = data[pos + 8:pos + 8 + length]
+        pos += length + 12
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"IDAT":
+            idat.append(chunk)
+        elif kind == b"IEND":
+            break
+    if header is None:
+        raise ValueError("PNG缺少IHDR")
+
+    width, height, depth, color_type, _, _, interlace = header
+    if depth != 8 or color_type not in (2, 6) or interlace:
+        raise ValueError(f"不支持的PNG格式: 位深 {depth}, 颜色类型 {color_type}")
+
+    bpp = 4 if color_type == 6 else 3
+    pixels = _unfilter(zlib.decompress(b"".join(idat)), width, height, bpp)
+
+    bgra = bytearray(width * height * 4)
+    bgra[0::4] = pixels[2::bpp]
+    bgra[1::4] = pixels[1::bpp]
+    bgra[2::4] = pixels[0::bpp]
+    bgra[3::4] = pixels[3::4] if bpp == 4 else b"\xff" * (width * height)
+    return bytes(bgra), width, height
+
+
+def _axis_weights(src, dst):
+    """缩放时每个目标像素对应的源像素及整数权重，返回 (权重表, 分母)：缩小用区域平均，放大用双线性
+
+    坐标按 1/dst（放大时 1/(2*dst)）像素为单位计算，权重都是整数，两种实现的结果可以逐字节一致。
+    """
+    weights = []
+    if dst <= src:
+        # 目标像素 i 覆盖源坐标 [i*src, (i+1)*src)，源像素 j 覆盖 [j*dst, (j+1)*dst)
+        for i in range(dst):
+            start = i * src
+            end = start + src
+            taps = []
+            for j in range(start // dst, min(src, -(-end // dst))):
+                cover = min(end, (j + 1) * dst) - max(start, j * dst)
+                if cover > 0:
+                    taps.append((j, cover))
+            weights.append(taps)
+        return weights, src
+
+    # 目标像素中心在源坐标 ((2i+1)*src - dst) / (2*dst)
+    denominator = 2 * dst
+    for i in range(dst):
+        center = (2 * i + 1) * src - dst
+        j = center // denominator
+        frac = center - j * denominator
+        weights.append([(min(max(j, 0), src - 1), denominator - frac), (min(max(j + 1, 0), src - 1), frac)])
+    return weights, denominator
+
+
+def _box_reduce(plane, width, height, factor):
+    """按整数倍缩小（每 factor x factor 个像素求和），宽高必须是 factor 的整数倍"""
+    rows = []
+    for y in range(height):
+        row = plane[y * width:(y + 1) * width]
+        rows.append(list(map(sum, zip(*[row[j::factor] for j in range(factor)]))))
+
+    result = []
+    for y in range(0, height, factor):
+        result.extend(map(sum, zip(*rows[y:y + factor])))
+    return result
+
+
+def _combine(lines, taps):
+    """按权重合并若干行（等长的整数序列），权重相同的行先相加再乘，都是整行运算"""
+    groups = {}
+    for j, w in taps:
+        if w:
+            groups.setdefault(w, []).append(lines[j])
+    parts = []
+    for w, group in groups.items():
+        summed = group[0] if len(group) == 1 else list(map(sum, zip(*group)))
+        parts.append(summed if w == 1 else list(map(w.__mul__, summed)))
+    return parts[0] if len(parts) == 1 else list(map(sum, zip(*parts)))
+
+
+def _resample(plane, width, height, x_weights, y_weights):
+    """按权重表缩放单个通道：先合并行，再转置后合并列"""
+    rows = [plane[y * width:(y + 1) * width] for y in range(height)]
+    rows = [_combine(rows, taps) for taps in y_weights]
+    columns = list(zip(*rows))
+    columns = [_combine(columns, taps) for taps in x_weights]
+    return list(chain.from_iterable(zip(*columns)))
+
+
+def _unpremultiply(planes, denominator):
+    """由预乘alpha的加权和得到BGRA字节：alpha = A/分母，颜色 = C/A，都四舍五入（纯整数运算）"""
+    alpha = planes[3]
+    out = bytearray(len(alpha) * 4)
+    for k in range(3):
+        out[k::4] = bytes(min(255, (2 * c + al) // (2 * al)) if 2 * al > denominator else 0
+                          for c, al in zip(planes[k], alpha))
+    out[3::4] = bytes(min(255, (2 * al + denominator) // (2 * denominator)) for al in alpha)
+    return bytes(out)
+
+
+def _scale_bgra_pure(pixels, width, height, new_width, new_height):
+    # 预乘alpha，避免透明像素的颜色渗到边缘
+    a = list(pixels[3::4])
+    planes = [list(map(int.__mul__, pixels[k::4], a)) for k in range(3)] + [a]
+
+    # 整数倍缩小时每个目标像素正好是 factor x factor 个源像素的平均，直接求和（大部分工作在C层完成）
+    factor = width // new_width
+    if factor >= 2 and width == new_width * factor and height == new_height * factor:
+        planes = [_box_reduce(plane, width, height, factor) for plane in planes]
+        return _unpremultiply(planes, factor * factor)
+
+    x_weights, x_denominator = _axis_weights(width, new_width)
+    y_weights, y_denominator = _axis_weights(height, new_height)
+    planes = [_resample(plane, width, height, x_weights, y_weights) for plane in planes]
+    return _unpremultiply(planes, x_denominator * y_denominator)
+
+
+def _scale_bgra_numpy(pixels, width, height, new_width, new_height):
+    def matrix(src, dst):
+        weights, denominator = _axis_weights(src, dst)
+        m = np.zeros((dst, src))
+        for i, taps in enumerate(weights):
+            for j, w in taps:
+                m[i, j] += w
+        return m, denominator
+
+    # 与纯Python实现相同的整数权重和舍入，结果逐字节一致
+    # （加权和都是小于 2**53 的整数，用 float64 矩阵乘法计算也没有误差）
+    image = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 4).astype(np.float64)
+    image[:, :, :3] *= image[:, :, 3:4]
+    y_matrix, y_denominator = matrix(height, new_height)
+    x_matrix, x_denominator = matrix(width, new_width)
+    rows = (y_matrix @ image.reshape(height, width * 4)).reshape(new_height, width, 4)
+    scaled = np.rint(x_matrix @ rows).astype(np.int64)
+    denominator = y_denominator * x_denominator
+
+    alpha = scaled[:, :, 3:4]
+    visible = 2 * alpha > denominator
+    color = np.where(visible, (2 * scaled[:, :, :3] + alpha) // np.where(visible, 2 * alpha, 1), 0)
+    alpha = (2 * alpha + denominator) // (2 * denominator)
+    out = np.concatenate([color, alpha], axis=2)
+    return np.minimum(out, 255).astype(np.uint8).tobytes()
+
+
+def scale_bgra(data, width, height, new_width, new_height, use_numpy=None):
+    """缩放BGRA图像（预乘alpha的区域平均/双线性插值）"""
+    pixels = bytes(memoryview(data)[:width * height * 4])
+    if (width, height) == (new_width, new_height):
+        return pixels
+    if use_numpy is None:
+        use_numpy = numpy_available()
+    if use_numpy and numpy_available():
+        return _scale_bgra_numpy(pixels, width, height, new_width, new_height)
+    return _scale_bgra_pure(pixels, width, height, new_width, new_height)
+
+
+def icon_png(data, width, height, size, use_numpy=None):
+    """把任意尺寸的BGRA图标缩放为 size x size 并编码为PNG"""
+    return bgra_to_png(scale_bgra(data, width, height, size, size, use_numpy), size, size)
+
+
+def choose_variant(size):
+    """不小于 size 的最小可选尺寸（超过最大尺寸时取最大）"""
+    for variant in ICON_VARIANTS:
+        if variant >= size:
+            return variant
+    return ICON_VARIANTS[-1]
@@ -0,0 +1,253 @@
+"""持久化图标图集：一个打包的图集文件 + 索引文件"""
+import json
+import mmap
+import os
+import threading
+
+# 版本2: 按尺寸分别保存带alpha的PNG图标
+ATLAS_VERSION = 2
+
+# 图集默认上限 16MB，超过后按最近使用时间淘汰
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def _key(app_path, size):
+    return f"{size}:{app_path}"
+
+
+def _key_path(key):
+    return key.split(":", 1)[1]
+
+
+class IconAtlas:
+    """按 (app_path, 图标尺寸, st_mtime, st_size) 缓存图标数据的磁盘图集，可在多个线程中使用"""
+
+    def __init__(self, directory, name="icons", max_bytes=DEFAULT_MAX_BYTES):
+        self.atlas_file = os.path.join(directory, f"{name}.atlas")
+        self.index_file = os.path.join(directory, f"{name}.idx")
+        self.max_bytes = max_bytes
+
+        # 索引: "尺寸:path" -> [mtime, size, offset, length, width, height, last_used]
+        self.entries = {}
+        # 尚未写入图集的新图标: "尺寸:path" -> bytes
+        self.pending = {}
+        self.tick = 0
+        # 图标内容有变化，需要重写图集（读取只更新内存中的使用时间，不需要写盘）
+        self.dirty = False
+
+        # lock 保护索引和内存映射；flush_lock 保证同一时间只有一个线程在写文件
+        self.lock = threading.RLock()
+        self.flush_lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self.load()
+
+    def load(self):
+        """加载索引并内存映射图集文件"""
+        with self.lock:
+            self.close()
+            self.entries = {}
+            self.pending = {}
+            self.tick = 0
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get("version") != ATLAS_VERSION:
+                return
+            atlas_size = index.get("atlas_size", 0)
+            entries = index.get("entries", {})
+            tick = index.get("tick", 0)
+        except (OSError, ValueError):
+            return
+
+        try:
+            self._file = open(self.atlas_file, 'rb')
+            size = os.fstat(self._file.fileno()).st_size
+            if size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError as e:
+            print(f"打开图标图集失败: {e}")
+            self.close()
+            self.entries = {}
+            return
+
+        # 图集与索引不匹配（例如写入中途崩溃），整个缓存作废
+        mapped = len(self._map) if self._map is not None else 0
+        if mapped != atlas_size:
+            self.close()
+            return
+
+        self.entries = entries
+        self.tick = tick
+
+    def close(self):
+        """释放内存映射"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def get(self, app_path, st, size):
+        """返回 (image_data, width, height)，缓存不存在或已过期时返回None"""
+        key = _key(app_path, size)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            # 文件被修改过，所有尺寸的缓存都失效
+            if entry[0] != st.st_mtime or entry[1] != st.st_size:
+                self.discard(app_path)
+                return None
+
+            # 使用时间只在下次重写图集时保存，读取不会触发写盘
+            self.tick += 1
+            entry[6] = self.tick
+            if key in self.pending:
+                data = self.pending[key]
+            else:
+                offset, length = entry[2], entry[3]
+                data = self._map[offset:offset + length]
+            return data, entry[4], entry[5]
+
+    def put(self, app_path, st, image_data, width, height):
+        """添加图标（按宽度区分尺寸），写入磁盘推迟到 flush()"""
+        key = _key(app_path, width)
+        with self.lock:
+            self.tick += 1
+            self.entries[key] = [st.st_mtime, st.st_size, -1, len(image_data), width, height, self.tick]
+            self.pending[key] = bytes(image_data)
+            self.dirty = True
+
+    def _discard_keys(self, keys):
+        for key in keys:
+            del self.entries[key]
+            self.pending.pop(key, None)
+            self.dirty = True
+
+    def discard(self, app_path):
+        """移除某个应用所有尺寸的图标"""
+        with self.lock:
+            self._discard_keys([key for key in self.entries if _key_path(key) == app_path])
+
+    def retain(self, app_paths):
+        """只保留给定路径的图标"""
+        keep = set(app_paths)
+        with self.lock:
+            self._discard_keys([key for key in self.entries if _key_path(key) not in keep])
+
+    def total_bytes(self):
+        with self.lock:
+            return sum(entry[3] for entry in self.entries.values())
+
+    def flush(self):
+        """压缩并原子替换图集和索引文件
+
+        写文件（含fsync）时不持有 lock，其他线程可以继续读取和添加图标；
+        写入期间添加或移除的图标保留在内存中，由下一次 flush() 保存。
+        """
+        with self.flush_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                self.dirty = False
+                kept, written, atlas_size = self._compact()
+                index = self._index_data(kept, atlas_size)
+
+            atlas_temp = self.atlas_file + ".tmp"
+            index_temp = self.index_file + ".tmp"
+            try:
+                self._write_file(atlas_temp, b"".join(written.values()))
+                self._write_file(index_temp, json.dumps(index, ensure_ascii=False).encode('utf-8'))
+            except OSError as e:
+                print(f"保存图标图集失败: {e}")
+                with self.lock:
+                    self.dirty = True
+                return
+
+            with self.lock:
+                # Windows下被映射的文件无法替换，先释放映射
+                self.close()
+                try:
+                    os.replace(atlas_temp, self.atlas_file)
+                except OSError as e:
+                    # 图集未替换，继续使用原来的文件和索引
+                    print(f"保存图标图集失败: {e}")
+                    self.dirty = True
+                    self._remap(None, None)
+                    return
+                try:
+                    os.replace(index_temp, self.index_file)
+                except OSError as e:
+                    # 磁盘上的索引与图集不匹配，下次启动时缓存作废；下次 flush() 重写
+                    print(f"保存图标索引失败: {e}")
+                    self.dirty = True
+                self._remap(kept, written)
+
+    def _compact(self):
+        """按最近使用排序并淘汰超出上限的旧图标，返回 (新索引, 写入的数据, 图集大小)"""
+        ordered = sorted(self.entries.items(), key=lambda item: item[1][6], reverse=True)
+        kept = {}
+        written = {}
+        offset = 0
+        for key, entry in ordered:
+            if offset + entry[3] > self.max_bytes:
+                continue
+            if key in self.pending:
+                data = self.pending[key]
+            else:
+                data = self._map[entry[2]:entry[2] + entry[3]]
+            written[key] = data
+            kept[key] = entry[:2] + [offset, len(data)] + entry[4:]
+            offset += len(data)
+        return kept, written, offset
+
+    def _remap(self, kept, written):
+        """映射新的图集文件，合并写入期间的变化：新添加的图标继续等待写入，被移除的图标不再恢复
+
+        kept 为 None 时重新映射原来的图集文件，索引不变。
+        """
+        try:
+            self._file = open(self.atlas_file, 'rb')
+            if os.fstat(self._file.fileno()).st_size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError as e:
+            print(f"打开图标图集失败: {e}")
+            self.close()
+
+        if kept is None:
+            if self._map is None:
+                self.entries = {key: entry for key, entry in self.entries.items() if key in self.pending}
+            return
+
+        entries = {}
+        for key, entry in self.entries.items():
+            data = self.pending.get(key)
+            if data is not None and data is not written.get(key):
+                # 写入期间重新添加的图标
+                entries[key] = entry
+            elif key in kept and self._map is not None:
+                entries[key] = entry[:2] + kept[key][2:4] + entry[4:]
+                self.pending.pop(key, None)
+            elif data is not None:
+                # 映射失败，保留待写入的数据
+                entries[key] = entry
+            else:
+                # 超出上限被淘汰的图标
+                self.pending.pop(key, None)
+        self.entries = entries
+
+    def _index_data(self, entries, atlas_size):
+        return {"version": ATLAS_VERSION, "tick": self.tick, "atlas_size": atlas_size, "entries": entries}
+
+    @staticmethod
+    def _write_file(path, data):
+        with open(path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
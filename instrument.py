@@ -0,0 +1,230 @@
+"""性能统计：热点函数计时、计数、耗时分布，可选cProfile，退出时写入JSON
+
+默认关闭，关闭时被计时的函数只多一次全局变量判断，可以一直保留在正式版本中。
+通过命令行参数或环境变量开启：
+    APPLAUNCHER_PERF=统计文件.json     开启计时统计
+    APPLAUNCHER_CPROFILE=1             同时用cProfile记录主线程
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+PERF_ENV = "APPLAUNCHER_PERF"
+CPROFILE_ENV = "APPLAUNCHER_CPROFILE"
+
+# 只开启cProfile时使用的统计文件
+DEFAULT_STATS_FILE = "applauncher_perf.json"
+
+# JSON中列出的cProfile函数数量（按累计耗时排序）
+PROFILE_TOP = 30
+
+# 耗时分布的桶数：第k个桶为 [2^(k-1), 2^k) 微秒，最后一个桶包含更长的耗时
+HISTOGRAM_BUCKETS = 32
+
+enabled = False
+
+_lock = threading.Lock()
+# 名称 -> [次数, 总耗时, 最短, 最长, [各桶次数]]
+_timers = {}
+# 名称 -> 次数
+_counters = {}
+_stats_file = None
+_profiler = None
+_started = None
+
+
+def configure(stats_file=None, cpu_profile=False):
+    """开启统计，程序退出时写入 stats_file（cpu_profile 时同时写入 .prof 文件）"""
+    global enabled, _stats_file, _profiler, _started
+    if not stats_file and not cpu_profile:
+        return
+    if enabled:
+        return
+
+    _stats_file = stats_file or DEFAULT_STATS_FILE
+    _started = time.time()
+    if cpu_profile:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    enabled = True
+    atexit.register(dump)
+
+
+def configure_from_env(environ=None):
+    """按环境变量开启统计"""
+    environ = os.environ if environ is None else environ
+    configure(environ.get(PERF_ENV), environ.get(CPROFILE_ENV, "") not in ("", "0"))
+
+
+def _bucket(seconds):
+    return min(HISTOGRAM_BUCKETS - 1, int(seconds * 1000000).bit_length())
+
+
+def record(name, seconds):
+    """记录一次耗时（秒）"""
+    if not enabled:
+        return
+    with _lock:
+        timer = _timers.get(name)
+        if timer is None:
+            timer = _timers[name] = [0, 0.0, seconds, seconds, [0] * HISTOGRAM_BUCKETS]
+        timer[0] += 1
+        timer[1] += seconds
+        if seconds < timer[2]:
+            timer[2] = seconds
+        if seconds > timer[3]:
+            timer[3] = seconds
+        timer[4][_bucket(seconds)] += 1
+
+
+def count(name, n=1):
+    """计数器加 n"""
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def timed(name):
+    """装饰器：记录函数耗时，抛出异常时同时计入 "名称.errors" """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                count(name + ".errors")
+                raise
+            finally:
+                record(name, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+class _Timer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            count(self.name + ".errors")
+        record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name):
+    """用于代码块的计时：with instrument.timer("名称"): ..."""
+    return _Timer(name) if enabled else _NULL_TIMER
+
+
+def _percentile(buckets, total, q):
+    """按桶估算分位数（取桶的上界，秒）"""
+    target = total * q
+    seen = 0
+    for k, n in enumerate(buckets):
+        seen += n
+        if n and seen >= target:
+            return (1 << k) / 1000000
+    return 0.0
+
+
+def snapshot():
+    """当前统计数据（可直接写入JSON），耗时单位为毫秒"""
+    with _lock:
+        timers = {name: [t[0], t[1], t[2], t[3], list(t[4])] for name, t in _timers.items()}
+        counters = dict(_counters)
+
+    result = {"started": _started, "timers": {}, "counters": counters}
+    for name, (n, total, low, high, buckets) in sorted(timers.items()):
+        result["timers"][name] = {
+            "count": n,
+            "total_ms": total * 1000,
+            "mean_ms": total / n * 1000,
+            "min_ms": low * 1000,
+            "max_ms": high * 1000,
+            "p50_ms": min(_percentile(buckets, n, 0.50), high) * 1000,
+            "p95_ms": min(_percentile(buckets, n, 0.95), high) * 1000,
+            "p99_ms": min(_percentile(buckets, n, 0.99), high) * 1000,
+            # "<上界微秒" -> 次数，只列出有数据的桶
+            "histogram_us": {f"<{1 << k}": c for k, c in enumerate(buckets) if c},
+        }
+    return result
+
+
+def _profile_top(profiler, limit=PROFILE_TOP):
+    """cProfile结果中累计耗时最多的函数"""
+    import pstats
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, callers) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({func})",
+            "calls": nc,
+            "tottime_ms": tt * 1000,
+            "cumtime_ms": ct * 1000,
+        })
+    rows.sort(key=lambda row: row["cumtime_ms"], reverse=True)
+    return rows[:limit]
+
+
+def dump(path=None):
+    """把统计写入JSON文件（开启cProfile时同时写入 .prof 文件供 pstats/snakeviz 查看）"""
+    path = path or _stats_file
+    if not enabled or not path:
+        return None
+
+    data = snapshot()
+    data["finished"] = time.time()
+    if _profiler is not None:
+        _profiler.disable()
+        profile_file = os.path.splitext(path)[0] + ".prof"
+        try:
+            _profiler.dump_stats(profile_file)
+            data["profile_file"] = profile_file
+        except OSError as e:
+            print(f"保存cProfile结果失败: {e}")
+        data["profile_top"] = _profile_top(_profiler)
+        _profiler.enable()
+
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"保存性能统计失败: {e}")
+        return None
+    return path
+
+
+def reset():
+    """清空统计（不改变开启状态）"""
+    with _lock:
+        _timers.clear()
+        _counters.clear()
@@ -0,0 +1,191 @@
+"""启动引擎：不经过shell，直接执行目标程序
+
+每个应用的命令行和环境变量只在第一次启动（或条目被修改）时构建一次，之后直接使用缓存。
+Linux/macOS：有环境变量覆盖且不设置工作目录时用 posix_spawn（环境变量已预先编码），
+其他情况用 subprocess 默认的 vfork+exec（沿用启动器的环境，不需要转换环境变量，比 posix_spawn 快）；
+Windows：直接调用 CreateProcess，快捷方式等不能直接执行的文件交给 ShellExecute，都不经过 cmd.exe。
+
+条目中可选的字段:
+    "args": ["-windowed", "{app_dir}/mods"]      追加的命令行参数（也可以是一个字符串，按shell规则拆分）
+    "env": {"DXVK_HUD": "fps", "OLD": null}      覆盖的环境变量，值为null时删除该变量
+参数和环境变量中的 {app_path} {app_dir} {env_path} {name} 会被替换，
+环境变量中的 ${变量}（Windows上也可以是 %变量%）取启动器自身的环境变量。
+CPU亲和性、优先级和I/O优先级（"affinity" "priority" "io_priority"）见 process_priority，创建进程时即生效。
+"""
+import os
+import sys
+import time
+
+import instrument
+import process_priority
+
+# Windows上可以直接用 CreateProcess 启动的扩展名，其他文件（.lnk、.url等）交给 ShellExecute
+DIRECT_EXTENSIONS = (".exe", ".com", ".bat", ".cmd")
+
+
+def _fill(text, values):
+    """替换 {app_path} 等占位符（不用 str.format，参数中的其他花括号原样保留）"""
+    if "{" not in text:
+        return text
+    for key, value in values.items():
+        text = text.replace("{" + key + "}", value)
+    return text
+
+
+def split_args(args):
+    """条目中的参数：列表原样使用，字符串按当前系统的shell规则拆分"""
+    if not args:
+        return []
+    if isinstance(args, str):
+        import shlex
+        return shlex.split(args, posix=sys.platform != "win32")
+    return [str(arg) for arg in args]
+
+
+class LaunchSpec:
+    """构建好的启动参数"""
+
+    __slots__ = ("key", "argv", "cwd", "env", "shell_open", "scheduling")
+
+    def __init__(self, key, argv, cwd, env, shell_open, scheduling=None):
+        self.key = key
+        self.argv = argv
+        self.cwd = cwd
+        # None 表示沿用启动器的环境，不复制；Linux/macOS上键和值已编码为bytes
+        self.env = env
+        # Windows：交给 ShellExecute 打开（不能设置环境变量）
+        self.shell_open = shell_open
+        # process_priority.Scheduling，没有调度设置时为None
+        self.scheduling = scheduling
+
+
+def spec_key(app_data):
+    """决定启动参数的字段，任何一个变化都需要重新构建"""
+    args = app_data.get("args")
+    env = app_data.get("env")
+    return (app_data["app_path"], app_data.get("env_path") or "",
+            args if isinstance(args, str) else tuple(args or ()),
+            tuple(sorted(env.items())) if env else (),
+            str(app_data.get("affinity")), app_data.get("priority"), app_data.get("io_priority"))
+
+
+def build_spec(name, app_data, key=None):
+    """由条目构建启动参数"""
+    app_path = os.path.abspath(app_data["app_path"])
+    env_path = app_data.get("env_path") or ""
+    values = {
+        "app_path": app_path,
+        "app_dir": os.path.dirname(app_path),
+        "env_path": env_path,
+        "name": name,
+    }
+
+    argv = [app_path] + [_fill(arg, values) for arg in split_args(app_data.get("args"))]
+
+    env = None
+    overrides = app_data.get("env")
+    if overrides:
+        env = dict(os.environ)
+        for var, value in overrides.items():
+            if value is None:
+                env.pop(var, None)
+            else:
+                env[var] = os.path.expandvars(_fill(str(value), values))
+        if sys.platform != "win32":
+            # subprocess 每次启动都会编码环境变量，预先编码后只需检查类型
+            env = {os.fsencode(var): os.fsencode(value) for var, value in env.items()}
+
+    shell_open = sys.platform == "win32" and not app_path.lower().endswith(DIRECT_EXTENSIONS)
+    scheduling = process_priority.parse(app_data)
+    if scheduling is not None and shell_open:
+        print(f"{name} 交给系统打开，不能应用调度设置（{scheduling.describe()}）")
+        scheduling = None
+    return LaunchSpec(key if key is not None else spec_key(app_data), argv, env_path or None, env, shell_open,
+                      scheduling)
+
+
+def spawn(spec):
+    """按启动参数创建进程，返回 Popen 对象（ShellExecute 打开时为None）"""
+    # 启动器启动时不需要 subprocess，第一次启动应用时才导入
+    import subprocess
+    if spec.shell_open:
+        os.startfile(spec.argv[0], "open", subprocess.list2cmdline(spec.argv[1:]), spec.cwd or "")
+        return None
+    if sys.platform == "win32" or spec.env is None or spec.cwd is not None:
+        kwargs = {"cwd": spec.cwd, "env": spec.env}
+    else:
+        # close_fds=False 时 subprocess 才会使用 posix_spawn；
+        # Python创建的文件描述符默认不被继承（PEP 446），不需要在子进程中逐个关闭
+        kwargs = {"executable": spec.argv[0], "env": spec.env, "close_fds": False}
+    if spec.scheduling is not None:
+        return process_priority.spawn(spec.scheduling, subprocess.Popen, spec.argv, **kwargs)
+    return subprocess.Popen(spec.argv, **kwargs)
+
+
+class LaunchEngine:
+    """缓存每个应用的启动参数，记录创建进程的耗时"""
+
+    def __init__(self):
+        # 名称 -> LaunchSpec
+        self.specs = {}
+
+        # 统计：启动次数、重新构建次数、创建进程的总耗时、最长耗时和最近一次耗时（秒）
+        self.launches = 0
+        self.builds = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.last = None
+
+    def spec(self, name, app_data):
+        """取缓存的启动参数，条目被修改过时重新构建"""
+        key = spec_key(app_data)
+        spec = self.specs.get(name)
+        if spec is None or spec.key != key:
+            spec = self.specs[name] = build_spec(name, app_data, key)
+            self.builds += 1
+        return spec
+
+    def launch(self, name, app_data):
+        """启动应用，返回 (Popen对象或None, 创建进程的耗时秒数)"""
+        spec = self.spec(name, app_data)
+        started = time.perf_counter()
+        process = spawn(spec)
+        elapsed = time.perf_counter() - started
+
+        self.launches += 1
+        self.total += elapsed
+        self.slowest = max(self.slowest, elapsed)
+        self.last = elapsed
+        instrument.record("launch.spawn", elapsed)
+        if spec.scheduling is not None and process is not None:
+            self.check_scheduling(name, spec.scheduling, process)
+        return process, elapsed
+
+    def check_scheduling(self, name, scheduling, process):
+        """读回子进程实际的调度设置，有没有生效的设置时输出提示，返回这些设置的说明"""
+        try:
+            problems = process_priority.verify(scheduling, process.pid)
+        except OSError:
+            # 进程已经退出
+            return []
+        if problems:
+            instrument.count("launch.scheduling_unapplied")
+            print(f"{name} 的调度设置没有完全生效: " + "；".join(problems))
+        return problems
+
+    def forget(self, name=None):
+        """丢弃缓存的启动参数（不指定名称时全部丢弃，例如启动器的环境变量改变后）"""
+        if name is None:
+            self.specs.clear()
+        else:
+            self.specs.pop(name, None)
+
+    def stats(self):
+        """创建进程耗时的统计（毫秒）"""
+        return {
+            "launches": self.launches,
+            "builds": self.builds,
+            "mean_ms": self.total / self.launches * 1000 if self.launches else 0.0,
+            "max_ms": self.slowest * 1000,
+            "last_ms": self.last * 1000 if self.last is not None else None,
+        }
@@ -0,0 +1,316 @@
+"""启动组：一次启动多个应用（例如游戏 + Mod管理器 + 手柄映射 + 悬浮窗）
+
+apps.json 中带 "group" 字段的条目是启动组，成员引用其他条目的名称:
+    "天际 全套": {"app_path": "", "env_path": "", "group": [
+        {"app": "Mod Organizer", "ready": {"process": 2}},
+        {"app": "DS4Windows"},
+        {"app": "天际", "after": ["Mod Organizer", "DS4Windows"], "ready": {"port": 27015}},
+        {"app": "悬浮窗", "after": ["天际"]}
+    ]}
+"after" 中的成员就绪后才启动该成员，没有依赖关系的成员同时启动。
+"ready" 为就绪条件（不写时启动后即就绪），等待超时（"timeout"，默认60秒）视为失败:
+    {"process": 秒数}                        进程启动后持续运行了这么久
+    {"port": 端口, "host": "127.0.0.1"}      端口可以连接
+    {"file": "路径"}                         文件已存在（可使用环境变量）
+成员已在运行时不再启动，只等待就绪条件。某个成员失败后，依赖它的成员不再启动，其他成员照常启动。
+条件在后台线程中检查，由主线程调用 poll() 取回结果并启动下一批成员，整个组的用时为最长依赖链的用时。
+"""
+import os
+import queue
+import socket
+import threading
+import time
+
+# 就绪条件的默认超时（秒）
+READY_TIMEOUT = 60
+
+# 检查就绪条件的间隔（秒）
+READY_CHECK_INTERVAL = 0.05
+
+# 成员状态
+WAITING = "waiting"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class GroupError(ValueError):
+    """启动组的定义有误"""
+
+
+class Member:
+    """启动组的一个成员"""
+
+    __slots__ = ("app", "after", "ready", "timeout", "state", "message", "process", "started", "finished")
+
+    def __init__(self, app, after=(), ready=None, timeout=READY_TIMEOUT):
+        self.app = app
+        self.after = tuple(after)
+        self.ready = ready or {}
+        self.timeout = timeout
+        self.state = WAITING
+        self.message = ""
+        self.process = None
+        # perf_counter 时间：开始启动、就绪或失败
+        self.started = None
+        self.finished = None
+
+
+def parse_group(name, members, catalog):
+    """检查启动组的定义，返回按依赖顺序排列的 [Member]；catalog 为 名称 -> 条目"""
+    if not isinstance(members, list) or not members:
+        raise GroupError(f"启动组 {name} 没有成员")
+
+    parsed = {}
+    for item in members:
+        if isinstance(item, str):
+            item = {"app": item}
+        if not isinstance(item, dict) or not item.get("app"):
+            raise GroupError(f"启动组 {name} 的成员格式错误: {item!r}")
+        app = item["app"]
+        if app in parsed:
+            raise GroupError(f"启动组 {name} 中 {app} 重复")
+        if app not in catalog:
+            raise GroupError(f"启动组 {name} 中的应用不存在: {app}")
+        if catalog[app].get("group"):
+            raise GroupError(f"启动组 {name} 不能包含启动组: {app}")
+        after = item.get("after", [])
+        if isinstance(after, str):
+            after = [after]
+        if not isinstance(after, list) or not all(isinstance(dependency, str) for dependency in after):
+            raise GroupError(f"启动组 {name} 中 {app} 的 after 格式错误: {after!r}")
+        ready = _parse_ready(name, app, item.get("ready") or {})
+        parsed[app] = Member(app, after, ready, ready.pop("timeout", READY_TIMEOUT))
+
+    for member in parsed.values():
+        for dependency in member.after:
+            if dependency not in parsed:
+                raise GroupError(f"启动组 {name} 中 {member.app} 依赖的 {dependency} 不是组成员")
+
+    # 拓扑排序，同时检查循环依赖
+    order = []
+    remaining = {app: set(member.after) for app, member in parsed.items()}
+    while remaining:
+        ready = [app for app, after in remaining.items() if not after]
+        if not ready:
+            raise GroupError(f"启动组 {name} 存在循环依赖: {', '.join(sorted(remaining))}")
+        for app in ready:
+            order.append(parsed[app])
+            del remaining[app]
+        for after in remaining.values():
+            after.difference_update(ready)
+    return order
+
+
+def _number(value):
+    """JSON中的数字（不接受 true/false 和字符串），不是数字时返回None"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+def _parse_ready(name, app, ready):
+    """检查就绪条件，返回转换好类型的副本；格式错误时抛出 GroupError"""
+    where = f"启动组 {name} 中 {app} 的就绪条件"
+    if not isinstance(ready, dict):
+        raise GroupError(f"{where}格式错误: {ready!r}")
+    unknown = set(ready) - {"process", "port", "host", "file", "timeout"}
+    if unknown:
+        raise GroupError(f"{where}中有未知的项: {', '.join(sorted(unknown))}")
+
+    parsed = {}
+    if "timeout" in ready:
+        timeout = _number(ready["timeout"])
+        if timeout is None or timeout <= 0:
+            raise GroupError(f"{where}中 timeout 应为正数（秒）: {ready['timeout']!r}")
+        parsed["timeout"] = float(timeout)
+    if "process" in ready:
+        seconds = _number(ready["process"])
+        if seconds is None or seconds < 0:
+            raise GroupError(f"{where}中 process 应为秒数: {ready['process']!r}")
+        parsed["process"] = float(seconds)
+    if "port" in ready:
+        port = ready["port"]
+        if isinstance(port, bool) or not isinstance(port, int) or not 0 < port < 65536:
+            raise GroupError(f"{where}中 port 应为 1 ~ 65535 的整数: {port!r}")
+        parsed["port"] = port
+        host = ready.get("host", "127.0.0.1")
+        if not isinstance(host, str) or not host:
+            raise GroupError(f"{where}中 host 格式错误: {host!r}")
+        parsed["host"] = host
+    elif "host" in ready:
+        raise GroupError(f"{where}中 host 需要与 port 一起使用")
+    if "file" in ready:
+        path = ready["file"]
+        if not isinstance(path, str) or not path:
+            raise GroupError(f"{where}中 file 应为路径: {path!r}")
+        parsed["file"] = path
+    return parsed
+
+
+def _port_open(host, port):
+    try:
+        with socket.create_connection((host, port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
+def wait_ready(member, cancelled):
+    """后台线程：等待成员满足就绪条件，返回 (是否就绪, 说明)"""
+    condition = member.ready
+    deadline = member.started + member.timeout
+    alive_for = condition.get("process")
+    port = condition.get("port")
+    path = condition.get("file")
+    if path:
+        path = os.path.expandvars(os.path.expanduser(path))
+
+    while not cancelled.is_set():
+        process = member.process
+        exited = process is not None and process.poll() is not None
+        now = time.perf_counter()
+
+        if alive_for is not None and exited:
+            return False, f"进程已退出 (退出码 {process.returncode})"
+        ok = True
+        if alive_for is not None and now - member.started < alive_for:
+            ok = False
+        if ok and port is not None and not _port_open(condition["host"], port):
+            ok = False
+        if ok and path and not os.path.exists(path):
+            ok = False
+        if ok:
+            return True, ""
+
+        if now > deadline:
+            return False, f"等待就绪超时 ({member.timeout:g}秒)"
+        time.sleep(READY_CHECK_INTERVAL)
+    return False, "已取消"
+
+
+class GroupRun:
+    """一次启动组的运行：主线程调用 start() 后定期调用 poll()，直到 done
+
+    spawn(应用名称) 启动一个成员并返回 Popen 对象（没有进程对象时返回None），失败时抛出异常；
+    running(应用名称) 返回成员已在运行的 Popen 对象，没有时返回None。
+    """
+
+    def __init__(self, name, members, spawn, running=None):
+        self.name = name
+        self.members = members
+        self.by_app = {member.app: member for member in members}
+        self.spawn = spawn
+        self.running = running
+        # 后台检查完成的 (成员, 是否就绪, 说明)
+        self.results = queue.Queue()
+        self.cancelled = threading.Event()
+        self.started = None
+        self.finished = None
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    def start(self):
+        """启动没有依赖的成员"""
+        self.started = time.perf_counter()
+        self._advance()
+
+    def _advance(self):
+        """启动依赖已全部就绪的成员，跳过依赖失败的成员"""
+        changed = True
+        while changed:
+            changed = False
+            for member in self.members:
+                if member.state != WAITING:
+                    continue
+                states = [self.by_app[app].state for app in member.after]
+                if any(state in (FAILED, SKIPPED) for state in states):
+                    member.state = SKIPPED
+                    member.message = "依赖的应用未能启动"
+                    changed = True
+                elif all(state == READY for state in states):
+                    self._start_member(member)
+                    changed = True
+
+        if self.finished is None and all(member.state in (READY, FAILED, SKIPPED) for member in self.members):
+            self.finished = time.perf_counter()
+
+    def _start_member(self, member):
+        member.state = STARTING
+        member.started = time.perf_counter()
+        try:
+            process = self.running(member.app) if self.running is not None else None
+            if process is None:
+                process = self.spawn(member.app)
+            else:
+                member.message = "已在运行"
+        except Exception as e:
+            self._finish(member, False, f"启动失败: {e}")
+            return
+        member.process = process
+
+        if not member.ready:
+            self._finish(member, True, member.message)
+            return
+        threading.Thread(target=self._check, args=(member,), name=f"ready-{member.app}", daemon=True).start()
+
+    def _check(self, member):
+        # 出错时也要交回结果，否则整个组会一直等待这个成员
+        try:
+            ok, message = wait_ready(member, self.cancelled)
+        except Exception as e:
+            ok, message = False, f"检查就绪条件时出错: {e}"
+        self.results.put((member, ok, message))
+
+    def _finish(self, member, ok, message):
+        member.state = READY if ok else FAILED
+        member.message = message
+        member.finished = time.perf_counter()
+
+    def poll(self):
+        """主线程：取回就绪检查结果并启动下一批成员，返回状态有变化的成员"""
+        changed = []
+        while True:
+            try:
+                member, ok, message = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self._finish(member, ok, message)
+            changed.append(member)
+        if changed:
+            self._advance()
+        return changed
+
+    def wait(self, interval=READY_CHECK_INTERVAL):
+        """不使用界面时：阻塞直到所有成员就绪、失败或被跳过"""
+        while not self.done:
+            time.sleep(interval)
+            self.poll()
+
+    def cancel(self):
+        """停止等待就绪条件（已启动的进程不受影响），尚未启动的成员不再启动"""
+        self.cancelled.set()
+        for member in self.members:
+            if member.state == WAITING:
+                member.state = SKIPPED
+                member.message = "已取消"
+
+    @property
+    def ok(self):
+        return all(member.state == READY for member in self.members)
+
+    def summary(self):
+        """每个成员的结果和整个组的用时"""
+        lines = []
+        for member in self.members:
+            elapsed = ""
+            if member.started is not None and member.finished is not None:
+                elapsed = f"  {(member.finished - self.started) * 1000:.0f} ms"
+            state = {READY: "就绪", FAILED: "失败", SKIPPED: "未启动", STARTING: "等待中", WAITING: "等待中"}[member.state]
+            lines.append(f"  {member.app}: {state}{elapsed}" + (f" ({member.message})" if member.message else ""))
+        if self.finished is not None:
+            lines.append(f"  用时 {(self.finished - self.started) * 1000:.0f} ms")
+        return "\n".join(lines)
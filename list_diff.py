@@ -0,0 +1,75 @@
+"""列表差异计算：求出从旧行序列变为新行序列所需的最少插入/删除/移动操作"""
+from bisect import bisect_left
+
+
+class RowDiff:
+    """一次列表更新的差异结果"""
+
+    def __init__(self, deletes, moves, inserts):
+        # deletes: [iid]
+        # moves: [(iid, index)]，移动前先从列表中摘除
+        # inserts: [(iid, index)]
+        # moves 和 inserts 按 index 升序合并后依次执行
+        self.deletes = deletes
+        self.moves = moves
+        self.inserts = inserts
+
+    @property
+    def touched(self):
+        """受影响的行数"""
+        return len(self.deletes) + len(self.moves) + len(self.inserts)
+
+    def placements(self):
+        """按执行顺序返回 (iid, index, is_move)"""
+        ops = [(index, iid, True) for iid, index in self.moves]
+        ops.extend((index, iid, False) for iid, index in self.inserts)
+        ops.sort(key=lambda op: op[0])
+        return [(iid, index, is_move) for index, iid, is_move in ops]
+
+
+def _longest_increasing(seq):
+    """返回最长递增子序列中元素在 seq 中的下标集合"""
+    tails = []
+    tails_idx = []
+    prev = [-1] * len(seq)
+    for i, value in enumerate(seq):
+        pos = bisect_left(tails, value)
+        if pos == len(tails):
+            tails.append(value)
+            tails_idx.append(i)
+        else:
+            tails[pos] = value
+            tails_idx[pos] = i
+        prev[i] = tails_idx[pos - 1] if pos else -1
+
+    result = set()
+    i = tails_idx[-1] if tails_idx else -1
+    while i != -1:
+        result.add(i)
+        i = prev[i]
+    return result
+
+
+def diff_rows(old, new):
+    """计算从 old 变为 new 的最少操作，old/new 为不含重复项的iid序列"""
+    new_index = {iid: i for i, iid in enumerate(new)}
+
+    deletes = [iid for iid in old if iid not in new_index]
+    kept = [iid for iid in old if iid in new_index]
+
+    # 相对顺序正确的最长子序列保持不动，其余保留项需要移动
+    stable_positions = _longest_increasing([new_index[iid] for iid in kept])
+    stable = {kept[i] for i in stable_positions}
+
+    old_set = set(kept)
+    moves = []
+    inserts = []
+    for i, iid in enumerate(new):
+        if iid in stable:
+            continue
+        if iid in old_set:
+            moves.append((iid, i))
+        else:
+            inserts.append((iid, i))
+
+    return RowDiff(deletes, moves, inserts)
@@ -0,0 +1,135 @@
+"""路径健康检查：在后台线程批量检查应用路径是否存在，结果带有效期缓存"""
+import os
+import queue
+import threading
+import time
+
+# 检查结果的有效期（秒）
+HEALTH_TTL = 300
+
+# 检查线程数；每个磁盘（或网络共享）的路径由一个任务依次检查，一个磁盘卡住只占用一个线程
+HEALTH_WORKERS = 4
+
+
+def volume_of(path):
+    """路径所在的磁盘：Windows盘符或UNC共享，其他系统取第一级目录"""
+    drive, rest = os.path.splitdrive(os.path.abspath(path))
+    if drive:
+        return drive.lower()
+    parts = rest.strip(os.sep).split(os.sep, 1)
+    return os.sep + parts[0] if parts and parts[0] else os.sep
+
+
+def check_path(path, kind="file"):
+    """检查单个路径：file 要求是文件，dir 要求是目录"""
+    try:
+        if kind == "dir":
+            return os.path.isdir(path)
+        return os.path.isfile(path)
+    except (OSError, ValueError):
+        return False
+
+
+class PathHealth:
+    """路径 -> (是否存在, 检查时间) 的缓存，检查在后台线程进行"""
+
+    def __init__(self, ttl=HEALTH_TTL, workers=HEALTH_WORKERS):
+        self.ttl = ttl
+        self.workers = workers
+
+        # (路径, 类型) -> (是否存在, 检查时间)
+        self.results = {}
+        # 正在检查的路径，避免重复提交
+        self.pending = set()
+        # 检查完成的 (路径, 类型, 是否存在)，由主线程取出
+        self.done = queue.Queue()
+
+        self.executor = None
+        self.lock = threading.Lock()
+
+        # 统计：完成的检查次数
+        self.checks = 0
+
+    def status(self, path, kind="file", now=None):
+        """缓存的检查结果：True/False，未检查或已过期时返回None（不访问文件系统）"""
+        result = self.results.get((path, kind))
+        if result is None:
+            return None
+        if now is None:
+            now = time.monotonic()
+        if now - result[1] > self.ttl:
+            return None
+        return result[0]
+
+    def known(self, path, kind="file"):
+        """不考虑有效期的最近一次检查结果，未检查过时返回None"""
+        result = self.results.get((path, kind))
+        return None if result is None else result[0]
+
+    def refresh(self, paths, force=False):
+        """在后台检查 [(路径, 类型)] 中未检查、已过期（force时为全部）的路径，返回提交的数量"""
+        now = time.monotonic()
+        groups = {}
+        with self.lock:
+            for key in paths:
+                if not key[0] or key in self.pending:
+                    continue
+                if not force and self.status(key[0], key[1], now) is not None:
+                    continue
+                self.pending.add(key)
+                groups.setdefault(volume_of(key[0]), []).append(key)
+
+        if not groups:
+            return 0
+        if self.executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="health")
+
+        for keys in groups.values():
+            self.executor.submit(self._check_batch, keys)
+        return sum(map(len, groups.values()))
+
+    def _check_batch(self, keys):
+        """后台线程：依次检查同一磁盘上的路径，每个结果立即交给主线程"""
+        for path, kind in keys:
+            self.done.put((path, kind, check_path(path, kind)))
+
+    def drain(self):
+        """主线程：保存已完成的检查结果，返回变为不存在或恢复存在的 [(路径, 类型, 是否存在)]
+
+        第一次检查且路径存在不算变化（界面默认按存在显示）
+        """
+        changed = []
+        now = time.monotonic()
+        while True:
+            try:
+                path, kind, ok = self.done.get_nowait()
+            except queue.Empty:
+                break
+            key = (path, kind)
+            with self.lock:
+                self.pending.discard(key)
+            old = self.results.get(key)
+            self.results[key] = (ok, now)
+            self.checks += 1
+            if (old is None and not ok) or (old is not None and old[0] != ok):
+                changed.append((path, kind, ok))
+        return changed
+
+    def busy(self):
+        """是否还有未完成的检查"""
+        return bool(self.pending) or not self.done.empty()
+
+    def mark(self, path, ok, kind="file"):
+        """直接记录检查结果（例如启动失败后得知路径不存在）"""
+        self.results[(path, kind)] = (ok, time.monotonic())
+
+    def forget(self, path, kind="file"):
+        """移除某个路径的结果"""
+        self.results.pop((path, kind), None)
+
+    def shutdown(self):
+        """停止后台检查"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
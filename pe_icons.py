@@ -0,0 +1,368 @@
+"""直接读取PE文件 .rsrc 节中的图标资源和导入表（不调用Windows API）"""
+import mmap
+import struct
+import zlib
+
+import icon_pixels
+
+RT_ICON = 3
+RT_GROUP_ICON = 14
+
+_IMPORT_DIRECTORY_INDEX = 1
+_RESOURCE_DIRECTORY_INDEX = 2
+_DELAY_IMPORT_DIRECTORY_INDEX = 13
+# 导入表中最多读取的DLL数（防止损坏的文件导致长时间循环）
+_MAX_IMPORTS = 1024
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class PEFormatError(ValueError):
+    """文件不是有效的PE文件或资源已损坏"""
+
+
+def _unpack(fmt, data, offset):
+    try:
+        return struct.unpack_from(fmt, data, offset)
+    except struct.error:
+        raise PEFormatError(f"读取越界: 偏移 {offset}")
+
+
+class _PEImage:
+    """内存映射的PE文件：节表和数据目录"""
+
+    def __init__(self, data):
+        self.data = data
+        self.sections = []
+        # 数据目录 [(RVA, 大小)]
+        self.directories = []
+        self._parse_headers()
+
+    def _unpack(self, fmt, offset):
+        return _unpack(fmt, self.data, offset)
+
+    def _parse_headers(self):
+        if self.data[:2] != b"MZ":
+            raise PEFormatError("缺少MZ头")
+        pe_offset, = self._unpack("<I", 0x3C)
+        if self.data[pe_offset:pe_offset + 4] != b"PE\0\0":
+            raise PEFormatError("缺少PE签名")
+
+        section_count, = self._unpack("<H", pe_offset + 6)
+        optional_size, = self._unpack("<H", pe_offset + 20)
+        optional_offset = pe_offset + 24
+
+        magic, = self._unpack("<H", optional_offset)
+        if magic == 0x10B:
+            directories_offset = optional_offset + 96
+        elif magic == 0x20B:
+            directories_offset = optional_offset + 112
+        else:
+            raise PEFormatError(f"未知的可选头类型: {magic:#x}")
+
+        directory_count, = self._unpack("<I", directories_offset - 4)
+        for i in range(min(directory_count, 16)):
+            self.directories.append(self._unpack("<II", directories_offset + 8 * i))
+
+        section_offset = optional_offset + optional_size
+        for i in range(section_count):
+            virtual_size, virtual_address, raw_size, raw_offset = self._unpack(
+                "<IIII", section_offset + 40 * i + 8)
+            self.sections.append((virtual_address, max(virtual_size, raw_size), raw_offset))
+
+    def directory(self, index):
+        """数据目录的RVA，不存在时为0"""
+        return self.directories[index][0] if index < len(self.directories) else 0
+
+    def rva_to_offset(self, rva):
+        for virtual_address, size, raw_offset in self.sections:
+            if virtual_address <= rva < virtual_address + size:
+                return raw_offset + rva - virtual_address
+        raise PEFormatError(f"RVA不在任何节中: {rva:#x}")
+
+    def _string(self, rva):
+        """以0结尾的ASCII字符串"""
+        start = self.rva_to_offset(rva)
+        end = self.data.find(b"\0", start, start + 512)
+        if end < 0:
+            raise PEFormatError("字符串没有结尾")
+        return bytes(self.data[start:end]).decode("ascii", "replace")
+
+    def imports(self):
+        """导入表和延迟导入表中的DLL名称（按出现顺序，不含重复）"""
+        names = []
+        rva = self.directory(_IMPORT_DIRECTORY_INDEX)
+        if rva:
+            # IMAGE_IMPORT_DESCRIPTOR: 20字节，Name 在偏移12，全0项结束
+            offset = self.rva_to_offset(rva)
+            for i in range(_MAX_IMPORTS):
+                name_rva, = self._unpack("<I", offset + 20 * i + 12)
+                if not name_rva:
+                    break
+                names.append(self._string(name_rva))
+
+        rva = self.directory(_DELAY_IMPORT_DIRECTORY_INDEX)
+        if rva:
+            # IMAGE_DELAYLOAD_DESCRIPTOR: 32字节，Attributes 和 DllNameRVA 在开头
+            offset = self.rva_to_offset(rva)
+            for i in range(_MAX_IMPORTS):
+                attributes, name_rva = self._unpack("<II", offset + 32 * i)
+                if not name_rva:
+                    break
+                # 旧格式保存的是虚拟地址而不是RVA，跳过
+                if attributes & 1:
+                    names.append(self._string(name_rva))
+        return list(dict.fromkeys(names))
+
+
+class _PEResources(_PEImage):
+    """内存映射的PE文件资源目录"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.rsrc_rva = self.directory(_RESOURCE_DIRECTORY_INDEX)
+        if not self.rsrc_rva:
+            raise PEFormatError("没有资源目录")
+        self.rsrc_offset = self.rva_to_offset(self.rsrc_rva)
+
+    def _directory_entries(self, offset):
+        """返回资源目录项 [(名称或ID, 是否子目录, 相对资源节的偏移)]"""
+        named, ids = self._unpack("<HH", self.rsrc_offset + offset + 12)
+        entries = []
+        for i in range(named + ids):
+            name, target = self._unpack("<II", self.rsrc_offset + offset + 16 + 8 * i)
+            if name & 0x80000000:
+                key = self._resource_name(name & 0x7FFFFFFF)
+            else:
+                key = name
+            entries.append((key, bool(target & 0x80000000), target & 0x7FFFFFFF))
+        return entries
+
+    def _resource_name(self, offset):
+        length, = self._unpack("<H", self.rsrc_offset + offset)
+        start = self.rsrc_offset + offset + 2
+        return bytes(self.data[start:start + length * 2]).decode("utf-16-le", "replace")
+
+    def _find(self, offset, key):
+        for entry_key, is_directory, target in self._directory_entries(offset):
+            if entry_key == key:
+                return is_directory, target
+        return None
+
+    def _first_data(self, is_directory, target, depth=0):
+        """沿目录取第一个数据项（通常是第一种语言），返回 (文件偏移, 大小)"""
+        while is_directory:
+            depth += 1
+            entries = self._directory_entries(target)
+            if not entries or depth > 3:
+                raise PEFormatError("资源目录为空")
+            _, is_directory, target = entries[0]
+
+        data_rva, size = self._unpack("<II", self.rsrc_offset + target)
+        offset = self.rva_to_offset(data_rva)
+        if offset + size > len(self.data):
+            raise PEFormatError("资源数据越界")
+        return offset, size
+
+    def resources(self, resource_type):
+        """返回某类资源 [(名称或ID, 文件偏移, 大小)]"""
+        found = self._find(0, resource_type)
+        if found is None or not found[0]:
+            return []
+        result = []
+        for key, is_directory, target in self._directory_entries(found[1]):
+            offset, size = self._first_data(is_directory, target)
+            result.append((key, offset, size))
+        return result
+
+
+def _group_entries(resources, group):
+    """解析 GRPICONDIR，返回 [(宽, 高, 位深, RT_ICON资源ID)]"""
+    data, offset, size = resources.data, group[1], group[2]
+    _, icon_type, count = _unpack("<HHH", data, offset)
+    if icon_type != 1 or 6 + count * 14 > size:
+        raise PEFormatError("图标组格式错误")
+
+    entries = []
+    for i in range(count):
+        width, height, _, _, _, bit_count, _, icon_id = _unpack(
+            "<BBBBHHIH", data, offset + 6 + i * 14)
+        entries.append((width or 256, height or 256, bit_count, icon_id))
+    return entries
+
+
+def _entry_rank(entry, size):
+    """尺寸的合适程度（越小越好）：等于目标尺寸，其次比目标大的最小尺寸，再次最大尺寸；同尺寸取最高位深"""
+    width, _, bit_count, _ = entry
+    if width == size:
+        rank = (0, 0)
+    elif width > size:
+        rank = (1, width)
+    else:
+        rank = (2, -width)
+    return rank + (-bit_count,)
+
+
+def _open(path):
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _icon_images(path):
+    """读取第一个图标组，返回 [(宽, 高, 位深, 图像数据memoryview)] 和映射对象"""
+    mapped = _open(path)
+    try:
+        resources = _PEResources(mapped)
+        groups = resources.resources(RT_GROUP_ICON)
+        if not groups:
+            raise PEFormatError("没有图标资源")
+        icons = {key: (offset, size) for key, offset, size in resources.resources(RT_ICON)}
+
+        entries = [(width, height, bit_count) + icons[icon_id]
+                   for width, height, bit_count, icon_id in _group_entries(resources, groups[0])
+                   if icon_id in icons]
+        if not entries:
+            raise PEFormatError("图标组引用的图标不存在")
+    except Exception:
+        mapped.close()
+        raise
+
+    # 图像数据直接引用映射的内存，不复制
+    view = memoryview(mapped)
+    images = [(width, height, bit_count, view[offset:offset + size])
+              for width, height, bit_count, offset, size in entries]
+    return images, view, mapped
+
+
+def _close(view, mapped, images):
+    for image in images:
+        image[3].release()
+    view.release()
+    mapped.close()
+
+
+def imported_dlls(path):
+    """exe/dll 导入的DLL名称，不是PE文件时抛出 PEFormatError"""
+    mapped = _open(path)
+    try:
+        return _PEImage(mapped).imports()
+    finally:
+        mapped.close()
+
+
+def _dib_to_bgra(data):
+    """把ICO中的DIB图像（含AND掩码）转换为从上到下的BGRA数据"""
+    header_size, dib_width, dib_height, _, bit_count, compression = _unpack("<IiiHHI", data, 0)
+    colors_used, = _unpack("<I", data, 32)
+    if compression != 0:
+        raise PEFormatError("不支持压缩的图标位图")
+    width = dib_width
+    height = abs(dib_height) // 2
+
+    palette_offset = header_size
+    palette_size = 0
+    if bit_count <= 8:
+        palette_size = (colors_used or 1 << bit_count) * 4
+    xor_offset = palette_offset + palette_size
+    xor_stride = (width * bit_count + 31) // 32 * 4
+    and_offset = xor_offset + xor_stride * height
+    and_stride = (width + 31) // 32 * 4
+    if and_offset > len(data):
+        raise PEFormatError("图标位图数据不完整")
+
+    # 位图按从下到上存储
+    rows = [data[xor_offset + xor_stride * (height - 1 - y):][:xor_stride] for y in range(height)]
+    has_mask = and_offset + and_stride * height <= len(data)
+
+    if bit_count == 32:
+        bgra = bytearray(b"".join(bytes(row[:width * 4]) for row in rows))
+        if any(bgra[3::4]):
+            return bytes(bgra), width, height
+    elif bit_count == 24:
+        bgra = bytearray(width * height * 4)
+        for y, row in enumerate(rows):
+            pixels = bytes(row[:width * 3])
+            start = y * width * 4
+            line = bgra[start:start + width * 4]
+            line[0::4] = pixels[0::3]
+            line[1::4] = pixels[1::3]
+            line[2::4] = pixels[2::3]
+            line[3::4] = b"\xff" * width
+            bgra[start:start + width * 4] = line
+    elif bit_count in (1, 4, 8):
+        palette = bytes(data[palette_offset:palette_offset + palette_size])
+        colors = [palette[i:i + 3] + b"\xff" for i in range(0, len(palette), 4)]
+        per_byte = 8 // bit_count
+        mask = (1 << bit_count) - 1
+        bgra = bytearray()
+        for row in rows:
+            row = bytes(row)
+            for x in range(width):
+                byte = row[x // per_byte]
+                shift = (per_byte - 1 - x % per_byte) * bit_count
+                index = (byte >> shift) & mask
+                bgra += colors[index] if index < len(colors) else b"\0\0\0\xff"
+    else:
+        raise PEFormatError(f"不支持的位深: {bit_count}")
+
+    # 没有alpha通道时用AND掩码决定透明像素
+    if has_mask:
+        for y in range(height):
+            mask_row = bytes(data[and_offset + and_stride * (height - 1 - y):][:and_stride])
+            for x in range(width):
+                if mask_row[x >> 3] & (0x80 >> (x & 7)):
+                    bgra[(y * width + x) * 4 + 3] = 0
+                elif bit_count == 32:
+                    bgra[(y * width + x) * 4 + 3] = 255
+    elif bit_count == 32:
+        bgra[3::4] = b"\xff" * (width * height)
+    return bytes(bgra), width, height
+
+
+def _decode_image(data):
+    """把单个图标图像（PNG或DIB）解码为 (bgra_data, width, height)"""
+    if bytes(data[:8]) == _PNG_SIGNATURE:
+        return icon_pixels.png_to_bgra(data)
+    return _dib_to_bgra(data)
+
+
+def _decode_best(images, size):
+    """按合适程度依次尝试解码，跳过无法解码的图像"""
+    error = None
+    for image in sorted(images, key=lambda image: _entry_rank(image, size)):
+        try:
+            return _decode_image(image[3])
+        except (ValueError, struct.error, zlib.error) as e:
+            # 只保留说明：异常的调用栈引用着图像数据的切片，映射内存的文件需要在关闭前释放它们
+            error = str(e)
+    raise PEFormatError(f"图标无法解码: {error}")
+
+
+def extract_icon_bgra(path, size=32):
+    """提取最接近 size 的图标，返回 (bgra_data, width, height)，尺寸不一定等于 size"""
+    images, view, mapped = _icon_images(path)
+    error = None
+    try:
+        return _decode_best(images, size)
+    except Exception as e:
+        # 同 _decode_best：先让异常（和它引用的切片）释放，再关闭映射，否则 close() 抛出 BufferError
+        error = str(e) if isinstance(e, PEFormatError) else f"图标无法解码: {e!r}"
+    finally:
+        _close(view, mapped, images)
+    raise PEFormatError(error)
+
+
+def ico_bgra(ico_data, size=32):
+    """从ICO文件数据中取最接近 size 的图标，返回值同 extract_icon_bgra"""
+    _, icon_type, count = _unpack("<HHH", ico_data, 0)
+    if icon_type != 1 or not count:
+        raise PEFormatError("不是ICO数据")
+
+    view = memoryview(ico_data)
+    images = []
+    for i in range(count):
+        width, height, _, _, _, bit_count, length, offset = _unpack(
+            "<BBBBHHII", ico_data, 6 + 16 * i)
+        if offset + length > len(ico_data):
+            raise PEFormatError("ICO数据不完整")
+        images.append((width or 256, height or 256, bit_count, view[offset:offset + length]))
+    return _decode_best(images, size)
@@ -0,0 +1,238 @@
+"""启动前预读：选中应用后在后台把程序文件和它导入的本地DLL读入系统缓存，点击启动时少等磁盘
+
+只预读应用所在文件夹和环境路径中的DLL（系统DLL通常已在缓存中），同目录DLL导入的DLL也会一并预读。
+Linux 上用 posix_fadvise(WILLNEED) 让内核异步预读；其他系统在低I/O优先级的后台线程中分块读取。
+每次预读的总字节数有上限，选中其他应用时正在进行的预读会停止。
+"""
+import os
+import sys
+import threading
+import time
+
+import instrument
+import pe_icons
+import process_priority
+
+# 每次预读的字节数上限
+PREFETCH_MAX_BYTES = 512 * 1024 * 1024
+
+# 最多预读的文件数
+PREFETCH_MAX_FILES = 64
+
+# 分块读取时每块的大小
+PREFETCH_CHUNK = 1024 * 1024
+
+# 已预读的文件在这段时间内不再预读（秒）
+PREFETCH_TTL = 600
+
+# 这些扩展名的文件按PE文件解析导入表
+PE_EXTENSIONS = (".exe", ".dll")
+
+
+def _dir_listing(directory, cache):
+    """文件夹中 小写文件名 -> 实际路径（Windows文件名不区分大小写，在其他系统上也按不区分处理）"""
+    listing = cache.get(directory)
+    if listing is None:
+        listing = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    listing[entry.name.lower()] = entry.path
+        except OSError:
+            pass
+        cache[directory] = listing
+    return listing
+
+
+def plan(app_path, env_path="", max_files=PREFETCH_MAX_FILES):
+    """需要预读的文件：程序本身 + 在应用文件夹或环境路径中找到的导入DLL（逐层展开），按发现顺序"""
+    directories = [os.path.dirname(os.path.abspath(app_path))]
+    if env_path and os.path.abspath(env_path) not in directories:
+        directories.append(os.path.abspath(env_path))
+
+    listings = {}
+    files = [app_path]
+    seen = {os.path.normcase(os.path.abspath(app_path))}
+    index = 0
+    while index < len(files) and len(files) < max_files:
+        path = files[index]
+        index += 1
+        if not path.lower().endswith(PE_EXTENSIONS):
+            continue
+        try:
+            names = pe_icons.imported_dlls(path)
+        except (OSError, ValueError):
+            continue
+        for name in names:
+            for directory in directories:
+                found = _dir_listing(directory, listings).get(name.lower())
+                if found is None:
+                    continue
+                key = os.path.normcase(found)
+                if key not in seen:
+                    seen.add(key)
+                    files.append(found)
+                break
+    return files[:max_files]
+
+
+def _lower_io_priority():
+    """降低当前线程的I/O优先级（尽力而为，失败时忽略）"""
+    try:
+        if sys.platform == "win32":
+            import win32_api
+            win32_api.set_background_mode(True)
+        elif sys.platform.startswith("linux"):
+            process_priority.set_thread_io_priority("idle")
+    except (OSError, AttributeError, ImportError):
+        pass
+
+
+def prefetch_file(path, limit, cancelled, buffer=None):
+    """把文件的前 limit 字节读入系统缓存，返回预读的字节数"""
+    with open(path, 'rb', buffering=0) as f:
+        size = min(os.fstat(f.fileno()).st_size, limit)
+        if size <= 0:
+            return 0
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, size, os.POSIX_FADV_WILLNEED)
+            return size
+
+        # 没有 fadvise：分块读取，每块之间检查是否已取消
+        buffer = buffer or bytearray(PREFETCH_CHUNK)
+        view = memoryview(buffer)
+        done = 0
+        while done < size and not cancelled():
+            n = f.readinto(view[:min(PREFETCH_CHUNK, size - done)])
+            if not n:
+                break
+            done += n
+        view.release()
+        return done
+
+
+class Prefetcher:
+    """后台预读线程：同一时间只预读一个应用，新的请求取代尚未完成的请求"""
+
+    def __init__(self, max_bytes=PREFETCH_MAX_BYTES, ttl=PREFETCH_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        # 等待预读的 [(应用路径, 环境路径)]，只保留最新的一次请求
+        self.targets = None
+        # 每个请求的编号，编号变化时正在进行的预读停止
+        self.generation = 0
+        self.thread = None
+        self.closed = False
+        # (路径, 修改时间, 大小) -> 预读时间
+        self.done = {}
+
+        # 统计：预读的应用数、文件数、字节数和总耗时（秒）
+        self.requests = 0
+        self.files = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+
+    def request(self, app_path, env_path=""):
+        """预读应用（取代尚未完成的预读）"""
+        self.request_many([(app_path, env_path)])
+
+    def request_many(self, targets):
+        """依次预读多个应用（例如启动组的成员），共用一次的字节数上限"""
+        targets = [(app_path, env_path) for app_path, env_path in targets if app_path]
+        if not targets:
+            return
+        with self.lock:
+            if self.closed:
+                return
+            self.generation += 1
+            self.targets = targets
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+                self.thread.start()
+            self.wakeup.notify()
+
+    def cancel(self):
+        """停止正在进行的预读"""
+        with self.lock:
+            self.generation += 1
+            self.targets = None
+
+    def shutdown(self):
+        with self.lock:
+            self.closed = True
+            self.generation += 1
+            self.targets = None
+            self.wakeup.notify()
+
+    def _run(self):
+        _lower_io_priority()
+        buffer = bytearray(PREFETCH_CHUNK)
+        while True:
+            with self.lock:
+                while self.targets is None and not self.closed:
+                    self.wakeup.wait()
+                if self.closed:
+                    return
+                targets = self.targets
+                self.targets = None
+                generation = self.generation
+            try:
+                self._prefetch(targets, generation, buffer)
+            except Exception as e:
+                # 预读只是优化，出错时不影响启动
+                instrument.count("prefetch.errors")
+                print(f"预读 {targets[0][0]} 时出错: {e}")
+
+    def _prefetch(self, targets, generation, buffer):
+        def cancelled():
+            return self.generation != generation
+
+        started = time.perf_counter()
+        now = time.monotonic()
+        if len(self.done) > PREFETCH_MAX_FILES * 16:
+            self.done = {key: when for key, when in self.done.items() if now - when < self.ttl}
+        remaining = self.max_bytes
+        files = 0
+        total = 0
+        for app_path, env_path in targets:
+            # 已取消或已达到上限时不再解析后面成员的导入表
+            if cancelled() or remaining <= 0:
+                break
+            for path in plan(app_path, env_path):
+                if cancelled() or remaining <= 0:
+                    break
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                key = (path, st.st_mtime, st.st_size)
+                if now - self.done.get(key, -self.ttl - 1) < self.ttl:
+                    continue
+                try:
+                    n = prefetch_file(path, remaining, cancelled, buffer)
+                except OSError:
+                    continue
+                if n >= min(st.st_size, remaining):
+                    self.done[key] = now
+                remaining -= n
+                total += n
+                files += 1
+
+        elapsed = time.perf_counter() - started
+        self.requests += 1
+        self.files += files
+        self.bytes += total
+        self.elapsed += elapsed
+        instrument.record("prefetch", elapsed)
+        instrument.count("prefetch.bytes", total)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "files": self.files,
+            "bytes": self.bytes,
+            "elapsed_ms": self.elapsed * 1000,
+        }
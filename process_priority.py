@@ -0,0 +1,362 @@
+"""启动应用的调度设置：CPU亲和性、优先级和I/O优先级
+
+条目中可选的字段:
+    "affinity": [0, 1, 2, 3]   或 "0-3,8"      只在这些CPU上运行（例如把游戏固定在性能核上）
+    "priority": "below_normal"                idle / below_normal / normal / above_normal / high，
+                                              Linux/macOS上也可以直接写 nice 值（-20 ~ 19）
+    "io_priority": "low"                      idle / low / normal / high
+设置在创建进程时就已生效，进程的第一条指令就运行在指定的CPU和优先级上：
+    Linux：在临时线程中设置好该线程的亲和性、nice 值和I/O优先级后由它创建进程（这些属性按线程保存并由子进程继承），
+           启动器自身的线程不受影响
+    Windows：优先级类由 CreateProcess 的标志设置；进程以挂起状态创建，设置亲和性和I/O优先级后才开始运行
+    macOS：不支持亲和性和I/O优先级，优先级在创建进程后立即设置
+提高优先级（above_normal/high、负的 nice 值、io_priority 为 high）需要管理员权限（Linux上为 CAP_SYS_NICE），
+没有权限时应用照常启动，verify() 会报告没有生效的设置。交给系统打开的快捷方式不能应用这些设置。
+"""
+import os
+import sys
+import threading
+
+# 优先级名称 -> nice 值
+PRIORITY_NICE = {"idle": 19, "below_normal": 10, "normal": 0, "above_normal": -5, "high": -10}
+
+# 优先级名称 -> Windows 优先级类
+PRIORITY_CLASS = {
+    "idle": 0x00000040,
+    "below_normal": 0x00004000,
+    "normal": 0x00000020,
+    "above_normal": 0x00008000,
+    "high": 0x00000080,
+}
+REALTIME_PRIORITY_CLASS = 0x00000100
+
+# I/O优先级名称 -> Linux (调度类, 级别)：2 为 best-effort（0最高，7最低），3 为 idle
+IO_PRIORITY_LINUX = {"idle": (3, 0), "low": (2, 7), "normal": (2, 4), "high": (2, 0)}
+
+# I/O优先级名称 -> Windows IO_PRIORITY_HINT
+IO_PRIORITY_WINDOWS = {"idle": 0, "low": 1, "normal": 2, "high": 3}
+
+# Linux ioprio_set / ioprio_get 的系统调用号
+_IOPRIO_SYSCALLS = {
+    "x86_64": (251, 252),
+    "aarch64": (30, 31),
+    "i686": (289, 290),
+    "i386": (289, 290),
+}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_SHIFT = 13
+
+
+class SchedulingError(ValueError):
+    """条目中的调度设置有误"""
+
+
+class Scheduling:
+    """一个应用的调度设置，没有设置的项为None"""
+
+    __slots__ = ("affinity", "priority", "nice", "io_priority")
+
+    def __init__(self, affinity=None, priority=None, nice=None, io_priority=None):
+        # 排好序的CPU编号
+        self.affinity = affinity
+        # 优先级名称，或直接指定的 nice 值（两者只有一个）
+        self.priority = priority
+        self.nice = nice
+        self.io_priority = io_priority
+
+    def target_nice(self):
+        if self.nice is not None:
+            return self.nice
+        if self.priority is not None:
+            return PRIORITY_NICE[self.priority]
+        return None
+
+    def target_class(self):
+        """Windows 优先级类（nice 值按范围对应到最接近的类）"""
+        if self.priority is not None:
+            return PRIORITY_CLASS[self.priority]
+        if self.nice is None:
+            return None
+        if self.nice >= 15:
+            return PRIORITY_CLASS["idle"]
+        if self.nice >= 5:
+            return PRIORITY_CLASS["below_normal"]
+        if self.nice > -5:
+            return PRIORITY_CLASS["normal"]
+        if self.nice > -15:
+            return PRIORITY_CLASS["above_normal"]
+        return PRIORITY_CLASS["high"]
+
+    def describe(self):
+        parts = []
+        if self.affinity is not None:
+            parts.append(f"CPU {format_cpus(self.affinity)}")
+        if self.priority is not None:
+            parts.append(f"优先级 {self.priority}")
+        elif self.nice is not None:
+            parts.append(f"nice {self.nice}")
+        if self.io_priority is not None:
+            parts.append(f"I/O {self.io_priority}")
+        return "，".join(parts)
+
+
+def available_cpus():
+    """启动器可以使用的CPU编号"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cpus(value):
+    """[0, 1, 2] 或 "0-3,8" -> 排好序的CPU编号"""
+    cpus = set()
+    if isinstance(value, str):
+        for part in value.replace(" ", "").split(","):
+            if not part:
+                continue
+            low, sep, high = part.partition("-")
+            try:
+                low = int(low)
+                high = int(high) if sep else low
+            except ValueError:
+                raise SchedulingError(f"CPU范围格式错误: {part}") from None
+            if low < 0 or high < low:
+                raise SchedulingError(f"CPU范围格式错误: {part}")
+            cpus.update(range(low, high + 1))
+    elif isinstance(value, (list, tuple)):
+        for cpu in value:
+            if not isinstance(cpu, int) or isinstance(cpu, bool) or cpu < 0:
+                raise SchedulingError(f"CPU编号格式错误: {cpu!r}")
+            cpus.add(cpu)
+    else:
+        raise SchedulingError(f"affinity 格式错误: {value!r}")
+    if not cpus:
+        raise SchedulingError("affinity 中没有CPU")
+    return sorted(cpus)
+
+
+def format_cpus(cpus):
+    """[0, 1, 2, 3, 8] -> "0-3,8" """
+    ranges = []
+    for cpu in cpus:
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(low) if low == high else f"{low}-{high}" for low, high in ranges)
+
+
+def parse(app_data):
+    """条目中的调度设置，没有设置时返回None；格式错误时抛出 SchedulingError"""
+    affinity = app_data.get("affinity")
+    priority = app_data.get("priority")
+    io_priority = app_data.get("io_priority")
+    if affinity is None and priority is None and io_priority is None:
+        return None
+
+    settings = Scheduling()
+    if affinity is not None:
+        cpus = parse_cpus(affinity)
+        missing = sorted(set(cpus) - set(available_cpus()))
+        if missing:
+            raise SchedulingError(f"CPU不存在或不可用: {format_cpus(missing)}（可用: {format_cpus(available_cpus())}）")
+        if sys.platform == "win32" or hasattr(os, "sched_setaffinity"):
+            settings.affinity = cpus
+        else:
+            print("当前系统不支持设置CPU亲和性，忽略 affinity")
+
+    if isinstance(priority, bool):
+        raise SchedulingError(f"priority 格式错误: {priority!r}")
+    if isinstance(priority, int):
+        if not -20 <= priority <= 19:
+            raise SchedulingError(f"nice 值应在 -20 ~ 19 之间: {priority}")
+        settings.nice = priority
+    elif priority is not None:
+        if priority not in PRIORITY_NICE:
+            raise SchedulingError(f"未知的优先级: {priority}（可选: {', '.join(PRIORITY_NICE)}）")
+        settings.priority = priority
+
+    if io_priority is not None:
+        if io_priority not in IO_PRIORITY_LINUX:
+            raise SchedulingError(f"未知的I/O优先级: {io_priority}（可选: {', '.join(IO_PRIORITY_LINUX)}）")
+        if sys.platform == "win32" or _ioprio_syscalls() is not None:
+            settings.io_priority = io_priority
+        else:
+            print("当前系统不支持设置I/O优先级，忽略 io_priority")
+    return settings
+
+
+def _ioprio_syscalls():
+    """(ioprio_set, ioprio_get) 的系统调用号，不支持时返回None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    return _IOPRIO_SYSCALLS.get(os.uname().machine)
+
+
+def _ioprio(index, *args):
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+    result = libc.syscall(_ioprio_syscalls()[index], *args)
+    if result < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return result
+
+
+def set_thread_io_priority(io_priority):
+    """Linux：设置当前线程的I/O优先级（idle / low / normal / high），失败时抛出 OSError"""
+    if _ioprio_syscalls() is None:
+        raise OSError("当前系统不支持设置I/O优先级")
+    io_class, level = IO_PRIORITY_LINUX[io_priority]
+    # 0 表示当前线程
+    _ioprio(0, _IOPRIO_WHO_PROCESS, 0, (io_class << _IOPRIO_CLASS_SHIFT) | level)
+
+
+def _apply_to_thread(settings):
+    """Linux：把调度设置应用到当前线程（nice 值和I/O优先级按线程保存，0 表示当前线程），返回失败的说明"""
+    failed = []
+    if settings.affinity is not None:
+        try:
+            os.sched_setaffinity(0, settings.affinity)
+        except OSError as e:
+            failed.append(f"CPU亲和性: {e}")
+    nice = settings.target_nice()
+    if nice is not None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, nice)
+        except OSError as e:
+            failed.append(f"优先级: {e}")
+    if settings.io_priority is not None:
+        try:
+            set_thread_io_priority(settings.io_priority)
+        except OSError as e:
+            failed.append(f"I/O优先级: {e}")
+    return failed
+
+
+def spawn(settings, popen, argv, **kwargs):
+    """按调度设置创建进程：popen(argv, **kwargs) 为 subprocess.Popen，返回 Popen 对象"""
+    if sys.platform == "win32":
+        return _spawn_windows(settings, popen, argv, kwargs)
+    if not sys.platform.startswith("linux"):
+        process = popen(argv, **kwargs)
+        nice = settings.target_nice()
+        if nice is not None:
+            try:
+                os.setpriority(os.PRIO_PROCESS, process.pid, nice)
+            except OSError as e:
+                print(f"设置优先级失败: {e}")
+        return process
+
+    # 在临时线程中设置好调度属性后创建进程，子进程继承该线程的属性
+    result = {}
+
+    def run():
+        try:
+            failed = _apply_to_thread(settings)
+            if failed:
+                print("调度设置未能应用: " + "；".join(failed))
+            result["process"] = popen(argv, **kwargs)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run, name="spawn-sched")
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["process"]
+
+
+def _spawn_windows(settings, popen, argv, kwargs):
+    import win32_api
+    flags = kwargs.pop("creationflags", 0)
+    priority_class = settings.target_class()
+    if priority_class is not None:
+        flags |= priority_class
+    if settings.affinity is None and settings.io_priority is None:
+        return popen(argv, creationflags=flags, **kwargs)
+
+    # 挂起创建，设置完成后再开始运行
+    process = popen(argv, creationflags=flags | win32_api.CREATE_SUSPENDED, **kwargs)
+    access = win32_api.PROCESS_SET_INFORMATION | win32_api.PROCESS_SUSPEND_RESUME
+    try:
+        with win32_api.open_process(process.pid, access) as handle:
+            if settings.affinity is not None:
+                try:
+                    win32_api.set_process_affinity(handle, sum(1 << cpu for cpu in settings.affinity))
+                except OSError as e:
+                    print(f"设置CPU亲和性失败: {e}")
+            if settings.io_priority is not None:
+                try:
+                    win32_api.set_io_priority(handle, IO_PRIORITY_WINDOWS[settings.io_priority])
+                except OSError as e:
+                    print(f"设置I/O优先级失败: {e}")
+            win32_api.resume_process(handle)
+    except BaseException:
+        # 无法恢复运行的挂起进程不能留下
+        process.kill()
+        process.wait()
+        raise
+    return process
+
+
+def _name_for(value, table):
+    for name, item in table.items():
+        if item == value:
+            return name
+    return None
+
+
+def query(pid):
+    """读取进程实际的调度设置: {"affinity": [CPU], "priority": 名称, "nice": 值, "io_priority": 名称}
+
+    读不到的项为None；进程不存在时抛出 ProcessLookupError
+    """
+    result = {"affinity": None, "priority": None, "nice": None, "io_priority": None}
+    if sys.platform == "win32":
+        import win32_api
+        priority_class, mask, io_hint = win32_api.query_process(pid)
+        result["affinity"] = [cpu for cpu in range(mask.bit_length()) if mask >> cpu & 1]
+        result["priority"] = ("realtime" if priority_class == REALTIME_PRIORITY_CLASS
+                              else _name_for(priority_class, PRIORITY_CLASS))
+        if io_hint is not None:
+            result["io_priority"] = _name_for(io_hint, IO_PRIORITY_WINDOWS)
+        return result
+
+    if hasattr(os, "sched_getaffinity"):
+        result["affinity"] = sorted(os.sched_getaffinity(pid))
+    result["nice"] = os.getpriority(os.PRIO_PROCESS, pid)
+    result["priority"] = _name_for(result["nice"], PRIORITY_NICE)
+    if _ioprio_syscalls() is not None:
+        try:
+            value = _ioprio(1, _IOPRIO_WHO_PROCESS, pid)
+        except OSError:
+            value = None
+        if value is not None:
+            io_class, level = value >> _IOPRIO_CLASS_SHIFT, value & ((1 << _IOPRIO_CLASS_SHIFT) - 1)
+            # 调度类为 0（未设置）时I/O优先级随 nice 值变化，视为 normal
+            result["io_priority"] = "normal" if io_class == 0 else _name_for((io_class, level), IO_PRIORITY_LINUX)
+            if result["io_priority"] is None:
+                result["io_priority"] = f"{io_class}/{level}"
+    return result
+
+
+def verify(settings, pid):
+    """比较进程实际的调度设置与条目中的设置，返回没有生效的设置说明（全部生效时为空列表）"""
+    actual = query(pid)
+    problems = []
+    if settings.affinity is not None and actual["affinity"] is not None and actual["affinity"] != settings.affinity:
+        problems.append(f"CPU亲和性为 {format_cpus(actual['affinity'])}，应为 {format_cpus(settings.affinity)}")
+    if sys.platform == "win32":
+        expected = settings.target_class()
+        if expected is not None and PRIORITY_CLASS.get(actual["priority"]) != expected:
+            problems.append(f"优先级为 {actual['priority']}，应为 {_name_for(expected, PRIORITY_CLASS)}")
+    else:
+        expected = settings.target_nice()
+        if expected is not None and actual["nice"] != expected:
+            problems.append(f"nice 值为 {actual['nice']}，应为 {expected}")
+    if (settings.io_priority is not None and actual["io_priority"] is not None
+            and actual["io_priority"] != settings.io_priority):
+        problems.append(f"I/O优先级为 {actual['io_priority']}，应为 {settings.io_priority}")
+    return problems
@@ -0,0 +1,267 @@
+"""常驻模式：第一个实例在本地监听（Linux/macOS为Unix套接字，Windows为命名管道），
+之后的启动只把命令转发给它，不再加载Tk、应用数据和图标
+
+每个连接发送一条JSON命令、收到一条JSON回复，均以换行结尾:
+    {"cmd": "launch", "name": "应用名称"}  启动应用
+    {"cmd": "show"}                       显示窗口
+    {"cmd": "reload"}                     应用数据已被其他进程修改，重新加载
+    {"cmd": "status"}                     运行中的应用（含实际的调度设置 scheduling）和最近的退出记录（回复中的 running、exited）
+    {"cmd": "ping"} / {"cmd": "quit"}
+回复: {"ok": true/false, "code": 退出码, "message": "..."}
+"""
+import hashlib
+import json
+import os
+import queue
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+# 等待常驻实例处理命令的时间（秒）
+REPLY_TIMEOUT = 10
+
+# 单条消息的长度上限（字节）
+MAX_MESSAGE = 64 * 1024
+
+# 命名管道正忙时重试的次数和间隔（秒）
+PIPE_BUSY_RETRIES = 50
+PIPE_BUSY_DELAY = 0.01
+ERROR_PIPE_BUSY = 231
+
+
+def address(data_file):
+    """常驻实例的地址：每个用户、每个数据文件各有一个"""
+    key = hashlib.blake2b(os.path.normcase(os.path.abspath(data_file)).encode('utf-8'), digest_size=6).hexdigest()
+    if sys.platform == "win32":
+        user = os.environ.get("USERNAME", "")
+        return rf"\\.\pipe\applauncher-{user}-{key}"
+    runtime = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime, f"applauncher-{os.getuid()}-{key}.sock")
+
+
+def _encode(message):
+    return json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n"
+
+
+def _decode(data):
+    return json.loads(data.decode('utf-8'))
+
+
+def _recv_line(sock):
+    """从套接字读取一行（不含换行）"""
+    chunks = []
+    size = 0
+    while True:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise EOFError("连接已关闭")
+        end = chunk.find(b"\n")
+        if end >= 0:
+            chunks.append(chunk[:end])
+            return b"".join(chunks)
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > MAX_MESSAGE:
+            raise ValueError("消息过长")
+
+
+def _send_pipe(path, data):
+    """Windows：通过命名管道发送命令并读取回复"""
+    for _ in range(PIPE_BUSY_RETRIES):
+        try:
+            pipe = open(path, 'r+b', buffering=0)
+            break
+        except OSError as e:
+            # 服务端正在准备下一个管道实例
+            if getattr(e, "winerror", None) != ERROR_PIPE_BUSY:
+                raise
+            time.sleep(PIPE_BUSY_DELAY)
+    else:
+        raise TimeoutError("常驻实例忙")
+    with pipe:
+        pipe.write(data)
+        return pipe.read(MAX_MESSAGE).split(b"\n", 1)[0]
+
+
+def send(data_file, message, timeout=REPLY_TIMEOUT):
+    """把命令发给常驻实例并返回回复，没有常驻实例时返回None"""
+    path = address(data_file)
+    data = _encode(message)
+    try:
+        if sys.platform == "win32":
+            reply = _send_pipe(path, data)
+        else:
+            if not os.path.exists(path):
+                return None
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                sock.connect(path)
+                sock.sendall(data)
+                reply = _recv_line(sock)
+    except (FileNotFoundError, ConnectionRefusedError):
+        # 没有常驻实例（或上次异常退出留下的套接字文件）
+        return None
+    except (OSError, EOFError) as e:
+        return {"ok": False, "code": None, "message": f"与常驻实例通信失败: {e}"}
+    try:
+        return _decode(reply)
+    except ValueError:
+        return {"ok": False, "code": None, "message": "常驻实例的回复无法解析"}
+
+
+class ResidentServer:
+    """在后台线程接受连接，每个客户端一个线程；命令交给主线程执行，执行完再回复"""
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.address = address(data_file)
+        # (命令, reply函数)，由主线程取出执行
+        self.requests = queue.Queue()
+        self.listener = None
+        # Unix：持有期间其他实例不能删除或绑定套接字文件（进程退出时系统自动释放）
+        self.lock_file = None
+        self.closed = False
+
+        # 统计：处理过的连接数
+        self.served = 0
+
+    def start(self):
+        """开始监听，已有其他常驻实例时返回False"""
+        if send(self.data_file, {"cmd": "ping"}, timeout=1) is not None:
+            return False
+        try:
+            if sys.platform == "win32":
+                from multiprocessing.connection import Listener
+                self.listener = Listener(self.address, family="AF_PIPE")
+            else:
+                self.listener = self._listen_unix()
+        except OSError as e:
+            print(f"无法启动常驻模式: {e}")
+            return False
+        threading.Thread(target=self._accept_loop, name="resident", daemon=True).start()
+        return True
+
+    def _lock(self):
+        """Unix：独占锁文件，同时启动的多个实例只有一个能继续，其他的抛出 OSError"""
+        import fcntl
+        old_umask = os.umask(0o077)
+        try:
+            lock_file = open(self.address + ".lock", 'a')
+        finally:
+            os.umask(old_umask)
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise OSError("另一个常驻实例正在启动")
+        return lock_file
+
+    def _listen_unix(self):
+        # ping 和绑定之间另一个实例也可能在启动：先取得锁，持有锁的实例才能删除和绑定套接字文件
+        # （Windows 的 Listener 以 FILE_FLAG_FIRST_PIPE_INSTANCE 创建管道，同名管道只能有一个服务端）
+        self.lock_file = self._lock()
+        try:
+            # 取得锁后仍存在的套接字文件是上次异常退出留下的
+            try:
+                os.unlink(self.address)
+            except FileNotFoundError:
+                pass
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            # 只有当前用户可以连接
+            old_umask = os.umask(0o077)
+            try:
+                sock.bind(self.address)
+                sock.listen(16)
+            except OSError:
+                sock.close()
+                raise
+            finally:
+                os.umask(old_umask)
+        except OSError:
+            self.lock_file.close()
+            self.lock_file = None
+            raise
+        return sock
+
+    def _accept_loop(self):
+        while not self.closed:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                if self.closed:
+                    return
+                continue
+            if isinstance(conn, tuple):
+                conn = conn[0]
+            self.served += 1
+            threading.Thread(target=self._serve, args=(conn,), name="resident-client", daemon=True).start()
+
+    def _serve(self, conn):
+        """客户端线程：读取命令，等待主线程执行完毕后回复"""
+        try:
+            if isinstance(conn, socket.socket):
+                conn.settimeout(REPLY_TIMEOUT)
+                request = _decode(_recv_line(conn))
+            else:
+                request = _decode(conn.recv_bytes(MAX_MESSAGE).split(b"\n", 1)[0])
+            if not isinstance(request, dict):
+                raise ValueError("命令格式错误")
+        except (OSError, EOFError, ValueError) as e:
+            self._reply(conn, {"ok": False, "code": None, "message": f"无法读取命令: {e}"})
+            return
+
+        done = threading.Event()
+        result = []
+
+        def reply(message):
+            result.append(message)
+            done.set()
+
+        self.requests.put((request, reply))
+        if done.wait(REPLY_TIMEOUT):
+            self._reply(conn, result[0])
+        else:
+            self._reply(conn, {"ok": False, "code": None, "message": "常驻实例处理命令超时"})
+
+    @staticmethod
+    def _reply(conn, message):
+        try:
+            if isinstance(conn, socket.socket):
+                conn.sendall(_encode(message))
+            else:
+                conn.send_bytes(_encode(message))
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def pending(self):
+        """主线程：取出等待执行的 [(命令, reply函数)]"""
+        items = []
+        while True:
+            try:
+                items.append(self.requests.get_nowait())
+            except queue.Empty:
+                return items
+
+    def close(self):
+        """停止监听"""
+        if self.listener is None:
+            return
+        self.closed = True
+        try:
+            self.listener.close()
+        except OSError:
+            pass
+        self.listener = None
+        if sys.platform != "win32":
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        # 删除套接字文件之后再释放锁，锁文件本身保留（删除它会让等待同一个锁的实例锁住不同的文件）
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
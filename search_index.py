@@ -0,0 +1,358 @@
+"""应用搜索索引：n-gram 索引，支持模糊匹配、拼音首字母和使用频率排序
+
+不超过 GRAM_SIZE 个字符的查询（最常见、匹配最多的情况）直接用集合运算得到各匹配等级，
+不逐个比较名称；更长的查询先用 n-gram 求交集得到少量候选，再逐个确认匹配等级。
+"""
+import heapq
+import time
+from bisect import bisect_left, insort
+
+try:
+    from pypinyin import lazy_pinyin, Style
+except ImportError:
+    lazy_pinyin = None
+
+# 一级汉字在GB2312中按拼音排序，可以由编码区间得到拼音首字母
+_GB_INITIALS = (
+    (0xB0A1, 'a'), (0xB0C5, 'b'), (0xB2C1, 'c'), (0xB4EE, 'd'), (0xB6EA, 'e'),
+    (0xB7A2, 'f'), (0xB8C1, 'g'), (0xB9FE, 'h'), (0xBBF7, 'j'), (0xBFA6, 'k'),
+    (0xC0AC, 'l'), (0xC2E8, 'm'), (0xC4C3, 'n'), (0xC5B6, 'o'), (0xC5BE, 'p'),
+    (0xC6DA, 'q'), (0xC8BB, 'r'), (0xC8F6, 's'), (0xCBFA, 't'), (0xCDDA, 'w'),
+    (0xCEF4, 'x'), (0xD1B9, 'y'), (0xD4D1, 'z'),
+)
+_GB_CODES = [code for code, _ in _GB_INITIALS]
+_GB_LEVEL1_END = 0xD7F9
+
+# n-gram 最大长度，不超过该长度的查询可直接查表
+GRAM_SIZE = 3
+
+# 子串匹配结果少于该数量时才进行模糊（子序列）匹配
+FUZZY_THRESHOLD = 50
+
+# 批量添加不超过该数量时逐个插入有序列表并立即建立 n-gram 索引，
+# 否则追加后统一排序，n-gram 索引延迟到 index_pending() 或第一次搜索时建立
+INSORT_LIMIT = 64
+
+# 使用频率的半衰期（秒）
+FRECENCY_HALF_LIFE = 14 * 24 * 3600
+
+# 匹配等级，数值越小排名越靠前
+TIER_EXACT = 0
+TIER_PREFIX = 1
+TIER_SUBSTRING = 2
+TIER_PINYIN_PREFIX = 3
+TIER_PINYIN = 4
+TIER_FUZZY = 5
+
+
+def _char_initial(ch):
+    """单个汉字的拼音首字母，无法识别时返回空字符串"""
+    try:
+        gb = ch.encode('gb2312')
+    except UnicodeEncodeError:
+        gb = b""
+    if len(gb) == 2:
+        code = gb[0] << 8 | gb[1]
+        if _GB_CODES[0] <= code <= _GB_LEVEL1_END:
+            return _GB_INITIALS[bisect_left(_GB_CODES, code + 1) - 1][1]
+
+    if lazy_pinyin is not None:
+        initial = lazy_pinyin(ch, style=Style.FIRST_LETTER)
+        if initial and initial[0].isascii():
+            return initial[0].lower()
+    return ""
+
+
+def pinyin_initials(text):
+    """文本的拼音首字母串：汉字取首字母，字母数字原样保留"""
+    result = []
+    for ch in text.lower():
+        if ch.isascii():
+            if ch.isalnum():
+                result.append(ch)
+        else:
+            result.append(_char_initial(ch))
+    return "".join(result)
+
+
+def frecency(count, last_used, now=None):
+    """按使用次数和最近使用时间计算频率分数"""
+    if not count:
+        return 0.0
+    if now is None:
+        now = time.time()
+    age = max(0.0, now - (last_used or 0))
+    return count * 0.5 ** (age / FRECENCY_HALF_LIFE)
+
+
+def _is_subsequence(query, text):
+    it = iter(text)
+    return all(ch in it for ch in query)
+
+
+def _grams(text):
+    """文本中所有长度不超过 GRAM_SIZE 的子串"""
+    return {text[i:i + n] for n in range(1, GRAM_SIZE + 1) for i in range(len(text) - n + 1)}
+
+
+_EMPTY = frozenset()
+
+
+class SearchIndex:
+    """应用名称搜索索引"""
+
+    def __init__(self):
+        # 名称 -> (小写名称, 拼音首字母)，还没有建立索引的名称为None
+        self.keys = {}
+        # 名称 -> 频率分数，以及分数不为0的名称
+        self.scores = {}
+        self.scored = set()
+        # n-gram -> 名称集合：grams 为小写名称的 n-gram，
+        # pinyin_grams 只包含出现在拼音首字母中、但不出现在该名称小写形式中的 n-gram
+        self.grams = {}
+        self.pinyin_grams = {}
+        # 开头 1~GRAM_SIZE 个字符 -> 名称集合（小写名称 / 拼音首字母），短查询的前缀匹配
+        self.prefixes = {}
+        self.pinyin_prefixes = {}
+        # 不超过 GRAM_SIZE 个字符的小写名称 -> 名称集合，短查询的完全匹配
+        self.short = {}
+        # 按名称排序的列表
+        self.sorted_names = []
+        # 已添加但还没有建立 n-gram 索引的名称（名称 -> None）
+        self.unindexed = {}
+        # 名称 -> 在 sorted_names 中的位置，应用增删后延迟重建
+        self._ranks = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, name):
+        return name in self.keys
+
+    def _index(self, name, lower, pinyin):
+        """为名称建立 n-gram、前缀和完全匹配索引"""
+        lower_grams = _grams(lower)
+        for index, grams in ((self.grams, lower_grams), (self.pinyin_grams, _grams(pinyin) - lower_grams)):
+            for gram in grams:
+                names = index.get(gram)
+                if names is None:
+                    index[gram] = {name}
+                else:
+                    names.add(name)
+        for index, key in ((self.prefixes, lower), (self.pinyin_prefixes, pinyin)):
+            for n in range(1, min(len(key), GRAM_SIZE) + 1):
+                names = index.get(key[:n])
+                if names is None:
+                    index[key[:n]] = {name}
+                else:
+                    names.add(name)
+        if len(lower) <= GRAM_SIZE:
+            self.short.setdefault(lower, set()).add(name)
+
+    def _unindex(self, name, lower, pinyin):
+        lower_grams = _grams(lower)
+        entries = [(self.grams, gram) for gram in lower_grams]
+        entries += [(self.pinyin_grams, gram) for gram in _grams(pinyin) - lower_grams]
+        for index, key in ((self.prefixes, lower), (self.pinyin_prefixes, pinyin)):
+            entries += [(index, key[:n]) for n in range(1, min(len(key), GRAM_SIZE) + 1)]
+        if len(lower) <= GRAM_SIZE:
+            entries.append((self.short, lower))
+        for index, key in entries:
+            names = index.get(key)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del index[key]
+
+    def _set_score(self, name, score):
+        self.scores[name] = score
+        if score:
+            self.scored.add(name)
+        else:
+            self.scored.discard(name)
+
+    def add(self, name, count=0, last_used=None):
+        """添加或更新应用"""
+        if name in self.keys:
+            self.remove(name)
+
+        lower = name.lower()
+        pinyin = pinyin_initials(name)
+        self.keys[name] = (lower, pinyin)
+        self._set_score(name, frecency(count, last_used))
+        self._index(name, lower, pinyin)
+
+        insort(self.sorted_names, name)
+        self._ranks = None
+
+    def add_many(self, items):
+        """批量添加应用，items 为 (名称, 启动次数, 最后启动时间)
+
+        数量少时逐个插入有序列表，数量多时追加后统一排序，n-gram 索引延迟建立
+        """
+        # 同一批中重复的名称以最后一次为准（必须在插入之前去重，否则会删除有序列表中的其他名称）
+        batch = {}
+        for name, count, last_used in items:
+            batch[name] = (count, last_used)
+        for name in batch:
+            if name in self.keys:
+                self.remove(name)
+
+        now = time.time()
+        defer = len(batch) > INSORT_LIMIT
+        for name, (count, last_used) in batch.items():
+            self._set_score(name, frecency(count, last_used, now))
+            if defer:
+                # 拼音首字母和 n-gram 都在建立索引时才计算
+                self.keys[name] = None
+                self.unindexed[name] = None
+            else:
+                lower = name.lower()
+                pinyin = pinyin_initials(name)
+                self.keys[name] = (lower, pinyin)
+                self._index(name, lower, pinyin)
+
+        if not defer:
+            for name in batch:
+                insort(self.sorted_names, name)
+        else:
+            self.sorted_names.extend(batch)
+            self.sorted_names.sort()
+        self._ranks = None
+
+    def index_pending(self, limit=None):
+        """为延迟的名称建立 n-gram 索引（最多 limit 个），返回是否还有剩余
+
+        界面可以在空闲时分批调用；搜索前会自动处理全部剩余的名称
+        """
+        unindexed = self.unindexed
+        keys = self.keys
+        count = 0
+        while unindexed and (limit is None or count < limit):
+            name = unindexed.popitem()[0]
+            lower = name.lower()
+            pinyin = pinyin_initials(name)
+            keys[name] = (lower, pinyin)
+            self._index(name, lower, pinyin)
+            count += 1
+        return bool(unindexed)
+
+    def remove(self, name):
+        """删除应用"""
+        keys = self.keys.pop(name, None)
+        if keys is None:
+            return
+        self.scores.pop(name, None)
+        self.scored.discard(name)
+        if name in self.unindexed:
+            del self.unindexed[name]
+        else:
+            self._unindex(name, *keys)
+
+        del self.sorted_names[bisect_left(self.sorted_names, name)]
+        self._ranks = None
+
+    def record_use(self, name, count, last_used):
+        """应用被启动后更新频率分数"""
+        if name in self.keys:
+            self._set_score(name, frecency(count, last_used))
+
+    def _candidates(self, parts):
+        """小写名称或拼音首字母中含有 parts 中每个 n-gram 的名称（可能多出一些，由调用者逐个确认）"""
+        postings = []
+        for part in parts:
+            lower = self.grams.get(part, _EMPTY)
+            pinyin = self.pinyin_grams.get(part, _EMPTY)
+            if not lower and not pinyin:
+                return _EMPTY
+            postings.append((lower, pinyin))
+        postings.sort(key=lambda pair: len(pair[0]) + len(pair[1]))
+        lower, pinyin = postings[0]
+        result = lower | pinyin
+        for lower, pinyin in postings[1:]:
+            if not result:
+                break
+            # 与较小的集合求交集，不需要先合并两个大集合
+            result = (result & lower) | (result & pinyin)
+        return result
+
+    def _short_tiers(self, query):
+        """不超过 GRAM_SIZE 个字符的查询：用集合运算得到各匹配等级的名称集合"""
+        lower_hits = self.grams.get(query, _EMPTY)
+        # 只有拼音首字母含有 query 的名称
+        pinyin_hits = self.pinyin_grams.get(query, _EMPTY)
+        prefix = self.prefixes.get(query, _EMPTY)
+        exact = self.short.get(query, _EMPTY)
+        pinyin_prefix = pinyin_hits & self.pinyin_prefixes.get(query, _EMPTY)
+        return [exact, prefix - exact, lower_hits - prefix, pinyin_prefix, pinyin_hits - pinyin_prefix, set()]
+
+    def _long_tiers(self, query):
+        """较长的查询：n-gram 求交集得到候选，逐个确认匹配等级"""
+        tiers = [set() for _ in range(TIER_FUZZY + 1)]
+        keys = self.keys
+        parts = {query[i:i + GRAM_SIZE] for i in range(len(query) - GRAM_SIZE + 1)}
+        for name in self._candidates(parts):
+            lower, pinyin = keys[name]
+            if lower.startswith(query):
+                tier = TIER_EXACT if lower == query else TIER_PREFIX
+            elif query in lower:
+                tier = TIER_SUBSTRING
+            elif pinyin.startswith(query):
+                tier = TIER_PINYIN_PREFIX
+            elif query in pinyin:
+                tier = TIER_PINYIN
+            else:
+                continue
+            tiers[tier].add(name)
+        return tiers
+
+    def _ranked(self, tiers, limit):
+        """按等级、频率分数和名称排序；达到 limit 后不再排序后面的等级"""
+        names = self.sorted_names
+        ranks = self._ranks
+        scores = self.scores
+        result = []
+        for group in tiers:
+            if not group:
+                continue
+            scored = self.scored.intersection(group)
+            if scored:
+                result.extend(sorted(scored, key=lambda name: (-scores[name], ranks[name])))
+                group = group - scored
+            # 未启动过的应用只需按名称位置排序
+            positions = map(ranks.__getitem__, group)
+            if limit:
+                positions = heapq.nsmallest(max(0, limit - len(result)), positions)
+            else:
+                positions = sorted(positions)
+            result.extend(map(names.__getitem__, positions))
+            if limit and len(result) >= limit:
+                return result[:limit]
+        return result
+
+    def search(self, query, limit=None, fuzzy=True):
+        """搜索应用，按匹配程度、使用频率和名称排序返回名称列表"""
+        query = query.lower()
+        if not query:
+            return self.sorted_names[:limit] if limit else list(self.sorted_names)
+
+        if self.unindexed:
+            self.index_pending()
+        if self._ranks is None:
+            self._ranks = {name: i for i, name in enumerate(self.sorted_names)}
+
+        if len(query) <= GRAM_SIZE:
+            tiers = self._short_tiers(query)
+        else:
+            tiers = self._long_tiers(query)
+
+        if fuzzy and len(query) > 1 and sum(map(len, tiers)) < FUZZY_THRESHOLD:
+            keys = self.keys
+            fuzzy_matches = tiers[TIER_FUZZY]
+            for name in self._candidates(set(query)):
+                lower, pinyin = keys[name]
+                if query in lower or query in pinyin:
+                    continue
+                if _is_subsequence(query, lower) or _is_subsequence(query, pinyin):
+                    fuzzy_matches.add(name)
+        return self._ranked(tiers, limit)
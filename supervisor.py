@@ -0,0 +1,174 @@
+"""启动监督：登记启动的子进程，在后台线程等待它们退出，记录退出码和运行时间
+
+每个子进程由一个等待线程调用 wait()（同时回收僵尸进程），就绪和退出时交给主线程，界面不会被阻塞。
+就绪：Windows上为进程完成初始化、可以响应输入；其他系统上 exec 成功后 Popen 才返回，登记时即为就绪。
+"""
+import collections
+import queue
+import sys
+import threading
+import time
+
+# 保留的退出记录数
+HISTORY_SIZE = 200
+
+# 启动后这么多秒内以非零退出码退出视为启动失败
+CRASH_SECONDS = 5
+
+# Windows上等待进程就绪的最长时间（毫秒）
+READY_TIMEOUT_MS = 60 * 1000
+
+# 主线程取出的事件
+EVENT_READY = "ready"
+EVENT_EXIT = "exit"
+
+
+class Child:
+    """一个启动的子进程"""
+
+    __slots__ = ("name", "process", "pid", "started", "started_at", "ready", "ended", "returncode", "tag")
+
+    def __init__(self, name, process, tag=None):
+        self.name = name
+        self.process = process
+        self.pid = process.pid
+        # perf_counter 时间，用于计算运行时间
+        self.started = time.perf_counter()
+        # 启动的时刻（时间戳）
+        self.started_at = time.time()
+        # 就绪的时间，未就绪（或等待超时）时为None
+        self.ready = None
+        self.ended = None
+        self.returncode = None
+        # 调用者附加的数据
+        self.tag = tag
+
+    @property
+    def running(self):
+        return self.returncode is None and self.process.returncode is None
+
+    def runtime(self, now=None):
+        """运行时间（秒），运行中的进程算到现在"""
+        if self.ended is not None:
+            return self.ended - self.started
+        return (time.perf_counter() if now is None else now) - self.started
+
+    @property
+    def crashed(self):
+        """启动后很快以非零退出码退出"""
+        return bool(self.returncode) and self.runtime() < CRASH_SECONDS
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "pid": self.pid,
+            "started_at": self.started_at,
+            "running": self.running,
+            "runtime": self.runtime(),
+            "returncode": self.returncode,
+        }
+
+    def __repr__(self):
+        return f"Child({self.name!r}, pid={self.pid}, returncode={self.returncode})"
+
+
+class Supervisor:
+    """名称 -> 运行中的子进程，以及每个应用最近一次的退出记录"""
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        # 名称 -> [Child]（允许重复启动时可能有多个）
+        self.running = {}
+        # 名称 -> 最近一次退出的 Child
+        self.exited = {}
+        # 最近退出的子进程，按退出顺序
+        self.history = collections.deque(maxlen=history_size)
+        # 等待主线程取出的 (事件, Child)
+        self.done = queue.Queue()
+
+        # 统计：登记和回收的子进程数
+        self.launched = 0
+        self.reaped = 0
+
+    def register(self, name, process, tag=None):
+        """登记刚启动的子进程（Popen对象），返回 Child"""
+        child = Child(name, process, tag)
+        self.running.setdefault(name, []).append(child)
+        self.launched += 1
+        if sys.platform != "win32":
+            child.ready = child.started
+            self.done.put((EVENT_READY, child))
+        threading.Thread(target=self._wait, args=(child,), name=f"wait-{child.pid}", daemon=True).start()
+        return child
+
+    def _wait(self, child):
+        """等待线程：（Windows上先等进程就绪）等子进程退出后交给主线程"""
+        if sys.platform == "win32":
+            import win32_api
+            try:
+                if win32_api.wait_input_idle(child.pid, READY_TIMEOUT_MS):
+                    child.ready = time.perf_counter()
+            except OSError:
+                pass
+            self.done.put((EVENT_READY, child))
+        try:
+            returncode = child.process.wait()
+        except OSError:
+            returncode = child.process.returncode
+        child.ended = time.perf_counter()
+        child.returncode = returncode
+        self.done.put((EVENT_EXIT, child))
+
+    def drain(self):
+        """主线程：取出就绪和退出事件，更新运行状态，返回 [(事件, Child)]"""
+        events = []
+        while True:
+            try:
+                event, child = self.done.get_nowait()
+            except queue.Empty:
+                break
+            events.append((event, child))
+            if event != EVENT_EXIT:
+                continue
+            children = self.running.get(child.name, [])
+            if child in children:
+                children.remove(child)
+            if not children:
+                self.running.pop(child.name, None)
+            self.exited[child.name] = child
+            self.history.append(child)
+            self.reaped += 1
+        return events
+
+    def busy(self):
+        """是否还有运行中或等待取出的子进程"""
+        return bool(self.running) or not self.done.empty()
+
+    def children(self, name):
+        """应用运行中的子进程"""
+        return [child for child in self.running.get(name, ()) if child.running]
+
+    def is_running(self, name):
+        return bool(self.children(name))
+
+    def last_exit(self, name):
+        """应用最近一次退出的子进程，没有时返回None"""
+        return self.exited.get(name)
+
+    def state(self, name):
+        """"running"（运行中）、"exited"（已退出）或None（本次没有启动过）"""
+        if self.is_running(name):
+            return "running"
+        if name in self.exited:
+            return "exited"
+        return None
+
+    def forget(self, name):
+        """移除应用的退出记录（应用被删除时；运行中的子进程仍会被回收）"""
+        self.exited.pop(name, None)
+
+    def snapshot(self):
+        """运行中的子进程和最近的退出记录（可直接写入JSON）"""
+        return {
+            "running": [child.to_dict() for children in self.running.values() for child in children],
+            "exited": [child.to_dict() for child in self.history],
+        }
@@ -0,0 +1,271 @@
+"""启动统计：每次启动的耗时和运行时间，保存在固定大小的二进制环形文件中
+
+文件 = 32字节文件头 + capacity 条48字节记录，写满后从头覆盖最旧的记录，文件大小不会增长。
+每次启动只写入一条记录和文件头（两次小的写入，不需要重写整个文件）；
+界面、常驻实例和命令行进程可能同时记录，写入时持有锁文件并重新读取文件头，从其他进程写到的位置继续。
+启动器启动时只读取32字节的文件头，第一次查询统计时才一次读入并解析全部记录。
+
+每次启动写入两条记录:
+    launch: 进程已启动（Windows上为窗口可以响应输入）时写入，包含
+            查找路径（等待路径检查）、创建进程和启动到进程就绪的耗时
+    exit:   进程退出时写入，包含运行时间和退出码，用 seq 与对应的 launch 记录关联
+应用按名称的64位哈希保存，不保存名称本身。
+"""
+import hashlib
+import math
+import os
+import struct
+import time
+
+import file_lock
+import search_index
+
+TELEMETRY_VERSION = 2
+
+# 文件头: 标识, 版本, 记录大小, 容量, 下一条记录的位置, 记录数, 下一个序号
+HEADER = struct.Struct("<4sHHIIII8x")
+MAGIC = b"ALTM"
+
+# 记录: 类型, 保留, 序号, 应用哈希, 时间戳, 查找路径/创建进程/进程就绪(毫秒), 运行时间(秒), 退出码
+# 退出码为64位：Windows上崩溃的退出码是无符号的（如 0xC0000005），Linux上被信号终止时为负数
+RECORD = struct.Struct("<BxxxIQdffffq")
+
+KIND_LAUNCH = 1
+KIND_EXIT = 2
+
+# 默认保存的记录数（约200KB）
+DEFAULT_CAPACITY = 4096
+
+NAN = float("nan")
+
+
+def app_key(name):
+    """应用名称的64位哈希"""
+    return int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), "little")
+
+
+def percentile(values, q):
+    """已排序列表的分位数（线性插值），没有数据时为None"""
+    if not values:
+        return None
+    pos = (len(values) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+class Launch:
+    """一次启动的统计"""
+
+    __slots__ = ("seq", "key", "time", "resolve_ms", "spawn_ms", "ready_ms", "session", "returncode")
+
+    def __init__(self, seq, key, when, resolve_ms, spawn_ms, ready_ms):
+        self.seq = seq
+        self.key = key
+        self.time = when
+        self.resolve_ms = resolve_ms
+        self.spawn_ms = spawn_ms
+        self.ready_ms = ready_ms
+        # 退出后才知道
+        self.session = None
+        self.returncode = None
+
+
+class Telemetry:
+    """启动统计文件的读写；读写失败时只输出提示，不影响启动"""
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.capacity = capacity
+        self.head = 0
+        self.count = 0
+        self.seq = 0
+
+        # 应用哈希 -> [Launch]（按时间顺序），seq -> Launch；第一次查询时才读入
+        self.launches = {}
+        self.by_seq = {}
+        self.loaded = False
+        self._file = None
+        self.load_header()
+
+    def load_header(self):
+        """读取文件头（下一条记录的位置、记录数和序号）"""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read(HEADER.size)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"读取启动统计失败: {e}")
+            return
+
+        if not self._use_header(data):
+            # 格式不符（或写入中途损坏的文件头），重新开始记录
+            print("启动统计文件格式不符，重新开始记录")
+            self.head = self.count = self.seq = 0
+            try:
+                with file_lock.locked(self.lock_path):
+                    self._write_header_file()
+            except OSError as e:
+                print(f"创建启动统计文件失败: {e}")
+
+    def _use_header(self, data):
+        """采用文件头中的位置、记录数和序号，格式不符时返回False"""
+        try:
+            magic, version, record_size, capacity, head, count, seq = HEADER.unpack(data)
+        except struct.error:
+            return False
+        if (magic != MAGIC or version != TELEMETRY_VERSION or record_size != RECORD.size
+                or capacity == 0 or head >= capacity or count > capacity):
+            return False
+        self.capacity = capacity
+        self.head = head
+        self.count = count
+        self.seq = seq
+        return True
+
+    def load(self):
+        """读入并解析全部记录"""
+        self.launches = {}
+        self.by_seq = {}
+        self.loaded = True
+        size = self.count * RECORD.size
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(HEADER.size)
+                body = f.read(size)
+        except OSError as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"读取启动统计失败: {e}")
+            return
+        if len(body) < size:
+            body = body[:len(body) - len(body) % RECORD.size]
+
+        # 按写入顺序：写满后最旧的记录从 head 开始
+        if self.count == self.capacity and self.head:
+            split = self.head * RECORD.size
+            body = body[split:] + body[:split]
+        for row in RECORD.iter_unpack(body):
+            self._apply(row)
+
+    def _apply(self, row):
+        kind, seq, key, when, resolve_ms, spawn_ms, ready_ms, session, returncode = row
+        if kind == KIND_LAUNCH:
+            launch = Launch(seq, key, when, resolve_ms, spawn_ms, ready_ms)
+            self.launches.setdefault(key, []).append(launch)
+            self.by_seq[seq] = launch
+        elif kind == KIND_EXIT:
+            # 对应的 launch 记录可能已被覆盖
+            launch = self.by_seq.get(seq)
+            if launch is not None:
+                launch.session = session
+                launch.returncode = returncode
+
+    def _write_header_file(self):
+        """新建只有文件头的统计文件"""
+        self.close()
+        try:
+            with open(self.path, 'wb') as f:
+                f.write(self._header())
+        except OSError as e:
+            print(f"创建启动统计文件失败: {e}")
+
+    def _header(self):
+        return HEADER.pack(MAGIC, TELEMETRY_VERSION, RECORD.size, self.capacity, self.head, self.count, self.seq)
+
+    def _append(self, row):
+        """写入一条记录和文件头，返回写入的记录；记录的序号为None时分配新序号"""
+        try:
+            with file_lock.locked(self.lock_path):
+                if self._file is None:
+                    if not os.path.exists(self.path):
+                        self._write_header_file()
+                    self._file = open(self.path, 'r+b')
+                # 其他进程可能在这之后写入过：从文件头记录的位置继续
+                self._file.seek(0)
+                self._use_header(self._file.read(HEADER.size))
+                if row[1] is None:
+                    row = (row[0], self.seq) + row[2:]
+                    self.seq = (self.seq + 1) & 0xFFFFFFFF
+                self._file.seek(HEADER.size + self.head * RECORD.size)
+                self._file.write(RECORD.pack(*row))
+                self.head = (self.head + 1) % self.capacity
+                self.count = min(self.count + 1, self.capacity)
+                self._file.seek(0)
+                self._file.write(self._header())
+                self._file.flush()
+        except (OSError, struct.error) as e:
+            print(f"写入启动统计失败: {e}")
+            self.close()
+            if row[1] is None:
+                row = (row[0], self.seq) + row[2:]
+                self.seq = (self.seq + 1) & 0xFFFFFFFF
+        return row
+
+    def record_launch(self, name, resolve_ms, spawn_ms, ready_ms=NAN, when=None):
+        """记录一次启动，返回序号（进程退出时传给 record_exit）"""
+        key = app_key(name)
+        row = self._append((KIND_LAUNCH, None, key, time.time() if when is None else when,
+                            resolve_ms, spawn_ms, ready_ms, NAN, 0))
+        seq = row[1]
+        if self.loaded:
+            self._apply(row)
+            self._trim(key)
+        return seq
+
+    def record_exit(self, seq, name, session, returncode):
+        """记录进程退出（运行时间秒数和退出码）；seq 为None（启动没有记录）时忽略"""
+        if seq is None:
+            return
+        row = (KIND_EXIT, seq, app_key(name), time.time(), NAN, NAN, NAN, session,
+               returncode if returncode is not None else 0)
+        self._append(row)
+        if self.loaded:
+            self._apply(row)
+
+    def _trim(self, key):
+        """内存中每个应用最多保留与文件容量相同数量的记录"""
+        launches = self.launches[key]
+        if len(launches) > self.capacity:
+            for launch in launches[:-self.capacity]:
+                self.by_seq.pop(launch.seq, None)
+            del launches[:-self.capacity]
+
+    def history(self, name):
+        """应用的启动记录（按时间顺序）"""
+        if not self.loaded:
+            self.load()
+        return self.launches.get(app_key(name), [])
+
+    def stats(self, name):
+        """应用的启动统计：次数、各耗时和运行时间的 p50/p95，没有记录时返回None"""
+        launches = self.history(name)
+        if not launches:
+            return None
+        result = {"launches": len(launches), "frecency": self.frecency(name)}
+        for field in ("resolve_ms", "spawn_ms", "ready_ms", "session"):
+            values = sorted(value for value in (getattr(launch, field) for launch in launches)
+                            if value is not None and not math.isnan(value))
+            result[field] = {"p50": percentile(values, 0.50), "p95": percentile(values, 0.95), "count": len(values)}
+        result["exit_codes"] = {}
+        for launch in launches:
+            if launch.returncode is not None:
+                code = str(launch.returncode)
+                result["exit_codes"][code] = result["exit_codes"].get(code, 0) + 1
+        return result
+
+    def frecency(self, name, now=None):
+        """频率分数：每次启动按距今时间衰减后求和（半衰期与搜索排序相同）"""
+        if now is None:
+            now = time.time()
+        half_life = search_index.FRECENCY_HALF_LIFE
+        return sum(0.5 ** (max(0.0, now - launch.time) / half_life) for launch in self.history(name))
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
@@ -0,0 +1,52 @@
+"""测试公共设置：从仓库根目录导入模块，界面部分使用无界面Tk替身"""
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tk_stub
+
+# 必须在第一次导入 AppLauncher 之前替换 tkinter
+tk_stub.install()
+
+import AppLauncher
+
+APP_NAMES = ["Steam", "Steam 大屏幕", "原神", "英雄联盟", "明日方舟", "Cyberpunk 2077", "Notepad", "Paint"]
+
+
+def wait_for(condition, app, timeout=5):
+    """运行替身Tk的定时器直到 condition() 成立"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        app.root.update()
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """在临时目录中创建应用目录（程序文件实际存在），load_icon_data 可替换为测试函数"""
+    created = []
+
+    def make(load_icon_data=None):
+        apps = {}
+        for i, name in enumerate(APP_NAMES):
+            app_path = tmp_path / f"app{i}.exe"
+            app_path.write_bytes(b"MZ")
+            apps[name] = {"env_path": str(tmp_path), "app_path": str(app_path)}
+        data_file = tmp_path / "apps.json"
+        data_file.write_text(json.dumps(apps, ensure_ascii=False), encoding="utf-8")
+
+        if load_icon_data is not None:
+            monkeypatch.setattr(AppLauncher.AppLauncher, "load_icon_data", load_icon_data)
+        app = AppLauncher.AppLauncher(AppLauncher.tk.Tk(), str(data_file))
+        created.append(app)
+        return app
+
+    yield make
+    for app in created:
+        app.on_close()
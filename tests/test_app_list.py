@@ -0,0 +1,93 @@
+"""AppLauncher 列表更新：只插入、删除和移动有变化的行（使用无界面Tk替身）"""
+import AppLauncher
+import list_diff
+
+
+def test_filter_updates_rows_and_counters(make_app):
+    app = make_app(lambda self, app_path, size=None: None)
+    assert app.app_tree.children == app.visible_apps
+
+    for text in ["s", "st", "steam", "", "a", ""]:
+        before = list(app.visible_apps)
+        stats = dict(app.list_stats)
+        app.search_var.set(text)
+        app.filter_apps()
+
+        expected = app.catalog.search(text)
+        diff = list_diff.diff_rows(before, expected)
+        assert app.visible_apps == expected
+        assert app.app_tree.children == expected
+        assert app.list_stats["updates"] == stats["updates"] + 1
+        assert app.list_stats["inserted"] == stats["inserted"] + len(diff.inserts)
+        assert app.list_stats["deleted"] == stats["deleted"] + len(diff.deletes)
+        assert app.list_stats["moved"] == stats["moved"] + len(diff.moves)
+        assert app.list_stats["last_touched"] == diff.touched
+
+
+def test_reordered_rows_are_moved_not_reinserted(make_app):
+    app = make_app(lambda self, app_path, size=None: None)
+    app.search_var.set("st")
+    app.filter_apps()
+    assert app.visible_apps == ["Steam", "Steam 大屏幕"]
+
+    # 启动次数改变排序：只移动一行
+    app.catalog.record_launch("Steam 大屏幕")
+    stats = dict(app.list_stats)
+    app.filter_apps()
+
+    assert app.visible_apps == ["Steam 大屏幕", "Steam"]
+    assert app.app_tree.children == app.visible_apps
+    assert app.list_stats["inserted"] == stats["inserted"]
+    assert app.list_stats["deleted"] == stats["deleted"]
+    assert app.list_stats["moved"] == stats["moved"] + 1
+
+
+def test_list_mode_follows_catalog_size(make_app, monkeypatch):
+    monkeypatch.setattr(AppLauncher, "VIRTUAL_LIST_THRESHOLD", 20)
+    monkeypatch.setattr(AppLauncher, "VIRTUAL_LIST_EXIT", 10)
+    app = make_app(lambda self, app_path, size=None: None)
+    assert app.virtual_list is None
+
+    # 批量导入后超过阈值：普通列表的行删除，改为复用固定数量的行
+    app.catalog.add_many([(f"Imported {i:02d}", {"app_path": f"imported{i}.exe"}) for i in range(20)])
+    app.filter_apps()
+    assert app.virtual_list is not None
+    assert not any(name in app.app_tree.items for name in app.catalog.names())
+    assert set(app.app_tree.children) <= set(app.virtual_list.slots)
+
+    # 在两个数量之间不切换
+    app.catalog.remove_many([f"Imported {i:02d}" for i in range(15)])
+    app.filter_apps()
+    assert app.virtual_list is not None
+
+    # 删除到换回的数量以下：恢复为每个应用一行
+    app.catalog.remove_many([f"Imported {i:02d}" for i in range(15, 20)])
+    app.filter_apps()
+    assert app.virtual_list is None
+    assert app.app_tree.children == app.visible_apps == app.catalog.search("")
+
+
+def test_hover_details_follow_app_changes(make_app, monkeypatch):
+    app = make_app(lambda self, app_path, size=None: None)
+    monkeypatch.setattr(app.app_tree, "identify_row", lambda y: "Steam")
+    app.show_hover(5)
+    assert app.detail_name.cget("text") == "Steam"
+    assert app.detail_state.cget("text") == "未运行"
+
+    # 仍停在同一行：去重跳过
+    unchanged = app.ui.unchanged
+    app.show_hover(5)
+    assert app.ui.unchanged == unchanged + 1
+
+    # 悬停（未选中）的应用路径变为不存在：详情立即更新，不等下一次悬停
+    app_path = app.catalog["Steam"].app_path
+    app.health.mark(app_path, False)
+    app.apply_health_changes({app_path})
+    assert app.detail_path.cget("text").endswith("(不存在)")
+
+    # 列表更新后同一行可能已经是其他应用，下一次悬停不再被跳过
+    app.catalog["Steam"].env_path = ""
+    app.filter_apps()
+    app.show_hover(5)
+    assert app.ui.unchanged == unchanged + 1
+    assert app.detail_env.cget("text") == "未设置"
@@ -0,0 +1,112 @@
+"""JsonJournalStore：日志重放、压缩中途崩溃后的恢复、其他进程追加的记录不会在压缩时丢失"""
+import json
+import os
+
+import pytest
+
+import catalog_store
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "apps.json")
+
+
+def open_store(path, **kwargs):
+    # 提交只由测试显式触发
+    return catalog_store.JsonJournalStore(path, commit_delay=60, **kwargs)
+
+
+def write_snapshot(path, apps):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(apps, f)
+
+
+def write_journal(path, *records):
+    with open(path, 'ab') as f:
+        for record in records:
+            f.write(json.dumps(record).encode('utf-8') + b"\n")
+
+
+def test_journal_is_replayed_and_torn_tail_dropped(path):
+    write_snapshot(path, {"a": {"v": 1}, "b": {"v": 1}})
+    write_journal(path + ".journal", ["put", "a", {"v": 2}], ["del", "b", None])
+    with open(path + ".journal", 'ab') as f:
+        f.write(b'["put", "c", {"v"')
+    good_size = os.path.getsize(path + ".journal") - len(b'["put", "c", {"v"')
+
+    store = open_store(path)
+    assert store.load() == {"a": {"v": 2}}
+    assert store.journal_size == good_size
+    assert os.path.getsize(path + ".journal") == good_size
+
+
+def test_recover_before_snapshot_replaced(path):
+    # 崩溃在日志改名之后、替换快照之前：旧快照 + 旧日志仍然有效
+    write_snapshot(path, {"a": {"v": 1}})
+    write_journal(path + ".journal.old", ["put", "a", {"v": 2}])
+    write_snapshot(path + ".tmp", {"a": {"v": 2}})
+
+    assert open_store(path).load() == {"a": {"v": 2}}
+    assert not os.path.exists(path + ".journal.old")
+    assert not os.path.exists(path + ".tmp")
+    assert os.path.exists(path + ".journal")
+
+
+def test_recover_after_snapshot_replaced(path):
+    # 崩溃在替换快照之后：旧日志不能再重放（"a" 已经在新快照中删除）
+    write_snapshot(path, {"b": {"v": 1}})
+    write_journal(path + ".journal.old", ["put", "a", {"v": 1}])
+
+    assert open_store(path).load() == {"b": {"v": 1}}
+    assert not os.path.exists(path + ".journal.old")
+
+
+def test_compaction_writes_snapshot_and_clears_journal(path):
+    store = open_store(path, compact_bytes=1)
+    store.load()
+    store.put_many([("a", {"v": 1}), ("b", {"v": 1})])
+    store.flush()
+    assert store.compact_needed
+    store.delete("b")
+    store.compact()
+
+    assert not os.path.exists(path + ".journal")
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {"a": {"v": 1}}
+    assert store.journal_size == 0 and not store.compact_needed
+    assert open_store(path).load() == {"a": {"v": 1}}
+
+
+def test_compaction_keeps_records_appended_by_another_process(path):
+    gui = open_store(path)
+    gui.load()
+    gui.put("gui", {"v": 1})
+    gui.flush()
+
+    # 界面运行期间命令行进程记录了一次启动
+    cli = open_store(path)
+    assert cli.load() == {"gui": {"v": 1}}
+    cli.put("cli", {"v": 1})
+    cli.flush()
+
+    gui.put("gui", {"v": 2})
+    gui.close()
+
+    expected = {"gui": {"v": 2}, "cli": {"v": 1}}
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == expected
+    assert open_store(path).load() == expected
+
+
+def test_compaction_on_close_keeps_later_external_records(path):
+    gui = open_store(path)
+    gui.load()
+    cli = open_store(path)
+    cli.load()
+    cli.put("cli", {"v": 1})
+    cli.flush()
+
+    # 界面自己没有修改，关闭时的压缩也要保留命令行追加的记录
+    gui.close()
+    assert open_store(path).load() == {"cli": {"v": 1}}
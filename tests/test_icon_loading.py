@@ -0,0 +1,120 @@
+"""AppLauncher 后台图标加载：结果队列、失败处理和取消（使用无界面Tk替身）"""
+import os
+import threading
+
+import AppLauncher
+from conftest import APP_NAMES, wait_for
+
+
+def icon_data(app_path):
+    return os.path.basename(app_path).encode(), 32, 32
+
+
+def test_icon_results_replace_placeholders(make_app):
+    loaded = []
+
+    def load(self, app_path, size=None):
+        loaded.append(app_path)
+        return icon_data(app_path)
+
+    app = make_app(load)
+    default = app.get_default_icon()
+    wait_for(lambda: not app.icon_jobs, app)
+
+    assert sorted(loaded) == sorted(app.catalog[name].app_path for name in APP_NAMES)
+    for name in APP_NAMES:
+        image = app.app_tree.items[name]["image"]
+        assert image is not default
+        assert image.data == icon_data(app.catalog[name].app_path)[0]
+
+
+def test_failed_icon_uses_default_and_is_not_retried(make_app):
+    calls = []
+
+    def load(self, app_path, size=None):
+        calls.append(app_path)
+        raise OSError("broken")
+
+    app = make_app(load)
+    wait_for(lambda: not app.icon_jobs, app)
+    assert len(calls) == len(APP_NAMES)
+    assert all(app.app_tree.items[name]["image"] is app.get_default_icon() for name in APP_NAMES)
+
+    app.request_visible_icons()
+    assert not app.icon_jobs
+    assert len(calls) == len(APP_NAMES)
+
+
+def test_filtered_rows_cancel_queued_jobs(make_app, monkeypatch):
+    monkeypatch.setattr(AppLauncher, "ICON_WORKERS", 1)
+    release = threading.Event()
+    started = []
+
+    def load(self, app_path, size=None):
+        started.append(app_path)
+        release.wait(5)
+        return icon_data(app_path)
+
+    app = make_app(load)
+    # 只有一个图标线程，第一个任务阻塞时其余任务都在排队
+    wait_for(lambda: started, app)
+    first = next(name for name in APP_NAMES if app.catalog[name].app_path == started[0])
+    queued = {name: future for name, future in app.icon_jobs.items() if name != first}
+    assert queued
+
+    app.search_var.set("原神")
+    app.filter_apps()
+    release.set()
+    wait_for(lambda: not app.icon_jobs, app)
+
+    kept = set(app.visible_apps) | {first}
+    for name, future in queued.items():
+        if name not in kept:
+            assert future.cancelled()
+            assert app.catalog[name].app_path not in started
+    assert set(started) == {app.catalog[name].app_path for name in kept}
+
+
+def test_stale_result_is_not_applied_to_changed_row(make_app, tmp_path):
+    release = threading.Event()
+
+    def load(self, app_path, size=None):
+        release.wait(5)
+        return icon_data(app_path)
+
+    app = make_app(load)
+    name = APP_NAMES[0]
+    old_path = app.catalog[name].app_path
+    assert name in app.icon_jobs
+
+    # 加载期间应用路径被修改：旧路径的图标只进入缓存，不显示在这一行
+    new_path = tmp_path / "moved.exe"
+    new_path.write_bytes(b"MZ")
+    app.catalog.add(name, {"env_path": str(tmp_path), "app_path": str(new_path)})
+    release.set()
+    wait_for(lambda: not app.icon_jobs, app)
+
+    assert app.icon_cache.peek(old_path) is not None
+    image = app.app_tree.items[name]["image"]
+    assert image is None or image.data != icon_data(old_path)[0]
+
+
+def test_icons_of_attached_rows_are_not_evicted(make_app, monkeypatch):
+    # 只能容纳两个图标的缓存
+    monkeypatch.setattr(AppLauncher, "ICON_CACHE_BYTES", 2 * 32 * 32 * 4)
+    app = make_app(lambda self, app_path, size=None: icon_data(app_path))
+    wait_for(lambda: not app.icon_jobs, app)
+
+    # 普通列表的每一行都引用着自己的图标，超过上限也不能淘汰
+    default = app.get_default_icon()
+    for name in APP_NAMES:
+        assert app.icon_cache.peek(app.catalog[name].app_path) is app.app_tree.items[name]["image"]
+        assert app.app_tree.items[name]["image"] is not default
+    assert app.icon_cache.evictions == 0
+
+    # 被过滤掉的行不再显示，它们的图标可以淘汰
+    app.search_var.set("原神")
+    app.filter_apps()
+    assert app.icon_cache.total_bytes <= app.icon_cache.max_bytes
+    assert app.icon_cache.peek(app.catalog["原神"].app_path) is app.app_tree.items["原神"]["image"]
+
@@ -0,0 +1,71 @@
+"""icon_pixels：纯Python的缩放结果与按定义精确计算的结果逐字节一致（不需要NumPy）"""
+import math
+import random
+from fractions import Fraction
+
+import pytest
+
+import icon_pixels
+
+# (宽, 高, 新宽, 新高)：整数倍缩小、带余数的缩小、放大、两个方向不同
+SIZES = [(32, 32, 16, 16), (40, 40, 16, 16), (33, 33, 32, 32), (20, 13, 7, 9),
+         (16, 16, 32, 32), (5, 5, 17, 17), (37, 29, 37, 11)]
+
+
+def random_bgra(width, height, seed=0):
+    rnd = random.Random(seed)
+    data = bytearray(rnd.randrange(256) for _ in range(width * height * 4))
+    # 完全透明、完全不透明和半透明的像素都要有
+    data[3::4] = bytes(rnd.choice([0, 255, rnd.randrange(256)]) for _ in range(width * height))
+    return bytes(data)
+
+
+def exact_weights(src, dst):
+    """按定义用分数计算的权重：缩小为区域平均，放大为像素中心对齐的双线性插值"""
+    scale = Fraction(src, dst)
+    weights = []
+    for i in range(dst):
+        if dst <= src:
+            start, end = i * scale, (i + 1) * scale
+            taps = [(j, (min(end, j + 1) - max(start, j)) / scale) for j in range(math.floor(start), math.ceil(end))]
+        else:
+            center = (i + Fraction(1, 2)) * scale - Fraction(1, 2)
+            j = math.floor(center)
+            frac = center - j
+            taps = [(min(max(j, 0), src - 1), 1 - frac), (min(max(j + 1, 0), src - 1), frac)]
+        weights.append(taps)
+    return weights
+
+
+def exact_scale(data, width, height, new_width, new_height):
+    half = Fraction(1, 2)
+    out = bytearray()
+    for y_taps in exact_weights(height, new_height):
+        for x_taps in exact_weights(width, new_width):
+            sums = [Fraction(0)] * 4
+            for y, wy in y_taps:
+                for x, wx in x_taps:
+                    b, g, r, a = data[(y * width + x) * 4:(y * width + x) * 4 + 4]
+                    w = wx * wy
+                    sums = [sums[0] + w * b * a, sums[1] + w * g * a, sums[2] + w * r * a, sums[3] + w * a]
+            alpha = sums[3]
+            out.extend(min(255, math.floor(c / alpha + half)) if alpha > half else 0 for c in sums[:3])
+            out.append(min(255, math.floor(alpha + half)))
+    return bytes(out)
+
+
+@pytest.mark.parametrize("width, height, new_width, new_height", SIZES)
+def test_pure_matches_exact(width, height, new_width, new_height):
+    data = random_bgra(width, height)
+    expected = exact_scale(data, width, height, new_width, new_height)
+    assert icon_pixels.scale_bgra(data, width, height, new_width, new_height, use_numpy=False) == expected
+
+
+def test_edge_pixels_are_kept():
+    # 100 -> 32 不是整数倍：最右一列和最下一行的像素也要计入
+    data = bytearray(random_bgra(100, 100, seed=2))
+    before = icon_pixels.scale_bgra(bytes(data), 100, 100, 32, 32, use_numpy=False)
+    data[-4:] = b"\xff\xff\xff\xff" if data[-4:] != b"\xff\xff\xff\xff" else b"\x00\x00\x00\xff"
+    after = icon_pixels.scale_bgra(bytes(data), 100, 100, 32, 32, use_numpy=False)
+    assert before[:-4] == after[:-4]
+    assert before[-4:] != after[-4:]
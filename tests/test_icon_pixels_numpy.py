@@ -0,0 +1,14 @@
+"""icon_pixels：NumPy和纯Python的缩放结果逐字节一致（没有安装NumPy时跳过整个文件）"""
+import pytest
+
+pytest.importorskip("numpy")
+
+import icon_pixels
+from test_icon_pixels import SIZES, random_bgra
+
+
+@pytest.mark.parametrize("width, height, new_width, new_height", SIZES + [(256, 256, 48, 48), (100, 100, 32, 32)])
+def test_numpy_matches_pure(width, height, new_width, new_height):
+    data = random_bgra(width, height, seed=1)
+    pure = icon_pixels.scale_bgra(data, width, height, new_width, new_height, use_numpy=False)
+    assert icon_pixels.scale_bgra(data, width, height, new_width, new_height, use_numpy=True) == pure
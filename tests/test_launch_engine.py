@@ -0,0 +1,95 @@
+"""launch_engine：启动参数的缓存和重新构建、占位符、工作目录和环境变量"""
+import json
+import os
+import sys
+
+import pytest
+
+import launch_engine
+
+# 子进程把工作目录、参数和环境变量写入第一个参数指定的文件
+CHILD = ("import json, os, sys; json.dump({'cwd': os.getcwd(), 'argv': sys.argv[2:], "
+         "'set': os.environ.get('AL_SET'), 'kept': os.environ.get('AL_KEPT'), "
+         "'removed': os.environ.get('AL_REMOVED')}, open(sys.argv[1], 'w'))")
+
+
+@pytest.fixture
+def env(monkeypatch):
+    monkeypatch.setenv("AL_KEPT", "kept")
+    monkeypatch.setenv("AL_REMOVED", "removed")
+    monkeypatch.setenv("AL_BASE", "base")
+
+
+def run_child(engine, name, app_data):
+    process, elapsed = engine.launch(name, app_data)
+    assert process.wait(timeout=30) == 0
+    assert elapsed >= 0
+    with open(app_data["args"][2], encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_spec_is_cached_until_entry_changes():
+    engine = launch_engine.LaunchEngine()
+    app_data = {"app_path": "/opt/game/game", "args": ["-a"]}
+    spec = engine.spec("Game", app_data)
+    assert engine.spec("Game", dict(app_data)) is spec
+    assert engine.builds == 1
+
+    changed = dict(app_data, args=["-b"])
+    assert engine.spec("Game", changed).argv[1:] == ["-b"]
+    assert engine.spec("Game", dict(changed, env={"X": "1"})).env is not None
+    assert engine.builds == 3
+
+    engine.forget("Game")
+    engine.spec("Game", changed)
+    assert engine.builds == 4
+
+
+def test_placeholders_in_args(tmp_path):
+    app_path = str(tmp_path / "game")
+    spec = launch_engine.build_spec("Game", {
+        "app_path": app_path, "env_path": str(tmp_path),
+        "args": ["{app_dir}/mods", "--name={name}", "{unknown}", "{env_path}"],
+    })
+    assert spec.argv == [app_path, f"{tmp_path}/mods", "--name=Game", "{unknown}", str(tmp_path)]
+    assert spec.cwd == str(tmp_path)
+    assert spec.env is None
+
+
+def test_string_args_are_split():
+    spec = launch_engine.build_spec("Game", {"app_path": "/opt/game", "args": '-w "two words"'})
+    assert spec.argv[1:] == ["-w", "two words"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="环境变量按 bytes 预先编码")
+def test_env_overrides_are_built_once(env):
+    spec = launch_engine.build_spec("Game", {
+        "app_path": "/opt/game", "env": {"AL_SET": "${AL_BASE}-{name}", "AL_REMOVED": None},
+    })
+    assert spec.env[b"AL_SET"] == b"base-Game"
+    assert spec.env[b"AL_KEPT"] == b"kept"
+    assert b"AL_REMOVED" not in spec.env
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="子进程用 sys.executable 启动")
+@pytest.mark.parametrize("with_cwd", [False, True])
+def test_child_gets_cwd_and_env(tmp_path, env, with_cwd):
+    work = tmp_path / "work"
+    work.mkdir()
+    app_data = {
+        "app_path": sys.executable,
+        "args": ["-c", CHILD, str(tmp_path / "out.json"), "{name}"],
+        "env": {"AL_SET": "${AL_BASE}", "AL_REMOVED": None},
+    }
+    if with_cwd:
+        app_data["env_path"] = str(work)
+    engine = launch_engine.LaunchEngine()
+    result = run_child(engine, "Game", app_data)
+
+    assert result["argv"] == ["Game"]
+    assert result["set"] == "base"
+    assert result["kept"] == "kept"
+    assert result["removed"] is None
+    expected_cwd = str(work) if with_cwd else os.getcwd()
+    assert os.path.realpath(result["cwd"]) == os.path.realpath(expected_cwd)
+    assert engine.stats()["launches"] == 1
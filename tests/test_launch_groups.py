@@ -0,0 +1,120 @@
+"""launch_groups：按依赖顺序启动、拒绝循环依赖、失败的成员不启动依赖它的成员"""
+import pytest
+
+import launch_groups
+
+CATALOG = {name: {"app_path": f"/opt/{name}"} for name in ("game", "mods", "pad", "overlay", "chat")}
+CATALOG["nested"] = {"app_path": "", "group": ["game"]}
+
+
+def parse(members):
+    return launch_groups.parse_group("Group", members, CATALOG)
+
+
+def test_members_are_ordered_by_dependencies():
+    order = parse([
+        {"app": "overlay", "after": ["game"]},
+        {"app": "game", "after": ["mods", "pad"]},
+        "mods",
+        {"app": "pad"},
+        {"app": "chat", "after": "mods"},
+    ])
+    apps = [member.app for member in order]
+    assert set(apps[:2]) == {"mods", "pad"}
+    for member in order:
+        assert all(apps.index(dependency) < apps.index(member.app) for dependency in member.after)
+
+
+@pytest.mark.parametrize("members, message", [
+    ([{"app": "game", "after": ["mods"]}, {"app": "mods", "after": ["pad"]}, {"app": "pad", "after": ["game"]}],
+     "循环依赖"),
+    ([{"app": "game", "after": ["game"]}], "循环依赖"),
+    ([{"app": "game", "after": ["chat"]}], "不是组成员"),
+    (["game", "game"], "重复"),
+    (["missing"], "不存在"),
+    (["nested"], "不能包含启动组"),
+    ([], "没有成员"),
+    ([{"app": "game", "ready": {"port": 70000}}], "port"),
+    ([{"app": "game", "ready": {"host": "localhost"}}], "host"),
+    ([{"app": "game", "ready": {"process": True}}], "process"),
+])
+def test_invalid_groups_are_rejected(members, message):
+    with pytest.raises(launch_groups.GroupError, match=message):
+        parse(members)
+
+
+def run_group(members, fail=(), running=()):
+    """用记录调用顺序的 spawn 运行启动组"""
+    spawned = []
+
+    def spawn(app):
+        if app in fail:
+            raise OSError("找不到文件")
+        spawned.append(app)
+
+    run = launch_groups.GroupRun("Group", parse(members), spawn,
+                                 running=lambda app: object() if app in running else None)
+    run.start()
+    return run, spawned
+
+
+def test_dependents_start_after_dependency_is_ready(tmp_path):
+    flag = tmp_path / "ready.flag"
+    run, spawned = run_group([
+        {"app": "mods", "ready": {"file": str(flag), "timeout": 30}},
+        {"app": "game", "after": ["mods"]},
+        "pad",
+    ])
+    assert sorted(spawned) == ["mods", "pad"]
+    run.poll()
+    assert run.by_app["game"].state == launch_groups.WAITING and not run.done
+
+    flag.touch()
+    run.wait()
+    assert spawned[-1] == "game"
+    assert run.ok
+    assert run.by_app["game"].started >= run.by_app["mods"].finished
+
+
+def test_failed_member_skips_its_dependents():
+    run, spawned = run_group([
+        "mods",
+        {"app": "game", "after": ["mods"]},
+        {"app": "overlay", "after": ["game"]},
+        {"app": "pad"},
+    ], fail={"mods"})
+    assert run.done and not run.ok
+    assert spawned == ["pad"]
+    states = {member.app: member.state for member in run.members}
+    assert states == {"mods": launch_groups.FAILED, "game": launch_groups.SKIPPED,
+                      "overlay": launch_groups.SKIPPED, "pad": launch_groups.READY}
+    assert "找不到文件" in run.by_app["mods"].message
+
+
+def test_running_members_are_not_started_again():
+    run, spawned = run_group(["mods", {"app": "game", "after": ["mods"]}], running={"mods"})
+    assert run.ok
+    assert spawned == ["game"]
+    assert run.by_app["mods"].message == "已在运行"
+
+
+def test_timeout_fails_member(tmp_path):
+    run, spawned = run_group([
+        {"app": "mods", "ready": {"file": str(tmp_path / "never"), "timeout": 0.1}},
+        {"app": "game", "after": ["mods"]},
+    ])
+    run.wait()
+    assert run.by_app["mods"].state == launch_groups.FAILED
+    assert "超时" in run.by_app["mods"].message
+    assert run.by_app["game"].state == launch_groups.SKIPPED and spawned == ["mods"]
+
+
+def test_cancel_skips_waiting_members(tmp_path):
+    run, spawned = run_group([
+        {"app": "mods", "ready": {"file": str(tmp_path / "never")}},
+        {"app": "game", "after": ["mods"]},
+    ])
+    run.cancel()
+    run.wait()
+    assert run.by_app["game"].state == launch_groups.SKIPPED
+    assert run.by_app["mods"].message == "已取消"
@@ -0,0 +1,44 @@
+"""AppLauncher 启动请求：路径检查完成后启动，检查一直没有结果时超时报错（使用无界面Tk替身）"""
+import threading
+
+import AppLauncher
+import path_health
+from conftest import wait_for
+
+
+def no_icons(self, app_path, size=None):
+    return None
+
+
+def test_launch_waits_for_path_check(make_app, monkeypatch):
+    app = make_app(no_icons)
+    spawned = []
+    monkeypatch.setattr(app, "spawn_tracked", lambda name, requested=None: spawned.append(name) or (None, 0.001))
+    app.health.results.clear()
+
+    replies = []
+    app.request_launch("Steam", replies.append)
+    assert app.pending_launches and not spawned
+    wait_for(lambda: replies, app)
+    assert spawned == ["Steam"]
+    assert replies[0]["code"] == AppLauncher.EXIT_OK
+
+
+def test_hung_path_check_times_out(make_app, monkeypatch):
+    release = threading.Event()
+    check_path = path_health.check_path
+    monkeypatch.setattr(path_health, "check_path", lambda path, kind: release.wait() and check_path(path, kind))
+    monkeypatch.setattr(AppLauncher, "HEALTH_LAUNCH_TIMEOUT_MS", 100)
+    try:
+        app = make_app(no_icons)
+        spawned = []
+        monkeypatch.setattr(app, "spawn_tracked", lambda name, requested=None: spawned.append(name) or (None, 0.001))
+
+        replies = []
+        app.request_launch("Steam", replies.append)
+        wait_for(lambda: replies, app)
+        assert replies[0]["code"] == AppLauncher.EXIT_LAUNCH_FAILED
+        assert "超时" in replies[0]["message"]
+        assert not app.pending_launches and not spawned
+    finally:
+        release.set()
@@ -0,0 +1,83 @@
+"""list_diff：差异操作应用到旧列表后得到新列表，移动次数最少"""
+import random
+
+import list_diff
+
+
+def apply_diff(old, diff):
+    """按 AppLauncher.update_app_list 的顺序执行差异操作"""
+    rows = [iid for iid in old if iid not in set(diff.deletes)]
+    moved = {iid for iid, index in diff.moves}
+    rows = [iid for iid in rows if iid not in moved]
+    for iid, index, is_move in diff.placements():
+        rows.insert(index, iid)
+    return rows
+
+
+def test_identical_lists_touch_nothing():
+    diff = list_diff.diff_rows(list("abcde"), list("abcde"))
+    assert (diff.deletes, diff.moves, diff.inserts) == ([], [], [])
+    assert diff.touched == 0
+
+
+def test_filter_only_deletes():
+    diff = list_diff.diff_rows(list("abcde"), list("ace"))
+    assert diff.deletes == ["b", "d"]
+    assert diff.moves == [] and diff.inserts == []
+    assert diff.touched == 2
+
+
+def test_clear_filter_only_inserts():
+    diff = list_diff.diff_rows(list("ace"), list("abcde"))
+    assert diff.inserts == [("b", 1), ("d", 3)]
+    assert diff.deletes == [] and diff.moves == []
+
+
+def test_single_row_moved_to_front():
+    diff = list_diff.diff_rows(list("abcde"), list("eabcd"))
+    assert diff.moves == [("e", 0)]
+    assert diff.touched == 1
+    assert apply_diff(list("abcde"), diff) == list("eabcd")
+
+
+def test_reversed_list_keeps_one_row():
+    old = list("abcdef")
+    diff = list_diff.diff_rows(old, old[::-1])
+    assert len(diff.moves) == len(old) - 1
+    assert apply_diff(old, diff) == old[::-1]
+
+
+def test_placements_are_sorted_by_index():
+    diff = list_diff.diff_rows(list("abcd"), list("xdcbay"))
+    indexes = [index for iid, index, is_move in diff.placements()]
+    assert indexes == sorted(indexes)
+    assert {iid for iid, index, is_move in diff.placements() if is_move} == {iid for iid, index in diff.moves}
+
+
+def test_random_lists_round_trip():
+    rnd = random.Random(0)
+    names = [f"app{i}" for i in range(60)]
+    for _ in range(300):
+        old = rnd.sample(names, rnd.randint(0, len(names)))
+        new = rnd.sample(names, rnd.randint(0, len(names)))
+        diff = list_diff.diff_rows(old, new)
+        assert apply_diff(old, diff) == new
+
+        # 保持不动的行是最长的相对顺序不变的子序列
+        kept = [iid for iid in old if iid in set(new)]
+        stable = len(kept) - len(diff.moves)
+        assert stable == longest_common_order(kept, new)
+        assert len(diff.deletes) == len(set(old) - set(new))
+        assert len(diff.inserts) == len(set(new) - set(old))
+
+
+def longest_common_order(kept, new):
+    """kept 中相对顺序与 new 一致的最长子序列长度（动态规划，仅用于验证）"""
+    position = {iid: i for i, iid in enumerate(new)}
+    seq = [position[iid] for iid in kept]
+    best = [1] * len(seq)
+    for i in range(len(seq)):
+        for j in range(i):
+            if seq[j] < seq[i]:
+                best[i] = max(best[i], best[j] + 1)
+    return max(best, default=0)
@@ -0,0 +1,58 @@
+"""prefetch：字节数上限和取消对启动组的全部成员生效"""
+import prefetch
+
+
+def make_targets(tmp_path, count, size):
+    targets = []
+    for i in range(count):
+        folder = tmp_path / f"app{i}"
+        folder.mkdir()
+        app_path = folder / "app.bin"
+        app_path.write_bytes(b"\0" * size)
+        targets.append((str(app_path), ""))
+    return targets
+
+
+def counting_plan(monkeypatch):
+    planned = []
+    plan = prefetch.plan
+
+    def wrapper(app_path, env_path, *args, **kwargs):
+        planned.append(app_path)
+        return plan(app_path, env_path, *args, **kwargs)
+
+    monkeypatch.setattr(prefetch, "plan", wrapper)
+    return planned
+
+
+def test_byte_limit_stops_remaining_members(tmp_path, monkeypatch):
+    planned = counting_plan(monkeypatch)
+    targets = make_targets(tmp_path, 3, 4096)
+    prefetcher = prefetch.Prefetcher(max_bytes=4096)
+    prefetcher._prefetch(targets, prefetcher.generation, bytearray(prefetch.PREFETCH_CHUNK))
+
+    # 第一个成员用完了上限，后面的成员不再解析导入表
+    assert planned == [targets[0][0]]
+    assert (prefetcher.requests, prefetcher.files, prefetcher.bytes) == (1, 1, 4096)
+
+
+def test_cancelled_request_plans_nothing(tmp_path, monkeypatch):
+    planned = counting_plan(monkeypatch)
+    targets = make_targets(tmp_path, 3, 16)
+    prefetcher = prefetch.Prefetcher()
+    generation = prefetcher.generation
+    prefetcher.cancel()
+    prefetcher._prefetch(targets, generation, bytearray(prefetch.PREFETCH_CHUNK))
+
+    assert planned == []
+    assert (prefetcher.requests, prefetcher.files) == (1, 0)
+
+
+def test_members_share_the_byte_limit(tmp_path, monkeypatch):
+    planned = counting_plan(monkeypatch)
+    targets = make_targets(tmp_path, 3, 100)
+    prefetcher = prefetch.Prefetcher(max_bytes=250)
+    prefetcher._prefetch(targets, prefetcher.generation, bytearray(prefetch.PREFETCH_CHUNK))
+
+    assert planned == [path for path, _ in targets]
+    assert (prefetcher.files, prefetcher.bytes) == (3, 250)
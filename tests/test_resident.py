@@ -0,0 +1,66 @@
+"""常驻模式：同时启动的多个实例只有一个开始监听"""
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+import resident
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="Unix套接字")
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return str(tmp_path / "apps.json")
+
+
+def test_concurrent_start_has_one_listener(data_file):
+    servers = [resident.ResidentServer(data_file) for _ in range(8)]
+    barrier = threading.Barrier(len(servers))
+    started = []
+
+    def start(server):
+        barrier.wait()
+        if server.start():
+            started.append(server)
+
+    threads = [threading.Thread(target=start, args=(server,)) for server in servers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        assert len(started) == 1
+        reply = []
+        client = threading.Thread(target=lambda: reply.append(resident.send(data_file, {"cmd": "ping"})))
+        client.start()
+        # 未取得监听的实例启动时发出的 ping 也会排队，一并回复
+        while client.is_alive():
+            for request, respond in started[0].pending():
+                assert request == {"cmd": "ping"}
+                respond({"ok": True, "code": 0, "message": "pong"})
+        assert reply[0]["message"] == "pong"
+    finally:
+        for server in started:
+            server.close()
+    assert not os.path.exists(resident.address(data_file))
+
+
+def test_stale_socket_file_is_replaced(data_file):
+    path = resident.address(data_file)
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    server = resident.ResidentServer(data_file)
+    assert server.start()
+    try:
+        # 锁由运行中的实例持有时，第二个实例不会删除它的套接字文件
+        assert not resident.ResidentServer(data_file).start()
+        assert os.path.exists(path)
+    finally:
+        server.close()
@@ -0,0 +1,72 @@
+"""search_index：匹配等级的顺序、拼音首字母、使用频率排序和只取前N个结果"""
+import random
+import time
+
+import search_index
+
+
+def make_index(names):
+    index = search_index.SearchIndex()
+    for name in names:
+        index.add(name)
+    return index
+
+
+def test_pinyin_initials():
+    assert search_index.pinyin_initials("微信") == "wx"
+    assert search_index.pinyin_initials("网易云音乐") == "wyyyl"
+    # 字母数字原样保留（小写），空格和符号去掉
+    assert search_index.pinyin_initials("QQ音乐 2") == "qqyl2"
+
+
+def test_short_query_tiers():
+    index = make_index(["Word", "Windows Xbox", "企业微信", "微信", "Pywxtools", "WxWork", "wx"])
+    # 完全匹配、前缀、子串、拼音首字母前缀、拼音首字母子串、模糊（子序列）
+    assert index.search("wx") == ["wx", "WxWork", "Pywxtools", "微信", "企业微信", "Windows Xbox"]
+    assert index.search("wx", fuzzy=False) == ["wx", "WxWork", "Pywxtools", "微信", "企业微信"]
+
+
+def test_long_query_tiers():
+    index = make_index(["Yay Yolo", "网易云音乐", "一一音乐", "MyYYYL", "yyylPlayer", "yyyl", "Other"])
+    assert len("yyyl") > search_index.GRAM_SIZE
+    assert index.search("YYYL") == ["yyyl", "yyylPlayer", "MyYYYL", "一一音乐", "网易云音乐", "Yay Yolo"]
+
+
+def test_frequently_used_apps_rank_first_within_tier():
+    index = make_index(["WxA", "WxB", "WxC", "wx"])
+    now = time.time()
+    index.record_use("WxC", 5, now)
+    index.record_use("WxB", 1, now)
+    # 等级优先于使用频率
+    index.add("Pywx", 100, now)
+    assert index.search("wx") == ["wx", "WxC", "WxB", "WxA", "Pywx"]
+
+
+def test_limit_returns_prefix_of_full_ranking():
+    rng = random.Random(5)
+    names = [f"{rng.choice(['app', 'tool', 'game'])}{i:03}" for i in range(300)]
+    index = search_index.SearchIndex()
+    now = time.time()
+    index.add_many((name, rng.choice([0, 0, 1, 3]), now - rng.random() * 1e6) for name in names)
+    for query in ["a", "ap", "app", "app1", "o", "g0", "tol", "zzz"]:
+        full = index.search(query)
+        for limit in (1, 5, 20, 500):
+            assert index.search(query, limit) == full[:limit]
+
+
+def test_deferred_bulk_add_matches_individual_adds():
+    names = [f"应用{i}" if i % 3 == 0 else f"App {i}" for i in range(search_index.INSORT_LIMIT * 3)]
+    bulk = search_index.SearchIndex()
+    bulk.add_many((name, 0, None) for name in names)
+    assert bulk.unindexed
+    single = make_index(names)
+    for query in ["app", "yy", "1", "app 12", "yy5"]:
+        assert bulk.search(query) == single.search(query)
+
+
+def test_removed_apps_are_not_found():
+    index = make_index(["微信", "WxWork", "wx"])
+    index.remove("微信")
+    index.remove("wx")
+    assert index.search("wx") == ["WxWork"]
+    assert index.sorted_names == ["WxWork"]
@@ -0,0 +1,80 @@
+"""supervisor：等待线程回收退出的子进程，主线程取出就绪和退出记录"""
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import supervisor
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="Windows上要等进程就绪")
+
+
+def start(code):
+    return subprocess.Popen([sys.executable, "-c", code])
+
+
+def drain_until(sup, exits, timeout=30):
+    """取出事件直到收到 exits 个退出事件"""
+    events = []
+    deadline = time.monotonic() + timeout
+    while sum(event == supervisor.EVENT_EXIT for event, _ in events) < exits:
+        assert time.monotonic() < deadline, events
+        events += sup.drain()
+        time.sleep(0.01)
+    return events
+
+
+def test_exit_is_reaped_and_recorded():
+    sup = supervisor.Supervisor()
+    child = sup.register("Game", start("import sys; sys.exit(3)"), tag={"seq": 7})
+    assert sup.state("Game") == "running"
+
+    events = drain_until(sup, 1)
+    assert events == [(supervisor.EVENT_READY, child), (supervisor.EVENT_EXIT, child)]
+    assert child.returncode == 3 and child.crashed
+    assert child.ready == child.started and child.ended >= child.started
+    # 等待线程已经回收了子进程，不会留下僵尸进程
+    with pytest.raises(ChildProcessError):
+        os.waitpid(child.pid, 0)
+
+    assert sup.state("Game") == "exited"
+    assert sup.last_exit("Game") is child
+    assert not sup.busy()
+    assert (sup.launched, sup.reaped) == (1, 1)
+    snapshot = sup.snapshot()
+    assert snapshot["running"] == []
+    assert snapshot["exited"][0]["returncode"] == 3 and not snapshot["exited"][0]["running"]
+
+
+def test_repeated_launches_are_tracked_separately():
+    sup = supervisor.Supervisor()
+    quick = sup.register("Game", start("pass"))
+    slow = sup.register("Game", start("import time; time.sleep(60)"))
+    drain_until(sup, 1)
+
+    # 先退出的实例不影响仍在运行的实例
+    assert quick.returncode == 0 and not quick.crashed
+    assert sup.children("Game") == [slow]
+    assert sup.state("Game") == "running"
+    assert sup.last_exit("Game") is quick
+
+    slow.process.kill()
+    drain_until(sup, 1)
+    assert slow.returncode < 0
+    assert sup.state("Game") == "exited" and sup.last_exit("Game") is slow
+    assert [child.to_dict()["pid"] for child in sup.history] == [quick.pid, slow.pid]
+
+
+def test_history_keeps_latest_exits():
+    sup = supervisor.Supervisor(history_size=2)
+    children = [sup.register(f"App{i}", start("pass")) for i in range(3)]
+    drain_until(sup, 3)
+    assert len(sup.history) == 2
+    assert set(sup.history) < set(children)
+    # 每个应用最近一次的退出记录不受历史长度限制
+    assert all(sup.last_exit(f"App{i}") is children[i] for i in range(3))
+
+    sup.forget("App0")
+    assert sup.state("App0") is None
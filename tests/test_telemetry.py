@@ -0,0 +1,82 @@
+"""启动统计环形文件：写满后覆盖最旧的记录、写了一半的记录、多个进程交替写入"""
+import threading
+
+import pytest
+
+import telemetry
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "launch_stats.bin")
+
+
+def test_ring_wraps_around_keeping_newest(path):
+    stats = telemetry.Telemetry(path, capacity=4)
+    seqs = [stats.record_launch("app", 1.0, 2.0, when=1000 + i) for i in range(6)]
+    stats.record_exit(seqs[-1], "app", 30.0, 0)
+    stats.close()
+
+    reopened = telemetry.Telemetry(path, capacity=99)
+    assert (reopened.capacity, reopened.count, reopened.head, reopened.seq) == (4, 4, 3, 6)
+    # 最旧的三条启动记录被覆盖，退出记录关联到最后一次启动
+    history = reopened.history("app")
+    assert [launch.time for launch in history] == [1003, 1004, 1005]
+    assert history[-1].session == 30.0 and history[-1].returncode == 0
+
+
+def test_torn_record_after_last_header_is_ignored(path):
+    stats = telemetry.Telemetry(path, capacity=8)
+    for i in range(3):
+        stats.record_launch("app", 1.0, 2.0, when=1000 + i)
+    stats.close()
+
+    # 写第四条记录时崩溃：只写了半条，文件头还没有更新
+    with open(path, 'ab') as f:
+        f.write(telemetry.RECORD.pack(telemetry.KIND_LAUNCH, 3, telemetry.app_key("app"),
+                                      2000, 1.0, 2.0, 3.0, telemetry.NAN, 0)[:20])
+    reopened = telemetry.Telemetry(path)
+    assert [launch.time for launch in reopened.history("app")] == [1000, 1001, 1002]
+
+    # 下一次写入覆盖写了一半的记录
+    reopened.record_launch("app", 1.0, 2.0, when=1003)
+    reopened.close()
+    assert [launch.time for launch in telemetry.Telemetry(path).history("app")] == [1000, 1001, 1002, 1003]
+
+
+def test_record_cut_short_by_truncated_file_is_dropped(path):
+    stats = telemetry.Telemetry(path, capacity=8)
+    for i in range(3):
+        stats.record_launch("app", 1.0, 2.0, when=1000 + i)
+    stats.close()
+
+    # 文件头已经计入最后一条记录，但文件末尾丢失了一部分
+    with open(path, 'r+b') as f:
+        f.truncate(telemetry.HEADER.size + 3 * telemetry.RECORD.size - 10)
+    assert [launch.time for launch in telemetry.Telemetry(path).history("app")] == [1000, 1001]
+
+
+def test_interleaved_writers_do_not_overwrite_each_other(path):
+    # 界面和命令行进程各自打开统计文件，交替记录启动
+    writers = [telemetry.Telemetry(path, capacity=1024) for _ in range(2)]
+    barrier = threading.Barrier(len(writers))
+    seqs = [[] for _ in writers]
+
+    def run(index):
+        barrier.wait()
+        for i in range(200):
+            seqs[index].append(writers[index].record_launch(f"app{index}", 1.0, 2.0, when=i))
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(len(writers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for writer in writers:
+        writer.close()
+
+    assert len(set(seqs[0]) | set(seqs[1])) == 400
+    reopened = telemetry.Telemetry(path)
+    assert reopened.count == 400
+    for index in range(len(writers)):
+        assert [launch.time for launch in reopened.history(f"app{index}")] == list(range(200))
@@ -0,0 +1,150 @@
+"""无界面的Tk替身：没有显示器时运行基准测试（benchmark.py --tk stub）和测试
+
+只实现启动器用到的部分：控件保存配置，Treeview保存行和行顺序，after回调在 update() 时执行。
+"""
+import sys
+import time
+import types
+
+
+class _StubWidget:
+    """无界面的Tk控件替身：保存配置，其余方法什么都不做"""
+
+    def __init__(self, master=None, **options):
+        self.options = dict(options)
+
+    def __getattr__(self, name):
+        return _noop
+
+    def cget(self, key):
+        return self.options.get(key, "")
+
+    def configure(self, *args, **options):
+        self.options.update(options)
+
+    config = configure
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+class _StubTreeview(_StubWidget):
+    """保存行和行顺序的Treeview替身，插入、移动、删除的开销与行数相关"""
+
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self.items = {}
+        self.children = []
+        self.selected = ()
+        self.count = 0
+
+    def insert(self, parent, index, iid=None, **options):
+        if iid is None:
+            self.count += 1
+            iid = f"I{self.count:03X}"
+        self.items[iid] = options
+        self.children.insert(len(self.children) if index == "end" else index, iid)
+        return iid
+
+    def item(self, iid, **options):
+        self.items[iid].update(options)
+
+    def exists(self, iid):
+        return iid in self.items
+
+    def detach(self, *iids):
+        for iid in iids:
+            if iid in self.children:
+                self.children.remove(iid)
+
+    def delete(self, *iids):
+        self.detach(*iids)
+        for iid in iids:
+            del self.items[iid]
+
+    def move(self, iid, parent, index):
+        self.detach(iid)
+        self.children.insert(index, iid)
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, *iids):
+        self.selected = iids
+
+    def selection_remove(self, *iids):
+        self.selected = ()
+
+
+class _StubTk(_StubWidget):
+    """Tk根窗口替身：after回调在 update() 时执行"""
+
+    def __init__(self):
+        super().__init__()
+        self.tk = types.SimpleNamespace(call=lambda *args: 96 / 72)
+        self.callbacks = {}
+        self.count = 0
+
+    def after(self, ms, func=None, *args):
+        self.count += 1
+        after_id = f"after#{self.count}"
+        self.callbacks[after_id] = (time.perf_counter() + ms / 1000, func, args)
+        return after_id
+
+    def after_cancel(self, after_id):
+        self.callbacks.pop(after_id, None)
+
+    def update(self):
+        now = time.perf_counter()
+        for after_id, (due, func, args) in list(self.callbacks.items()):
+            if due <= now and self.callbacks.pop(after_id, None) is not None:
+                func(*args)
+
+
+class _StubStringVar:
+    def __init__(self, value=""):
+        self.value = value
+        self.traces = []
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+        for callback in self.traces:
+            callback("", "", "w")
+
+    def trace(self, mode, callback):
+        self.traces.append(callback)
+
+
+class _StubPhotoImage:
+    def __init__(self, data=None, width=0, height=0, **options):
+        self.data = data
+
+
+def install():
+    """用无界面替身替换 tkinter 模块（必须在第一次使用Tk之前调用）"""
+    tk = types.ModuleType("tkinter")
+    tk.Tk = _StubTk
+    tk.StringVar = _StubStringVar
+    tk.PhotoImage = _StubPhotoImage
+    tk.TclError = type("TclError", (Exception,), {})
+    for name in ("W", "E", "N", "S", "X", "LEFT", "VERTICAL", "DISABLED", "NORMAL"):
+        setattr(tk, name, name.lower())
+
+    ttk = types.ModuleType("tkinter.ttk")
+    for name in ("Style", "Frame", "Label", "LabelFrame", "Entry", "Button", "Separator", "Scrollbar"):
+        setattr(ttk, name, _StubWidget)
+    ttk.Treeview = _StubTreeview
+
+    messagebox = types.ModuleType("tkinter.messagebox")
+    messagebox.showerror = messagebox.showinfo = messagebox.showwarning = _noop
+    messagebox.askyesno = lambda *args, **kwargs: True
+    filedialog = types.ModuleType("tkinter.filedialog")
+    filedialog.askdirectory = filedialog.askopenfilename = lambda *args, **kwargs: ""
+
+    tk.ttk, tk.messagebox, tk.filedialog = ttk, messagebox, filedialog
+    sys.modules.update({"tkinter": tk, "tkinter.ttk": ttk,
+                        "tkinter.messagebox": messagebox, "tkinter.filedialog": filedialog})
@@ -0,0 +1,111 @@
+"""界面事件合并：鼠标移动、滚动、改变大小、输入等高频事件每帧最多处理一次"""
+import traceback
+
+# 一帧的时间（毫秒），约60帧每秒
+FRAME_MS = 16
+
+
+class FrameScheduler:
+    """按名称合并回调：同一名称在一帧内多次提交时只执行最后一次提交的回调"""
+
+    def __init__(self, root, frame_ms=FRAME_MS):
+        self.root = root
+        self.frame_ms = frame_ms
+
+        # 名称 -> (回调, 参数)，在下一帧执行
+        self.pending = {}
+        self.frame_id = None
+        # 名称 -> after id，输入停顿后才执行的回调
+        self.delayed = {}
+        # 名称 -> 上次处理的结果，结果不变时跳过
+        self.last = {}
+
+        # 统计：提交、执行、被合并、因结果不变而跳过的次数
+        self.posted = 0
+        self.dispatched = 0
+        self.coalesced = 0
+        self.unchanged = 0
+
+    def post(self, name, callback, *args, delay=None):
+        """提交回调；delay 为毫秒数时等停顿 delay 后再执行，期间再次提交会重新计时"""
+        self.posted += 1
+        if name in self.pending or name in self.delayed:
+            self.coalesced += 1
+
+        if delay is not None:
+            after_id = self.delayed.pop(name, None)
+            if after_id is not None:
+                self.root.after_cancel(after_id)
+            self.delayed[name] = self.root.after(delay, self._run_delayed, name, callback, args)
+            return
+
+        self.pending[name] = (callback, args)
+        if self.frame_id is None:
+            self.frame_id = self.root.after(self.frame_ms, self._run_frame)
+
+    def _run_frame(self):
+        self.frame_id = None
+        pending, self.pending = self.pending, {}
+        for name, (callback, args) in pending.items():
+            self._dispatch(name, callback, args)
+
+    def _run_delayed(self, name, callback, args):
+        self.delayed.pop(name, None)
+        self._dispatch(name, callback, args)
+
+    def _dispatch(self, name, callback, args):
+        self.dispatched += 1
+        try:
+            callback(*args)
+        except Exception:
+            # 一个回调出错不影响同一帧的其他回调
+            print(f"界面事件处理出错 {name}:")
+            traceback.print_exc()
+
+    def changed(self, name, value):
+        """记录 name 的最新结果，与上次相同时返回False（计为跳过）"""
+        if name in self.last and self.last[name] == value:
+            self.unchanged += 1
+            return False
+        self.last[name] = value
+        return True
+
+    def remember(self, name, value):
+        """记录 name 的结果（例如界面已经在别处按这个结果更新过）"""
+        self.last[name] = value
+
+    def forget(self, name):
+        """清除 name 的结果，下次一定执行"""
+        self.last.pop(name, None)
+
+    def cancel(self, name):
+        """取消尚未执行的回调"""
+        self.pending.pop(name, None)
+        after_id = self.delayed.pop(name, None)
+        if after_id is not None:
+            self.root.after_cancel(after_id)
+
+    def flush(self):
+        """立即执行下一帧的回调"""
+        if self.frame_id is not None:
+            self.root.after_cancel(self.frame_id)
+            self._run_frame()
+
+    def shutdown(self):
+        """取消所有尚未执行的回调"""
+        for name in list(self.delayed):
+            self.cancel(name)
+        self.pending.clear()
+        if self.frame_id is not None:
+            self.root.after_cancel(self.frame_id)
+            self.frame_id = None
+
+    def stats(self):
+        """事件统计：dropped 为被合并和因结果不变而跳过的次数"""
+        return {
+            "posted": self.posted,
+            "dispatched": self.dispatched,
+            "coalesced": self.coalesced,
+            "unchanged": self.unchanged,
+            "dropped": self.coalesced + self.unchanged,
+        }
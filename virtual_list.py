@@ -0,0 +1,242 @@
+"""虚拟列表：Treeview只保留可见数量的行，滚动时复用这些行显示不同的数据"""
+from tkinter import ttk
+
+# 键盘导航: 按键 -> 移动的行数或翻页方式
+_NAV_KEYS = {
+    "<Up>": -1,
+    "<Down>": 1,
+    "<Prior>": "page_up",
+    "<Next>": "page_down",
+    "<Home>": "home",
+    "<End>": "end",
+}
+
+
+class VirtualTreeview:
+    """把任意长度的列表映射到固定数量的Treeview行上"""
+
+    def __init__(self, tree, scrollbar, row_data, on_select=None, on_scroll=None, scheduler=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        # row_data(key) -> (text, image, tags)
+        self.row_data = row_data
+        # 提供时滚动和改变大小合并到每帧一次重绘（ui_scheduler.FrameScheduler）
+        self.scheduler = scheduler
+        self.on_select = None
+        self.on_scroll = None
+
+        self.keys = []
+        self.top = 0
+        self.selected = None
+
+        # 复用的Treeview行及其当前显示的数据
+        self.slots = []
+        self.attached = set()
+        self.slot_keys = {}
+        self.key_slots = {}
+
+        # 渲染统计
+        self.renders = 0
+        # 绑定的事件 [(事件, 绑定id)]，destroy() 时解除
+        self.bindings = []
+
+        self.row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+
+        # 列表自己不再滚动，滚动条由虚拟列表控制
+        self.tree.configure(yscrollcommand="")
+        self.scrollbar.configure(command=self.yview)
+
+        self._bind("<Configure>", self._on_configure, add="+")
+        self._bind("<MouseWheel>", self._on_wheel)
+        self._bind("<Button-4>", self._on_wheel)
+        self._bind("<Button-5>", self._on_wheel)
+        for sequence, step in _NAV_KEYS.items():
+            self._bind(sequence, lambda event, step=step: self._on_key(step))
+
+        self._resize(int(self.tree.cget("height")))
+        self.on_select = on_select
+        self.on_scroll = on_scroll
+
+    def _bind(self, sequence, func, add=None):
+        self.bindings.append((sequence, self.tree.bind(sequence, func, add)))
+
+    def destroy(self):
+        """删除复用的行并解除事件绑定，Treeview恢复为普通列表（滚动条命令由调用方重新设置）"""
+        if self.scheduler is not None:
+            self.scheduler.cancel((id(self), "render"))
+            self.scheduler.cancel((id(self), "resize"))
+        for sequence, funcid in self.bindings:
+            self.tree.unbind(sequence, funcid)
+        self.bindings = []
+        if self.slots:
+            self.tree.delete(*self.slots)
+        self.slots = []
+        self.attached = set()
+        self.slot_keys = {}
+        self.key_slots = {}
+        self.on_select = None
+        self.on_scroll = None
+
+    def set_keys(self, keys):
+        """设置列表内容"""
+        self.keys = keys
+        self.render()
+
+    def key_for_row(self, iid):
+        """Treeview行对应的数据"""
+        return self.slot_keys.get(iid)
+
+    def visible_keys(self, overscan=0):
+        """当前可见的数据（含前后 overscan 行）"""
+        start = max(0, self.top - overscan)
+        return self.keys[start:self.top + len(self.slots) + overscan]
+
+    def set_image(self, key, image):
+        """更新某一行的图标（不可见时忽略）"""
+        slot = self.key_slots.get(key)
+        if slot is not None:
+            self.tree.item(slot, image=image)
+
+    def select(self, key):
+        """选择某一行并滚动到可见位置"""
+        self.selected = key
+        if key in self.key_slots:
+            self.render()
+            return
+        try:
+            index = self.keys.index(key)
+        except ValueError:
+            return
+        self.see(index)
+
+    def see(self, index):
+        """滚动使第 index 行可见"""
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + len(self.slots):
+            self.top = index - len(self.slots) + 1
+        self.render()
+
+    def yview(self, *args):
+        """滚动条回调"""
+        count = len(self.keys)
+        page = max(1, len(self.slots))
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * count)
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.top += amount * page if args[2] == "pages" else amount
+        self.schedule_render()
+
+    def schedule_render(self):
+        """连续滚动时每帧只重绘一次"""
+        if self.scheduler is None:
+            self.render()
+        else:
+            self.scheduler.post((id(self), "render"), self.render)
+
+    def render(self):
+        """把当前窗口内的数据写入复用的Treeview行"""
+        count = len(self.keys)
+        self.top = max(0, min(self.top, count - len(self.slots)))
+        self.renders += 1
+
+        self.slot_keys = {}
+        self.key_slots = {}
+        for i, slot in enumerate(self.slots):
+            index = self.top + i
+            if index >= count:
+                if slot in self.attached:
+                    self.tree.detach(slot)
+                    self.attached.discard(slot)
+                continue
+
+            key = self.keys[index]
+            text, image, tags = self.row_data(key)
+            self.tree.item(slot, text=text, image=image, tags=tags)
+            if slot not in self.attached:
+                self.tree.move(slot, "", i)
+                self.attached.add(slot)
+            self.slot_keys[slot] = key
+            self.key_slots[key] = slot
+
+        # 只有选中项可见时才在Treeview中选中对应的行
+        slot = self.key_slots.get(self.selected)
+        current = self.tree.selection()
+        if slot is None:
+            if current:
+                self.tree.selection_remove(*current)
+        elif current != (slot,):
+            self.tree.selection_set(slot)
+
+        if count:
+            self.scrollbar.set(self.top / count, min(1.0, (self.top + len(self.slots)) / count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        if self.on_scroll is not None:
+            self.on_scroll()
+
+    def _resize(self, rows):
+        rows = max(1, rows)
+        if rows == len(self.slots):
+            return
+        while len(self.slots) < rows:
+            slot = self.tree.insert("", "end", iid=f"__row{len(self.slots)}")
+            self.slots.append(slot)
+            self.attached.add(slot)
+        while len(self.slots) > rows:
+            slot = self.slots.pop()
+            self.tree.delete(slot)
+            self.attached.discard(slot)
+        self.render()
+
+    def _on_configure(self, event):
+        rows = event.height // self.row_height
+        if self.scheduler is None:
+            self._resize(rows)
+        else:
+            self.scheduler.post((id(self), "resize"), self._resize, rows)
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            step = -3
+        elif event.num == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        self.top += step
+        self.schedule_render()
+        return "break"
+
+    def _on_key(self, step):
+        count = len(self.keys)
+        if not count:
+            return "break"
+
+        page = max(1, len(self.slots))
+        slot = self.key_slots.get(self.selected)
+        if slot is not None:
+            index = self.top + self.slots.index(slot)
+        elif self.selected in self.keys:
+            index = self.keys.index(self.selected)
+        else:
+            index = self.top - 1
+
+        if step == "page_up":
+            index -= page
+        elif step == "page_down":
+            index += page
+        elif step == "home":
+            index = 0
+        elif step == "end":
+            index = count - 1
+        else:
+            index += step
+        index = max(0, min(index, count - 1))
+
+        self.selected = self.keys[index]
+        self.see(index)
+        if self.on_select is not None:
+            self.on_select(self.selected)
+        return "break"
@@ -0,0 +1,262 @@
+"""Windows API 绑定：结构体和函数原型只在第一次使用时创建一次"""
+import contextlib
+import ctypes
+import threading
+from ctypes import wintypes
+
+SHGFI_ICON = 0x000000100
+SHGFI_LARGEICON = 0x000000000
+SHGFI_SMALLICON = 0x000000001
+
+DIB_RGB_COLORS = 0
+
+GW_OWNER = 4
+SW_RESTORE = 9
+WAIT_OBJECT_0 = 0
+
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+THREAD_MODE_BACKGROUND_END = 0x00020000
+
+CREATE_SUSPENDED = 0x00000004
+PROCESS_SET_INFORMATION = 0x0200
+PROCESS_SUSPEND_RESUME = 0x0800
+PROCESS_QUERY_INFORMATION = 0x0400
+SYNCHRONIZE = 0x00100000
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+# PROCESSINFOCLASS.ProcessIoPriority
+PROCESS_IO_PRIORITY = 33
+
+WNDENUMPROC = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+
+
+class BITMAPINFOHEADER(ctypes.Structure):
+    _fields_ = [
+        ("biSize", wintypes.DWORD),
+        ("biWidth", wintypes.LONG),
+        ("biHeight", wintypes.LONG),
+        ("biPlanes", wintypes.WORD),
+        ("biBitCount", wintypes.WORD),
+        ("biCompression", wintypes.DWORD),
+        ("biSizeImage", wintypes.DWORD),
+        ("biXPelsPerMeter", wintypes.LONG),
+        ("biYPelsPerMeter", wintypes.LONG),
+        ("biClrUsed", wintypes.DWORD),
+        ("biClrImportant", wintypes.DWORD),
+    ]
+
+
+class BITMAPINFO(ctypes.Structure):
+    _fields_ = [("bmiHeader", BITMAPINFOHEADER), ("bmiColors", wintypes.DWORD * 3)]
+
+
+class SHFILEINFO(ctypes.Structure):
+    _fields_ = [
+        ("hIcon", ctypes.c_void_p),
+        ("iIcon", ctypes.c_int),
+        ("dwAttributes", ctypes.c_uint),
+        ("szDisplayName", ctypes.c_wchar * 260),
+        ("szTypeName", ctypes.c_wchar * 80)
+    ]
+
+
+class ICONINFO(ctypes.Structure):
+    _fields_ = [
+        ("fIcon", wintypes.BOOL),
+        ("xHotspot", wintypes.DWORD),
+        ("yHotspot", wintypes.DWORD),
+        ("hbmMask", wintypes.HBITMAP),
+        ("hbmColor", wintypes.HBITMAP)
+    ]
+
+
+class _Api:
+    """已设置参数和返回值类型的API函数"""
+
+    def __init__(self):
+        shell32 = ctypes.windll.shell32
+        user32 = ctypes.windll.user32
+        gdi32 = ctypes.windll.gdi32
+        kernel32 = ctypes.windll.kernel32
+        ntdll = ctypes.windll.ntdll
+        handle = ctypes.c_void_p
+
+        def bind(dll, name, restype, *argtypes):
+            func = getattr(dll, name)
+            func.restype = restype
+            func.argtypes = argtypes
+            return func
+
+        self.ExtractIconExW = bind(shell32, "ExtractIconExW", wintypes.UINT,
+                                   wintypes.LPCWSTR, ctypes.c_int, ctypes.POINTER(handle),
+                                   ctypes.POINTER(handle), wintypes.UINT)
+        self.SHGetFileInfoW = bind(shell32, "SHGetFileInfoW", ctypes.c_size_t,
+                                   wintypes.LPCWSTR, wintypes.DWORD, ctypes.POINTER(SHFILEINFO),
+                                   wintypes.UINT, wintypes.UINT)
+
+        self.GetDC = bind(user32, "GetDC", handle, handle)
+        self.ReleaseDC = bind(user32, "ReleaseDC", ctypes.c_int, handle, handle)
+        self.GetIconInfo = bind(user32, "GetIconInfo", wintypes.BOOL, handle, ctypes.POINTER(ICONINFO))
+        self.DestroyIcon = bind(user32, "DestroyIcon", wintypes.BOOL, handle)
+
+        self.EnumWindows = bind(user32, "EnumWindows", wintypes.BOOL, WNDENUMPROC, wintypes.LPARAM)
+        self.GetWindowThreadProcessId = bind(user32, "GetWindowThreadProcessId", wintypes.DWORD,
+                                             handle, ctypes.POINTER(wintypes.DWORD))
+        self.IsWindowVisible = bind(user32, "IsWindowVisible", wintypes.BOOL, handle)
+        self.GetWindow = bind(user32, "GetWindow", handle, handle, wintypes.UINT)
+        self.IsIconic = bind(user32, "IsIconic", wintypes.BOOL, handle)
+        self.ShowWindow = bind(user32, "ShowWindow", wintypes.BOOL, handle, ctypes.c_int)
+        self.SetForegroundWindow = bind(user32, "SetForegroundWindow", wintypes.BOOL, handle)
+        self.WaitForInputIdle = bind(user32, "WaitForInputIdle", wintypes.DWORD, handle, wintypes.DWORD)
+
+        self.GetCurrentThread = bind(kernel32, "GetCurrentThread", handle)
+        self.SetThreadPriority = bind(kernel32, "SetThreadPriority", wintypes.BOOL, handle, ctypes.c_int)
+        self.OpenProcess = bind(kernel32, "OpenProcess", handle, wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+        self.CloseHandle = bind(kernel32, "CloseHandle", wintypes.BOOL, handle)
+        self.GetPriorityClass = bind(kernel32, "GetPriorityClass", wintypes.DWORD, handle)
+        self.SetProcessAffinityMask = bind(kernel32, "SetProcessAffinityMask", wintypes.BOOL, handle, ctypes.c_size_t)
+        self.GetProcessAffinityMask = bind(kernel32, "GetProcessAffinityMask", wintypes.BOOL, handle,
+                                           ctypes.POINTER(ctypes.c_size_t), ctypes.POINTER(ctypes.c_size_t))
+        self.NtResumeProcess = bind(ntdll, "NtResumeProcess", ctypes.c_long, handle)
+        self.NtSetInformationProcess = bind(ntdll, "NtSetInformationProcess", ctypes.c_long,
+                                            handle, ctypes.c_int, ctypes.c_void_p, wintypes.ULONG)
+        self.NtQueryInformationProcess = bind(ntdll, "NtQueryInformationProcess", ctypes.c_long,
+                                              handle, ctypes.c_int, ctypes.c_void_p, wintypes.ULONG,
+                                              ctypes.POINTER(wintypes.ULONG))
+
+        self.DeleteObject = bind(gdi32, "DeleteObject", wintypes.BOOL, handle)
+        self.GetDIBits = bind(gdi32, "GetDIBits", ctypes.c_int,
+                              handle, handle, wintypes.UINT, wintypes.UINT, ctypes.c_void_p,
+                              ctypes.POINTER(BITMAPINFO), wintypes.UINT)
+
+
+_api = None
+
+
+def get_api():
+    """返回缓存的API函数集合（仅限Windows）"""
+    global _api
+    if _api is None:
+        _api = _Api()
+    return _api
+
+
+def focus_process_window(pids):
+    """把属于这些进程的第一个可见顶层窗口切换到前台（最小化时先还原），找到窗口时返回True"""
+    api = get_api()
+    pids = set(pids)
+    found = []
+
+    def callback(hwnd, lparam):
+        pid = wintypes.DWORD()
+        api.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        if pid.value in pids and api.IsWindowVisible(hwnd) and not api.GetWindow(hwnd, GW_OWNER):
+            found.append(hwnd)
+            return False
+        return True
+
+    api.EnumWindows(WNDENUMPROC(callback), 0)
+    if not found:
+        return False
+    if api.IsIconic(found[0]):
+        api.ShowWindow(found[0], SW_RESTORE)
+    api.SetForegroundWindow(found[0])
+    return True
+
+
+@contextlib.contextmanager
+def open_process(pid, access):
+    """按PID打开进程句柄，用完后关闭，打开失败时抛出 OSError
+
+    用于本程序启动的子进程：Popen 对象在 wait() 之前一直持有进程句柄，PID 不会被其他进程重用。
+    """
+    api = get_api()
+    handle = api.OpenProcess(access, False, pid)
+    if not handle:
+        raise ctypes.WinError()
+    try:
+        yield handle
+    finally:
+        api.CloseHandle(handle)
+
+
+def wait_input_idle(pid, timeout_ms):
+    """等待子进程完成初始化、可以响应输入（控制台程序立即返回False）"""
+    with open_process(pid, PROCESS_QUERY_INFORMATION | SYNCHRONIZE) as handle:
+        return get_api().WaitForInputIdle(handle, timeout_ms) == WAIT_OBJECT_0
+
+
+def set_background_mode(enabled):
+    """当前线程进入（或退出）后台模式：降低I/O和内存优先级，不影响前台程序的磁盘读取"""
+    api = get_api()
+    mode = THREAD_MODE_BACKGROUND_BEGIN if enabled else THREAD_MODE_BACKGROUND_END
+    return bool(api.SetThreadPriority(api.GetCurrentThread(), mode))
+
+
+def set_process_affinity(handle, mask):
+    """设置进程可以使用的CPU（位掩码）"""
+    if not get_api().SetProcessAffinityMask(handle, mask):
+        raise ctypes.WinError()
+
+
+def set_io_priority(handle, hint):
+    """设置进程的I/O优先级（IO_PRIORITY_HINT：0 很低，1 低，2 普通，3 高）"""
+    value = wintypes.ULONG(hint)
+    status = get_api().NtSetInformationProcess(handle, PROCESS_IO_PRIORITY, ctypes.byref(value), ctypes.sizeof(value))
+    if status < 0:
+        raise OSError(f"NtSetInformationProcess 失败 (0x{status & 0xFFFFFFFF:08X})")
+
+
+def resume_process(handle):
+    """恢复以 CREATE_SUSPENDED 创建的进程"""
+    status = get_api().NtResumeProcess(handle)
+    if status < 0:
+        raise OSError(f"NtResumeProcess 失败 (0x{status & 0xFFFFFFFF:08X})")
+
+
+def query_process(pid):
+    """读取进程的 (优先级类, CPU位掩码, I/O优先级)，I/O优先级读不到时为None"""
+    api = get_api()
+    process = api.OpenProcess(PROCESS_QUERY_INFORMATION, False, pid)
+    if not process:
+        process = api.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not process:
+        raise ProcessLookupError(pid, f"无法打开进程 {pid}")
+    try:
+        priority_class = api.GetPriorityClass(process)
+        if not priority_class:
+            raise ctypes.WinError()
+        mask = ctypes.c_size_t()
+        system_mask = ctypes.c_size_t()
+        if not api.GetProcessAffinityMask(process, ctypes.byref(mask), ctypes.byref(system_mask)):
+            raise ctypes.WinError()
+        hint = wintypes.ULONG()
+        status = api.NtQueryInformationProcess(process, PROCESS_IO_PRIORITY, ctypes.byref(hint),
+                                               ctypes.sizeof(hint), None)
+        return priority_class, mask.value, hint.value if status >= 0 else None
+    finally:
+        api.CloseHandle(process)
+
+
+_com_state = threading.local()
+
+
+def init_com():
+    """为当前线程初始化COM（每个线程只初始化一次，线程结束前不释放）；SHGetFileInfo 等Shell函数需要"""
+    if not getattr(_com_state, "initialized", False):
+        # COINIT_APARTMENTTHREADED
+        ctypes.windll.ole32.CoInitializeEx(None, 0x2)
+        _com_state.initialized = True
+
+
+def enable_dpi_awareness():
+    """声明进程支持高DPI（Windows 8.1以上用SetProcessDpiAwareness，否则用SetProcessDPIAware）"""
+    try:
+        # 1 = PROCESS_SYSTEM_DPI_AWARE
+        ctypes.windll.shcore.SetProcessDpiAwareness(1)
+        return True
+    except (AttributeError, OSError):
+        pass
+    try:
+        return bool(ctypes.windll.user32.SetProcessDPIAware())
+    except (AttributeError, OSError):
+        return False